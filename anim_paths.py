@@ -0,0 +1,158 @@
+"""シェイプキーを参照するアニメーション・ドライバーのデータパスの書き換え
+
+F-Curveやドライバー変数はシェイプキーを名前（``key_blocks["名前"]``）で参照するため、
+シェイプキーを削除・統合する前に、残すシェイプキーの名前へ付け替えておく。
+並べ替えで名前を入れ替える場合は、Blenderによる自動の書き換えを記録したパスで元に戻す。
+"""
+import re
+
+import bpy
+
+# key_blocks["名前"] で始まるデータパス（head は参照元のIDの種類による接頭辞）
+KEY_BLOCK_PATH = re.compile(r'^(?P<head>(?:data\.)?(?:shape_keys\.)?)key_blocks\["(?P<name>(?:[^"\\]|\\.)*)"\]')
+
+# ドライバー変数のターゲットのIDの種類と、Keyデータブロックまでのデータパスの接頭辞
+TARGET_PATH_HEADS = {
+    'KEY': "",
+    'MESH': "shape_keys.",
+    'OBJECT': "data.shape_keys.",
+}
+
+
+def escape_name(name):
+    """シェイプキー名をデータパス用にエスケープする"""
+    return name.replace("\\", "\\\\").replace('"', '\\"')
+
+
+def unescape_name(name):
+    """データパス中でエスケープされたシェイプキー名を元に戻す"""
+    return re.sub(r'\\(.)', r'\1', name)
+
+
+def key_block_path(name):
+    return f'key_blocks["{escape_name(name)}"]'
+
+
+def rename_key_block_path(data_path, mapping, head=""):
+    """データパスが参照するシェイプキーを mapping {旧名: 新名} に従って付け替える
+
+    接頭辞が head と一致し、旧名を参照している場合だけ新しいデータパスを返す（それ以外は None）。
+    """
+    match = KEY_BLOCK_PATH.match(data_path)
+    if not match or match.group('head') != head:
+        return None
+    new_name = mapping.get(unescape_name(match.group('name')))
+    if new_name is None:
+        return None
+    return head + key_block_path(new_name) + data_path[match.end():]
+
+
+def iter_animation_data():
+    """ファイル内でアニメーションデータを持つ全てのIDについて (ID, animation_data) を返す"""
+    for prop in bpy.data.bl_rna.properties:
+        if prop.type != 'COLLECTION':
+            continue
+        for id_data in getattr(bpy.data, prop.identifier):
+            animation_data = getattr(id_data, "animation_data", None)
+            if animation_data is not None:
+                yield id_data, animation_data
+
+
+def retarget_key_animation(key, mapping):
+    """Keyデータブロックのアクションとドライバーのうち、旧名のシェイプキーのF-Curveを新名に付け替える
+
+    付け替え先に同じデータパスのF-Curveが既にある場合は付け替えない
+    （旧名のシェイプキーを削除すると一緒に削除される）。
+
+    Returns:
+        (付け替えた数, 付け替えなかった数)
+    """
+    animation_data = key.animation_data
+    if animation_data is None:
+        return 0, 0
+
+    collections = [animation_data.drivers]
+    if animation_data.action is not None:
+        collections.append(animation_data.action.fcurves)
+
+    moved = skipped = 0
+    for fcurves in collections:
+        existing = {(fcurve.data_path, fcurve.array_index) for fcurve in fcurves}
+        for fcurve in list(fcurves):
+            new_path = rename_key_block_path(fcurve.data_path, mapping)
+            if new_path is None:
+                continue
+            if (new_path, fcurve.array_index) in existing:
+                skipped += 1
+                continue
+            existing.add((new_path, fcurve.array_index))
+            fcurve.data_path = new_path
+            moved += 1
+    return moved, skipped
+
+
+def retarget_driver_variables(key, mapping):
+    """ファイル内の全ドライバー変数のうち、旧名のシェイプキーを参照しているものを新名に付け替える
+
+    Returns:
+        付け替えたターゲットの数
+    """
+    count = 0
+    for id_data, animation_data in iter_animation_data():
+        for fcurve in animation_data.drivers:
+            for var in fcurve.driver.variables:
+                for target in var.targets:
+                    head = TARGET_PATH_HEADS.get(target.id_type)
+                    if head is None or target.id is None or target_key(target) != key:
+                        continue
+                    new_path = rename_key_block_path(target.data_path, mapping, head)
+                    if new_path is not None:
+                        target.data_path = new_path
+                        count += 1
+    return count
+
+
+def target_key(target):
+    """ドライバー変数のターゲットのIDから参照しているKeyデータブロックを取得する"""
+    id_data = target.id
+    if target.id_type == 'KEY':
+        return id_data
+    if target.id_type == 'MESH':
+        return id_data.shape_keys
+    if target.id_type == 'OBJECT' and id_data.type == 'MESH':
+        return id_data.data.shape_keys
+    return None
+
+
+def record_key_block_paths():
+    """ファイル内で key_blocks を参照している全てのデータパスを記録する
+
+    シェイプキーの名前を変更すると、Blenderは参照しているF-Curveとドライバー変数の
+    データパスを自動で書き換える。並べ替えのように名前を一時的に入れ替える処理の前に
+    記録しておき、処理後に restore_data_paths() で元に戻す。
+
+    Returns:
+        [(F-Curveまたはドライバー変数のターゲット, 元のデータパス)]
+    """
+    records = []
+    for action in bpy.data.actions:
+        records.extend((fcurve, fcurve.data_path) for fcurve in action.fcurves
+                       if "key_blocks[" in fcurve.data_path)
+    for id_data, animation_data in iter_animation_data():
+        for fcurve in animation_data.drivers:
+            if "key_blocks[" in fcurve.data_path:
+                records.append((fcurve, fcurve.data_path))
+            for var in fcurve.driver.variables:
+                records.extend((target, target.data_path) for target in var.targets
+                               if "key_blocks[" in target.data_path)
+    return records
+
+
+def restore_data_paths(records):
+    """record_key_block_paths() で記録したデータパスに戻し、戻した数を返す"""
+    count = 0
+    for owner, data_path in records:
+        if owner.data_path != data_path:
+            owner.data_path = data_path
+            count += 1
+    return count
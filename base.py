@@ -0,0 +1,46 @@
+"""各オペレーター共通の基本クラス"""
+
+
+class ShapeKeyToolsBase:
+    """基本的なユーティリティメソッドを提供するベースクラス"""
+    
+    @classmethod
+    def setup_progress(cls, context, total_steps):
+        wm = context.window_manager
+        wm.progress_begin(0, total_steps)
+        
+    @classmethod
+    def update_progress(cls, context, step):
+        wm = context.window_manager
+        wm.progress_update(step)
+        
+    @classmethod
+    def end_progress(cls, context):
+        wm = context.window_manager
+        wm.progress_end()
+
+    @classmethod
+    def validate_object(cls, obj):
+        """オブジェクトとシェイプキーの妥当性をチェック"""
+        if not obj:
+            return False, "アクティブオブジェクトが存在しません"
+        if obj.type != 'MESH':
+            return False, "メッシュオブジェクトではありません"
+        if not obj.data.shape_keys:
+            return False, "シェイプキーが存在しません"
+        return True, ""
+
+    @classmethod
+    def get_processable_shape_keys(cls, obj):
+        """処理可能なシェイプキーのリストを取得（Basis以外）"""
+        if not obj.data.shape_keys:
+            return []
+        basis = obj.data.shape_keys.reference_key
+        return [key for key in obj.data.shape_keys.key_blocks if key != basis]
+
+
+SIDE_ITEMS = [
+    ('BOTH', "両側", "左右両方の変形を使用します"),
+    ('LEFT', "左のみ", "左側（X ≥ 0、分割した「〜左」と同じ側）の変形のみ使用します"),
+    ('RIGHT', "右のみ", "右側（X < 0、分割した「〜右」と同じ側）の変形のみ使用します"),
+]
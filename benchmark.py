@@ -0,0 +1,116 @@
+"""アドオンの起動時間と主要な処理の所要時間を計測します"""
+import json
+import os
+import subprocess
+
+import bpy
+
+from .headless import registered, create_test_object, remove_object, timed
+
+# 起動時には読み込まれないはずの重いモジュール
+HEAVY_MODULES = ("kernels", "snapshot", "stats", "evaluate", "morphs", "fingerprint", "costs", "fcurves", "keystack", "keydiff")
+
+# 新しいBlenderプロセスでアドオンの読み込みと register() の時間を計測するスクリプト
+STARTUP_SCRIPT = """
+import importlib, importlib.util, json, os, sys, time
+package_dir, name, heavy_modules = {package_dir!r}, {name!r}, {heavy_modules!r}
+numpy_before = "numpy" in sys.modules
+start = time.perf_counter()
+spec = importlib.util.spec_from_file_location(
+    name, os.path.join(package_dir, "__init__.py"), submodule_search_locations=[package_dir])
+module = importlib.util.module_from_spec(spec)
+sys.modules[name] = module
+spec.loader.exec_module(module)
+imported = time.perf_counter()
+module.register()
+registered = time.perf_counter()
+loaded = [m for m in heavy_modules if name + "." + m in sys.modules]
+numpy_loaded = "numpy" in sys.modules and not numpy_before
+importlib.import_module(name + ".kernels")
+first_use = time.perf_counter()
+module.unregister()
+print("PAYU_STARTUP " + json.dumps({{
+    "import_ms": (imported - start) * 1000.0,
+    "register_ms": (registered - imported) * 1000.0,
+    "first_use_ms": (first_use - registered) * 1000.0,
+    "heavy_modules_at_startup": loaded,
+    "numpy_at_startup": numpy_loaded,
+}}))
+"""
+
+
+def add_arguments(parser):
+    parser.add_argument("--vertices", type=int, default=20000, help="テスト用メッシュの頂点数")
+    parser.add_argument("--keys", type=int, default=100, help="テスト用メッシュのシェイプキー数")
+    parser.add_argument("--json", help="結果をJSONで書き出すファイル")
+
+
+def measure_startup(addon):
+    """新しいBlenderプロセスでアドオンの起動時間を計測する"""
+    script = STARTUP_SCRIPT.format(
+        package_dir=os.path.dirname(os.path.abspath(addon.__file__)),
+        name=addon.__name__,
+        heavy_modules=HEAVY_MODULES,
+    )
+    process = subprocess.run(
+        [bpy.app.binary_path, "-b", "--factory-startup", "--python-expr", script],
+        capture_output=True, text=True, timeout=300)
+    for line in process.stdout.splitlines():
+        if line.startswith("PAYU_STARTUP "):
+            return json.loads(line[len("PAYU_STARTUP "):])
+    raise RuntimeError(f"起動時間を計測できませんでした:\n{process.stderr}")
+
+
+def measure_operators(vertex_count, key_count):
+    """テスト用メッシュで主要なオペレーターの所要時間を計測する"""
+    results = []
+
+    def measure(name, operator, **kwargs):
+        result, seconds = timed(operator, **kwargs)
+        results.append({"name": name, "seconds": seconds, "result": sorted(result)})
+
+    obj = create_test_object("PayuBenchmark", vertex_count, key_count)
+    try:
+        measure("split_all", bpy.ops.mesh.split_all_shape_keys)
+        measure("generate_opposite_all", bpy.ops.mesh.generate_opposite_shape_key, all_keys=True, overwrite=True)
+        measure("symmetrize_all", bpy.ops.mesh.symmetrize_shape_key, all_keys=True, mode='AVERAGE')
+        measure("scan_stats", bpy.ops.mesh.scan_shape_key_stats)
+        measure("scan_stats_cached", bpy.ops.mesh.scan_shape_key_stats)
+
+        for key in obj.data.shape_keys.key_blocks[1:11]:
+            key.value = 0.5
+        measure("compose", bpy.ops.mesh.compose_shape_keys, source='SLIDERS', target_name="合成")
+
+        # 統合の計算を計測するため、分割元のシェイプキーを削除しておく
+        for i in range(key_count):
+            obj.shape_key_remove(obj.data.shape_keys.key_blocks[f"Key{i:03d}"])
+        measure("merge_all", bpy.ops.mesh.merge_all_shape_keys)
+    finally:
+        remove_object(obj)
+
+    return results
+
+
+def run(addon, args):
+    report = {
+        "blender": bpy.app.version_string,
+        "vertices": args.vertices,
+        "keys": args.keys,
+        "startup": measure_startup(addon),
+    }
+    with registered(addon):
+        report["operators"] = measure_operators(args.vertices, args.keys)
+
+    startup = report["startup"]
+    print(f"起動: import {startup['import_ms']:.1f} ms / register {startup['register_ms']:.1f} ms"
+          f" / 初回使用 {startup['first_use_ms']:.1f} ms")
+    print(f"  起動時に読み込まれた重いモジュール: {startup['heavy_modules_at_startup'] or 'なし'}"
+          f" / NumPy: {'あり' if startup['numpy_at_startup'] else 'なし'}")
+    print(f"処理時間（頂点数 {args.vertices}, シェイプキー数 {args.keys}）:")
+    for entry in report["operators"]:
+        print(f"  {entry['name']:<24} {entry['seconds'] * 1000.0:10.1f} ms  {entry['result']}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return 0
@@ -0,0 +1,222 @@
+"""ポーズからシェイプキーを一括作成"""
+import time
+
+import bpy
+from bpy.types import Operator
+from bpy.props import BoolProperty, EnumProperty, StringProperty
+
+from .base import ShapeKeyToolsBase
+from .naming import plan_split
+
+
+def parse_frames(text):
+    """「1, 5, 10-20」形式のフレーム指定を、重複を除いたフレームのリストにする"""
+    frames = []
+    for part in text.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        first, sep, last = part.partition("-")
+        try:
+            start = int(first)
+            stop = int(last) if sep else start
+        except ValueError:
+            raise ValueError(f"フレームの指定が正しくありません: {part}")
+        frames.extend(frame for frame in range(start, stop + 1) if frame not in frames)
+    return frames
+
+
+def find_armature(obj):
+    """メッシュを変形しているアーマチュアを取得する"""
+    for mod in obj.modifiers:
+        if mod.type == 'ARMATURE' and mod.show_viewport and mod.object:
+            return mod.object
+    return None
+
+
+class MESH_OT_capture_pose_shape_keys(Operator, ShapeKeyToolsBase):
+    bl_idname = "mesh.capture_pose_shape_keys"
+    bl_label = "ポーズからシェイプキーを作成"
+    bl_description = "指定したフレームやマーカーのポーズを1つずつ評価し、変形した形状をシェイプキーとして一括作成します"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    source: EnumProperty(
+        name="ポーズ",
+        items=[
+            ('FRAMES', "フレーム", "指定したフレームのポーズを使用します"),
+            ('MARKERS', "マーカー", "タイムラインのマーカーのフレームを使用し、マーカー名をシェイプキー名にします"),
+            ('POSE_MARKERS', "ポーズライブラリ", "アーマチュアのポーズライブラリ（ポーズマーカー）の各ポーズを使用します"),
+        ],
+        default='MARKERS',
+    )
+    frames: StringProperty(
+        name="フレーム",
+        description="カンマ区切りのフレーム番号（「10-20」で範囲指定）",
+        default="1",
+    )
+    name_prefix: StringProperty(
+        name="名前の接頭辞",
+        description="フレームを指定した場合のシェイプキー名（接頭辞 + フレーム番号）",
+        default="Pose_",
+    )
+    selected_only: BoolProperty(
+        name="選択したマーカーのみ",
+        description="選択しているマーカーのみを使用します",
+        default=False,
+    )
+    armature_only: BoolProperty(
+        name="アーマチュアの変形のみ",
+        description="アーマチュア以外の修飾子を無効にして評価します",
+        default=True,
+    )
+    include_shape_keys: BoolProperty(
+        name="シェイプキーの変形を含める",
+        description="現在のシェイプキーの値による変形も含めて作成します",
+        default=False,
+    )
+    split_sides: BoolProperty(
+        name="左右に分割",
+        description="作成したシェイプキーを、分割と同じ名前の規則で左右にも分割します",
+        default=False,
+    )
+
+    def invoke(self, context, event):
+        return context.window_manager.invoke_props_dialog(self)
+
+    def draw(self, context):
+        layout = self.layout
+        layout.prop(self, "source")
+        if self.source == 'FRAMES':
+            layout.prop(self, "frames")
+            layout.prop(self, "name_prefix")
+        else:
+            layout.prop(self, "selected_only")
+        layout.prop(self, "armature_only")
+        layout.prop(self, "include_shape_keys")
+        layout.prop(self, "split_sides")
+
+    def collect_poses(self, context, obj):
+        """(シェイプキー名, フレーム) のリストと、評価中に使うポーズライブラリのアクションを取得する"""
+        if self.source == 'FRAMES':
+            return [(f"{self.name_prefix}{frame}", frame) for frame in parse_frames(self.frames)], None
+
+        if self.source == 'MARKERS':
+            markers = context.scene.timeline_markers
+            action = None
+        else:
+            armature = find_armature(obj)
+            if armature is None:
+                raise ValueError("メッシュを変形しているアーマチュアが見つかりません")
+            action = getattr(armature, "pose_library", None)
+            if action is None and armature.animation_data:
+                action = armature.animation_data.action
+            if action is None or not action.pose_markers:
+                raise ValueError(f"{armature.name} にポーズライブラリ（ポーズマーカー）が見つかりません")
+            markers = action.pose_markers
+
+        markers = [marker for marker in markers if marker.select or not self.selected_only]
+        return [(marker.name, marker.frame) for marker in sorted(markers, key=lambda m: m.frame)], action
+
+    def capture(self, context, obj, poses):
+        """ポーズを評価してシェイプキーを作成し、(作成・更新したシェイプキーの数, 上書きしたシェイプキー名) を返す
+
+        基準のシェイプキー（Basis）と同じ名前のポーズがある場合は、評価を始める前に ValueError で中断する。
+        """
+        from .evaluate import capture_poses
+        from .kernels import get_side_mask, read_shape_key_coords, split_key_coords, write_shape_key_coords
+
+        if not obj.data.shape_keys:
+            obj.shape_key_add(name="Basis", from_mix=False)
+        shape_keys = obj.data.shape_keys
+        key_blocks = shape_keys.key_blocks
+        basis = shape_keys.reference_key
+        basis_co = read_shape_key_coords(basis)
+        right_mask = get_side_mask(obj, basis_co) if self.split_sides else None
+
+        # 書き込むシェイプキー名を先に確かめる（Basisに書き込むと他の全シェイプキーの変形量が変わる）
+        names = []
+        for name, frame in poses:
+            names.append(name)
+            if self.split_sides:
+                names.extend(side_name for side_name, side in plan_split(name, ())[0])
+        if basis.name in names:
+            raise ValueError(f"'{basis.name}' は基準のシェイプキーのため上書きできません。ポーズの名前を変更してください")
+        overwritten = [name for name in dict.fromkeys(names) if name in key_blocks]
+        for name in overwritten:
+            print(f"[ポーズから作成] 既存のシェイプキー '{name}' を上書きします")
+
+        def write(name, coords):
+            key_block = key_blocks.get(name) or obj.shape_key_add(name=name, from_mix=False)
+            write_shape_key_coords(key_block, coords)
+            key_block.relative_key = basis
+            key_block.value = 0.0
+
+        hidden = []
+        if self.armature_only:
+            hidden = [mod for mod in obj.modifiers if mod.type != 'ARMATURE' and mod.show_viewport]
+
+        count = 0
+        self.setup_progress(context, len(poses))
+        for i, (name, coords) in enumerate(capture_poses(context, obj, poses, hidden, self.include_shape_keys)):
+            write(name, coords)
+            count += 1
+            if self.split_sides:
+                # 既存の左右のシェイプキーも撮り直した形状で上書きする
+                creates, message = plan_split(name, ())
+                for side_name, side in creates:
+                    write(side_name, split_key_coords(coords, basis_co, right_mask, side))
+                    count += 1
+            self.update_progress(context, i + 1)
+        return count, overwritten
+
+    def execute(self, context):
+        obj = context.active_object
+
+        if not obj or obj.type != 'MESH':
+            self.report({'ERROR'}, "メッシュオブジェクトを選択してください")
+            return {'CANCELLED'}
+
+        try:
+            poses, action = self.collect_poses(context, obj)
+        except ValueError as e:
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+        if not poses:
+            self.report({'WARNING'}, "作成するポーズが見つかりません")
+            return {'CANCELLED'}
+
+        # 現在のモードを保存
+        original_mode = obj.mode
+        bpy.ops.object.mode_set(mode='OBJECT')
+
+        # ポーズライブラリは評価中だけアーマチュアのアクションにする
+        armature = find_armature(obj) if action else None
+        original_action = None
+        if armature:
+            if armature.animation_data is None:
+                armature.animation_data_create()
+            original_action = armature.animation_data.action
+            armature.animation_data.action = action
+
+        try:
+            start = time.perf_counter()
+            count, overwritten = self.capture(context, obj, poses)
+            message = (f"{len(poses)}個のポーズから{count}個のシェイプキーを作成・更新しました"
+                       f"（{time.perf_counter() - start:.2f}秒）")
+            if overwritten:
+                message += f"。既存の{len(overwritten)}個を上書きしました（コンソールを参照）"
+            self.report({'INFO'}, message)
+            return {'FINISHED'}
+
+        except ValueError as e:
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+        except Exception as e:
+            self.report({'ERROR'}, f"エラーが発生しました: {str(e)}")
+            return {'CANCELLED'}
+        finally:
+            self.end_progress(context)
+            if armature:
+                armature.animation_data.action = original_action
+            # 元のモードに戻す
+            bpy.ops.object.mode_set(mode=original_mode)
@@ -0,0 +1,66 @@
+"""ヘッドレス実行用のエントリーポイント
+
+使い方:
+    blender -b [ファイル.blend] --factory-startup --python cli.py -- <コマンド> [オプション]
+
+コマンド:
+    benchmark   アドオンの起動時間と主要な処理の所要時間を計測します
+    verify      高速化した処理と高速化前の実装の結果を比較します
+    morphs      頂点モーフ（変形した頂点だけの疎なオフセット表）を書き出します
+    costs       シェイプキーとドライバーの実行時コストをキャラクターごとに集計します
+    diff        2つのメッシュ・2つの .blend ファイルのシェイプキーの差分を一覧にします
+"""
+import argparse
+import importlib
+import importlib.util
+import os
+import sys
+
+
+def load_addon():
+    """このファイルのあるフォルダをアドオンのパッケージとして読み込む"""
+    package_dir = os.path.dirname(os.path.abspath(__file__))
+    name = os.path.basename(package_dir).replace("-", "_").replace(".", "_")
+    if name in sys.modules:
+        return sys.modules[name]
+
+    spec = importlib.util.spec_from_file_location(
+        name, os.path.join(package_dir, "__init__.py"), submodule_search_locations=[package_dir])
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+# コマンド名と、そのコマンドを実装するモジュール名
+COMMANDS = {
+    "benchmark": "benchmark",
+    "verify": "verify",
+    "morphs": "morphs",
+    "costs": "costs",
+    "diff": "keydiff",
+}
+
+
+def main():
+    # Blenderの引数のうち「--」以降をこのスクリプトの引数として扱う
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+
+    addon = load_addon()
+    parser = argparse.ArgumentParser(prog="cli.py")
+    subparsers = parser.add_subparsers(dest="command")
+    for command, module_name in COMMANDS.items():
+        module = importlib.import_module(f"{addon.__name__}.{module_name}")
+        subparser = subparsers.add_parser(command, help=module.__doc__.splitlines()[0])
+        module.add_arguments(subparser)
+        subparser.set_defaults(run=module.run)
+
+    args = parser.parse_args(argv)
+    if not args.command:
+        parser.print_help()
+        return 1
+    return args.run(addon, args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+"""2つのメッシュ・2つの .blend ファイルのシェイプキーの比較"""
+import bpy
+from bpy.types import Operator
+from bpy.props import EnumProperty, FloatProperty, StringProperty
+
+from .base import ShapeKeyToolsBase
+
+
+class MESH_OT_diff_shape_keys(Operator, ShapeKeyToolsBase):
+    bl_idname = "mesh.diff_shape_keys"
+    bl_label = "シェイプキーの差分"
+    bl_description = ("別のオブジェクトや別の .blend ファイルの同じ名前のオブジェクトとシェイプキーを比較し、"
+                      "追加・削除・名前の変更・変更されたシェイプキーを一覧にします")
+    bl_options = {'REGISTER'}
+
+    source: EnumProperty(
+        name="比較元",
+        items=[
+            ('OBJECT', "選択中のオブジェクト", "選択しているもう1つのメッシュオブジェクトを比較元にします"),
+            ('FILE', ".blend ファイル", "指定した .blend ファイル内の同じ名前のオブジェクトを比較元にします"),
+        ],
+        default='OBJECT',
+    )
+    filepath: StringProperty(
+        name="ファイル",
+        description="比較元の .blend ファイル",
+        subtype='FILE_PATH',
+    )
+    tolerance: FloatProperty(
+        name="許容誤差",
+        description="各頂点の移動量の差がこれ以下なら変わっていないとみなします",
+        default=1e-4,
+        min=1e-7,
+        precision=5,
+    )
+
+    def invoke(self, context, event):
+        return context.window_manager.invoke_props_dialog(self)
+
+    def draw(self, context):
+        layout = self.layout
+        layout.prop(self, "source")
+        if self.source == 'FILE':
+            layout.prop(self, "filepath")
+        layout.prop(self, "tolerance")
+
+    def execute(self, context):
+        from .keydiff import diff_blend_file, diff_shape_keys, print_diff
+
+        obj = context.active_object
+
+        # オブジェクトの妥当性チェック
+        valid, message = self.validate_object(obj)
+        if not valid:
+            self.report({'ERROR'}, message)
+            return {'CANCELLED'}
+
+        if self.source == 'OBJECT':
+            others = [other for other in context.selected_objects
+                      if other != obj and other.type == 'MESH' and other.data.shape_keys]
+            if not others:
+                self.report({'ERROR'}, "比較元としてシェイプキーを持つメッシュオブジェクトをもう1つ選択してください")
+                return {'CANCELLED'}
+        elif not self.filepath:
+            self.report({'ERROR'}, "比較元の .blend ファイルを指定してください")
+            return {'CANCELLED'}
+
+        # 編集モードの変更を反映するためオブジェクトモードで読み込む
+        original_mode = obj.mode
+        bpy.ops.object.mode_set(mode='OBJECT')
+
+        try:
+            if self.source == 'OBJECT':
+                report = diff_shape_keys(others[0], obj, self.tolerance)
+            else:
+                reports, missing = diff_blend_file(self.filepath, [obj], self.tolerance)
+                if missing:
+                    self.report({'ERROR'}, f"比較元のファイルにシェイプキーを持つ {obj.name} が見つかりません")
+                    return {'CANCELLED'}
+                report = reports[0]
+                if "error" in report:
+                    self.report({'ERROR'}, report["error"])
+                    return {'CANCELLED'}
+
+            print_diff(report)
+            message = (f"{report['old']} との差分: 追加 {len(report['added'])}個、削除 {len(report['removed'])}個"
+                       f"、名前の変更 {len(report['renamed'])}個、変更 {len(report['modified'])}個"
+                       f"、変更なし {report['unchanged']}個。詳細はコンソールを参照")
+            if report["basis_changed"]:
+                message += "（Basisも変更されています）"
+            self.report({'INFO'}, message)
+            return {'FINISHED'}
+
+        except ValueError as e:
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+        except Exception as e:
+            self.report({'ERROR'}, f"エラーが発生しました: {str(e)}")
+            return {'CANCELLED'}
+        finally:
+            # 元のモードに戻す
+            bpy.ops.object.mode_set(mode=original_mode)
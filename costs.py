@@ -0,0 +1,218 @@
+"""シェイプキーとドライバーの実行時コストをキャラクターごとに集計します
+
+シーン内のメッシュを1回ずつ調べ、空でないシェイプキーの数・各シェイプキーが
+動かす頂点数・シェイプキーのドライバー数から、再生時の1フレームあたりの
+評価コストを見積もる。シェイプキーはメモリ上限内のまとまりで読み込み、
+動いた頂点数をまとめて計算する。複数のオブジェクトが共有するメッシュは1回だけ調べる。
+"""
+import json
+
+import numpy as np
+
+from .kernels import DISPLACEMENT_EPSILON, read_shape_key_coords
+from .preferences import get_memory_budget
+
+# 1フレームあたりの評価時間の見積もりに使う係数（秒、目安）
+SECONDS_PER_BLENDED_VERTEX = 2e-9  # Blenderは有効なシェイプキーごとに全頂点を合成する
+SECONDS_PER_DRIVER = 1e-6  # 単純な式・平均などのドライバー
+SECONDS_PER_PYTHON_DRIVER = 2e-5  # Pythonで評価する式のドライバー
+
+# 全頂点のこの割合以上を動かすシェイプキーを「広範囲」として警告する
+WIDE_KEY_RATIO = 0.5
+
+# 一覧にする、動かす頂点数の多いシェイプキーの数
+WORST_KEY_COUNT = 20
+
+
+def count_affected_vertices(shape_keys, epsilon=DISPLACEMENT_EPSILON):
+    """Basis以外の各シェイプキーが動かす頂点数を [(シェイプキー, 頂点数)] で返す"""
+    basis = shape_keys.reference_key
+    basis_co = read_shape_key_coords(basis)
+    keys = [key for key in shape_keys.key_blocks if key != basis]
+    batch_size = max(1, min(len(keys), get_memory_budget() // max(1, basis_co.nbytes * 2)))
+    block = np.empty((batch_size,) + basis_co.shape, dtype=np.float32)
+    threshold = epsilon * epsilon
+
+    results = []
+    for start in range(0, len(keys), batch_size):
+        batch = keys[start:start + batch_size]
+        deltas = block[:len(batch)]
+        for j, key in enumerate(batch):
+            read_shape_key_coords(key, deltas[j])
+        deltas -= basis_co
+        affected = np.count_nonzero(np.einsum('kij,kij->ki', deltas, deltas) > threshold, axis=1)
+        results.extend(zip(batch, affected.tolist()))
+    return results
+
+
+def count_drivers(shape_keys):
+    """Keyデータブロックのドライバー数・Pythonで評価するドライバー数・変数の数を返す"""
+    animation_data = shape_keys.animation_data
+    if animation_data is None:
+        return 0, 0, 0
+    drivers = python_drivers = variables = 0
+    for fcurve in animation_data.drivers:
+        driver = fcurve.driver
+        drivers += 1
+        variables += len(driver.variables)
+        if driver.type == 'SCRIPTED' and not getattr(driver, "is_simple_expression", False):
+            python_drivers += 1
+    return drivers, python_drivers, variables
+
+
+def find_character(obj):
+    """オブジェクトが属するキャラクター（変形しているアーマチュア、無ければ最上位の親）を返す"""
+    for mod in obj.modifiers:
+        if mod.type == 'ARMATURE' and mod.object:
+            return mod.object
+    while obj.parent:
+        obj = obj.parent
+    return obj
+
+
+def mesh_cost(mesh, epsilon=DISPLACEMENT_EPSILON):
+    """メッシュ1つ分のコストを集計する
+
+    Returns:
+        (メッシュの集計, [(シェイプキー名, 動かす頂点数)])
+    """
+    shape_keys = mesh.shape_keys
+    vertex_count = len(mesh.vertices)
+    affected = count_affected_vertices(shape_keys, epsilon)
+    drivers, python_drivers, variables = count_drivers(shape_keys)
+
+    active = [(key, count) for key, count in affected if count and not key.mute]
+    empty_keys = [key.name for key, count in affected if not count]
+    wide_keys = [key.name for key, count in active if count >= WIDE_KEY_RATIO * vertex_count]
+    dense_vertices = len(active) * vertex_count
+    seconds = (dense_vertices * SECONDS_PER_BLENDED_VERTEX
+               + (drivers - python_drivers) * SECONDS_PER_DRIVER
+               + python_drivers * SECONDS_PER_PYTHON_DRIVER)
+
+    flags = []
+    if empty_keys:
+        flags.append("EMPTY_KEYS")
+    if wide_keys:
+        flags.append("WIDE_KEYS")
+    if python_drivers:
+        flags.append("PYTHON_DRIVERS")
+
+    entry = {
+        "mesh": mesh.name,
+        "vertices": vertex_count,
+        "shape_keys": len(affected),
+        "non_empty": len(affected) - len(empty_keys),
+        "empty": len(empty_keys),
+        "muted": sum(1 for key, count in affected if key.mute),
+        "affected_vertices": sum(count for key, count in active),
+        "dense_blend_vertices": dense_vertices,
+        "drivers": drivers,
+        "python_drivers": python_drivers,
+        "driver_variables": variables,
+        "estimated_ms_per_frame": seconds * 1000.0,
+        "empty_keys": empty_keys,
+        "wide_keys": wide_keys,
+        "flags": flags,
+    }
+    return entry, [(key.name, count) for key, count in active]
+
+
+# キャラクター・シーン全体で合計する項目
+TOTAL_FIELDS = ("vertices", "shape_keys", "non_empty", "empty", "muted", "affected_vertices",
+                "dense_blend_vertices", "drivers", "python_drivers", "driver_variables",
+                "estimated_ms_per_frame")
+
+
+def sum_fields(entries):
+    return {field: sum(entry[field] for entry in entries) for field in TOTAL_FIELDS}
+
+
+def build_cost_report(scene, epsilon=DISPLACEMENT_EPSILON):
+    """シーン内のシェイプキーを持つ全メッシュを調べ、キャラクターごとのコストレポートを作成する"""
+    import bpy
+
+    mesh_entries = {}
+    characters = {}
+    worst_keys = []
+    for obj in scene.objects:
+        if obj.type != 'MESH' or not obj.data.shape_keys:
+            continue
+        mesh = obj.data
+        if mesh.name not in mesh_entries:
+            entry, key_costs = mesh_cost(mesh, epsilon)
+            mesh_entries[mesh.name] = entry
+            worst_keys.extend({"mesh": mesh.name, "shape_key": name, "affected_vertices": count,
+                               "ratio": count / max(1, entry["vertices"])}
+                              for name, count in key_costs)
+        character = find_character(obj)
+        characters.setdefault(character.name, []).append(dict(mesh_entries[mesh.name], object=obj.name))
+
+    character_reports = []
+    for name, meshes in characters.items():
+        meshes.sort(key=lambda entry: entry["estimated_ms_per_frame"], reverse=True)
+        character_reports.append({"name": name, "totals": sum_fields(meshes), "meshes": meshes})
+    character_reports.sort(key=lambda report: report["totals"]["estimated_ms_per_frame"], reverse=True)
+
+    worst_keys.sort(key=lambda item: item["affected_vertices"], reverse=True)
+    return {
+        "blender": bpy.app.version_string,
+        "scene": scene.name,
+        "epsilon": epsilon,
+        # 同じメッシュを共有するオブジェクトは1回だけ数える
+        "totals": sum_fields(mesh_entries.values()),
+        "characters": character_reports,
+        "worst_keys": worst_keys[:WORST_KEY_COUNT],
+    }
+
+
+def write_cost_report(report, filepath):
+    with open(filepath, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+def over_budget(report, budget_ms):
+    """1フレームあたりの見積もりが budget_ms を超えるキャラクター名のリスト"""
+    return [character["name"] for character in report["characters"]
+            if character["totals"]["estimated_ms_per_frame"] > budget_ms]
+
+
+def print_summary(report):
+    totals = report["totals"]
+    print(f"シーン {report['scene']}: シェイプキー {totals['shape_keys']}個（空 {totals['empty']}個）"
+          f"、ドライバー {totals['drivers']}個、推定 {totals['estimated_ms_per_frame']:.3f} ms/フレーム")
+    for character in report["characters"]:
+        character_totals = character["totals"]
+        print(f"  {character['name']}: {character_totals['estimated_ms_per_frame']:.3f} ms/フレーム"
+              f"（メッシュ {len(character['meshes'])}個、空でないシェイプキー {character_totals['non_empty']}個"
+              f"、ドライバー {character_totals['drivers']}個）")
+        for entry in character["meshes"]:
+            if entry["flags"]:
+                print(f"    {entry['object']}: {', '.join(entry['flags'])}")
+
+
+def add_arguments(parser):
+    parser.add_argument("output", help="レポートを書き出すJSONファイル")
+    parser.add_argument("--scene", help="調べるシーン名（省略時は現在のシーン）")
+    parser.add_argument("--budget-ms", type=float,
+                        help="キャラクターごとの1フレームあたりの上限（ms）。超えた場合は終了コード1")
+
+
+def run(addon, args):
+    import bpy
+
+    scene = bpy.data.scenes.get(args.scene) if args.scene else bpy.context.scene
+    if scene is None:
+        print(f"シーン {args.scene} が見つかりません")
+        return 1
+
+    report = build_cost_report(scene)
+    write_cost_report(report, args.output)
+    print_summary(report)
+    print(f"レポートを {args.output} に書き出しました")
+
+    if args.budget_ms is not None:
+        exceeded = over_budget(report, args.budget_ms)
+        if exceeded:
+            print(f"上限 {args.budget_ms} ms を超えたキャラクター: {', '.join(exceeded)}")
+            return 1
+    return 0
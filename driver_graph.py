@@ -0,0 +1,249 @@
+"""シェイプキーのドライバーの依存関係の解析
+
+ファイル内の全シェイプキー（bpy.data.shape_keys）のドライバーを1回走査して、
+「どのシェイプキーの値がどのシェイプキーの値に依存しているか」のグラフを作る。
+ノードは (Keyデータブロックのポインタ, シェイプキー名) で表す。
+"""
+import re
+
+import bpy
+
+from .anim_paths import escape_name, unescape_name
+
+# ドライバーのF-Curve（Keyデータブロック上）と、変数のターゲットのデータパス
+KEY_VALUE_PATH = re.compile(r'^key_blocks\["((?:[^"\\]|\\.)*)"\]\.value$')
+MESH_VALUE_PATH = re.compile(r'^shape_keys\.key_blocks\["((?:[^"\\]|\\.)*)"\]\.value$')
+
+# 同じ変数が重複しても値が変わらないドライバーの種類（平均は重複した変数の重みが変わるため含めない）
+IDEMPOTENT_TYPES = {'MIN', 'MAX'}
+
+
+def target_node(target):
+    """ドライバー変数のターゲットが指すシェイプキーのノード（シェイプキー以外は None）"""
+    id_data = target.id
+    if id_data is None:
+        return None
+    if target.id_type == 'MESH':
+        match = MESH_VALUE_PATH.match(target.data_path)
+        key = id_data.shape_keys
+    elif target.id_type == 'KEY':
+        match = KEY_VALUE_PATH.match(target.data_path)
+        key = id_data
+    else:
+        return None
+    if not match or key is None:
+        return None
+    return key.as_pointer(), unescape_name(match.group(1))
+
+
+def is_identity_driver(fcurve):
+    """ソースの値をそのまま返すだけのドライバーかどうか
+
+    ミュートしたドライバーや、エラーで評価できないドライバーは値を伝えていないため対象外。
+    """
+    if fcurve.mute or not fcurve.is_valid:
+        return False
+    driver = fcurve.driver
+    if not driver.is_valid or not all(variable.is_valid for variable in driver.variables):
+        return False
+    variables = list(driver.variables)
+    if len(variables) != 1 or variables[0].type != 'SINGLE_PROP':
+        return False
+    if driver.type == 'SCRIPTED':
+        if driver.expression.strip() != variables[0].name:
+            return False
+    elif driver.type not in {'AVERAGE', 'SUM', 'MIN', 'MAX'}:
+        return False
+    if len(fcurve.keyframe_points):
+        return False
+
+    # driver_add() で作られる恒等変換のジェネレーター修飾子は無視する
+    for mod in fcurve.modifiers:
+        if mod.mute:
+            continue
+        if (mod.type == 'GENERATOR' and mod.mode == 'POLYNOMIAL' and mod.poly_order == 1
+                and not mod.use_additive and not mod.use_influence and not mod.use_restricted_range
+                and tuple(mod.coefficients) == (0.0, 1.0)):
+            continue
+        return False
+    return True
+
+
+class ShapeKeyDriverGraph:
+    """シェイプキーのドライバーの依存グラフ"""
+
+    def __init__(self, shape_keys=None):
+        shape_keys = bpy.data.shape_keys if shape_keys is None else shape_keys
+        self.keys = {}      # ポインタ → Keyデータブロック
+        self.drivers = {}   # ノード → ドライバーのF-Curve
+        self.sources = {}   # ノード → [(変数, ソースのノード または None)]
+        self.identity = {}  # ノード → 恒等ドライバーならそのソースのノード
+
+        for key in shape_keys:
+            self.keys[key.as_pointer()] = key
+            animation_data = key.animation_data
+            if animation_data is None:
+                continue
+            for fcurve in animation_data.drivers:
+                match = KEY_VALUE_PATH.match(fcurve.data_path)
+                if not match:
+                    continue
+                node = (key.as_pointer(), unescape_name(match.group(1)))
+                self.drivers[node] = fcurve
+                self.sources[node] = [
+                    (var, target_node(var.targets[0]) if var.type == 'SINGLE_PROP' else None)
+                    for var in fcurve.driver.variables
+                ]
+                if is_identity_driver(fcurve) and self.sources[node][0][1] is not None:
+                    self.identity[node] = self.sources[node][0][1]
+
+    @property
+    def driver_count(self):
+        return len(self.drivers)
+
+    def label(self, node):
+        """ノードの表示名（Keyデータブロックを使っているメッシュ名.シェイプキー名）"""
+        key = self.keys.get(node[0])
+        owner = key.user.name if key is not None and key.user is not None else "?"
+        return f"{owner}.{node[1]}"
+
+    def self_links(self):
+        """自分自身の値を参照しているドライバーのノード"""
+        return [node for node, sources in self.sources.items()
+                if any(source == node for var, source in sources)]
+
+    def duplicate_variables(self):
+        """同じソースを重複して参照している変数 [(ノード, 変数)]（値に影響しないもののみ）"""
+        duplicates = []
+        for node, sources in self.sources.items():
+            if self.drivers[node].driver.type not in IDEMPOTENT_TYPES:
+                continue
+            seen = set()
+            for var, source in sources:
+                if source is None:
+                    continue
+                if source in seen:
+                    duplicates.append((node, var))
+                seen.add(source)
+        return duplicates
+
+    def cycles(self):
+        """依存関係の循環をノードのリストのリストで返す（自己参照は self_links() で扱う）"""
+        edges = {node: {source for var, source in sources if source is not None and source != node}
+                 for node, sources in self.sources.items()}
+        state = {}
+        found = []
+        for start in edges:
+            if start in state:
+                continue
+            # 反復的な深さ優先探索（再帰の深さ制限を避ける）
+            path = [start]
+            state[start] = 'VISITING'
+            stack = [iter(edges[start])]
+            while stack:
+                source = next(stack[-1], None)
+                if source is None:
+                    stack.pop()
+                    state[path.pop()] = 'DONE'
+                    continue
+                if state.get(source) == 'VISITING':
+                    found.append(path[path.index(source):])
+                elif source not in state and source in edges:
+                    state[source] = 'VISITING'
+                    path.append(source)
+                    stack.append(iter(edges[source]))
+        return found
+
+    def resolve_root(self, node):
+        """恒等ドライバーをたどった先の大元のソース（循環する場合は None）"""
+        visited = {node}
+        while node in self.identity:
+            node = self.identity[node]
+            if node in visited:
+                return None
+            visited.add(node)
+        return node
+
+    def slider_range(self, node):
+        """ノードのシェイプキーの値の範囲 (slider_min, slider_max)（見つからない場合は None）"""
+        key = self.keys.get(node[0])
+        key_block = key.key_blocks.get(node[1]) if key is not None else None
+        if key_block is None:
+            return None
+        return key_block.slider_min, key_block.slider_max
+
+    def passes_through(self, source, root):
+        """source から root までの恒等ドライバーが root の値をそのまま伝えるかどうか
+
+        シェイプキーの値は自身のスライダーの範囲に制限されるため、途中のシェイプキーの
+        範囲が root の範囲を含んでいる場合だけ、root に直接つなぎ替えても値が変わらない。
+        """
+        root_range = self.slider_range(root)
+        if root_range is None:
+            return False
+        node = source
+        while node != root:
+            node_range = self.slider_range(node)
+            if node_range is None or node_range[0] > root_range[0] or node_range[1] < root_range[1]:
+                return False
+            node = self.identity[node]
+        return True
+
+    def chains(self):
+        """恒等ドライバーを経由している変数
+        [(ノード, 変数, 経由しているソース, 大元のソース, つなぎ替えても値が変わらないか)]
+        """
+        chains = []
+        for node, sources in self.sources.items():
+            for var, source in sources:
+                if source is None or source == node or source not in self.identity:
+                    continue
+                root = self.resolve_root(source)
+                if root is not None and root != node:
+                    chains.append((node, var, source, root, self.passes_through(source, root)))
+        return chains
+
+    def max_depth(self):
+        """ドライバーをたどる依存の最大段数（循環に含まれるノードは除く）"""
+        dependencies = {node: {source for var, source in sources
+                               if source in self.drivers and source != node}
+                        for node, sources in self.sources.items()}
+        dependents = {}
+        for node, node_sources in dependencies.items():
+            for source in node_sources:
+                dependents.setdefault(source, []).append(node)
+
+        # 依存先が全て確定したノードから順に段数を決める
+        remaining = {node: len(node_sources) for node, node_sources in dependencies.items()}
+        ready = [node for node, count in remaining.items() if count == 0]
+        depth = {}
+        while ready:
+            node = ready.pop()
+            depth[node] = 1 + max((depth[source] for source in dependencies[node]), default=0)
+            for dependent in dependents.get(node, ()):
+                remaining[dependent] -= 1
+                if remaining[dependent] == 0:
+                    ready.append(dependent)
+        return max(depth.values(), default=0)
+
+    def retarget(self, var, node):
+        """ドライバー変数のターゲットを別のシェイプキーの値に付け替える"""
+        key = self.keys[node[0]]
+        name = escape_name(node[1])
+        target = var.targets[0]
+        if isinstance(key.user, bpy.types.Mesh):
+            # ドライバー追加オペレーターと同じくメッシュ経由で参照する
+            target.id_type = 'MESH'
+            target.id = key.user
+            target.data_path = f'shape_keys.key_blocks["{name}"].value'
+        else:
+            target.id_type = 'KEY'
+            target.id = key
+            target.data_path = f'key_blocks["{name}"].value'
+
+    def remove_driver(self, node):
+        """ノードのドライバーを削除する"""
+        key = self.keys[node[0]]
+        key.animation_data.drivers.remove(self.drivers.pop(node))
+        self.sources.pop(node, None)
+        self.identity.pop(node, None)
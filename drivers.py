@@ -0,0 +1,352 @@
+"""シェイプキーのドライバー設定"""
+import bpy
+from bpy.types import Operator
+from bpy.props import BoolProperty
+
+from .base import ShapeKeyToolsBase
+
+
+class MESH_OT_add_shape_key_drivers(Operator, ShapeKeyToolsBase):
+    bl_idname = "mesh.add_shape_key_drivers"
+    bl_label = "シェイプキードライバー追加"
+    bl_description = "選択シェイプキーと同名のシェイプキーをアクティブオブジェクトに連動させます"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def add_driver(self, source_obj, source_key, target_obj, target_key):
+        """ドライバーを追加する"""
+        # 既存のドライバーを削除
+        if target_key.driver_remove("value"):
+            print(f"Removed existing driver from {target_obj.name}.{target_key.name}")
+        
+        # 新しいドライバーを追加
+        driver = target_key.driver_add("value")
+        if not driver:
+            return False
+            
+        # ドライバーの設定
+        driver = driver.driver
+        driver.type = 'AVERAGE'
+        
+        # 変数を追加
+        var = driver.variables.new()
+        var.name = "var"
+        var.type = 'SINGLE_PROP'
+        
+        # ターゲットの設定
+        target = var.targets[0]
+        target.id_type = 'MESH'
+        target.id = source_obj.data
+        target.data_path = f'shape_keys.key_blocks["{source_key.name}"].value'
+        
+        return True
+
+    def execute(self, context):
+        source_obj = context.active_object
+        
+        # オブジェクトの妥当性チェック
+        valid, message = self.validate_object(source_obj)
+        if not valid:
+            self.report({'ERROR'}, message)
+            return {'CANCELLED'}
+
+        active_key = source_obj.active_shape_key
+        if not active_key:
+            self.report({'ERROR'}, "シェイプキーを選択してください")
+            return {'CANCELLED'}
+
+        if active_key == source_obj.data.shape_keys.reference_key:
+            self.report({'ERROR'}, "Basisシェイプキーには設定できません")
+            return {'CANCELLED'}
+
+        # シーン内の全メッシュオブジェクトを取得（アクティブを除く）
+        target_objects = [obj for obj in bpy.data.objects 
+                         if obj != source_obj and obj.type == 'MESH' and obj.data.shape_keys]
+
+        if not target_objects:
+            self.report({'WARNING'}, "他にシェイプキーを持つオブジェクトが見つかりません")
+            return {'CANCELLED'}
+
+        # プログレスバーを初期化
+        self.setup_progress(context, len(target_objects))
+
+        try:
+            driver_count = 0
+            error_count = 0
+            
+            # 各オブジェクトに対して処理
+            for i, obj in enumerate(target_objects):
+                if obj.data.shape_keys and active_key.name in obj.data.shape_keys.key_blocks:
+                    target_key = obj.data.shape_keys.key_blocks[active_key.name]
+                    if self.add_driver(source_obj, active_key, obj, target_key):
+                        driver_count += 1
+                    else:
+                        error_count += 1
+                
+                # プログレスバーを更新
+                self.update_progress(context, i + 1)
+
+            if driver_count > 0:
+                message = f"{driver_count}個のドライバーを設定しました"
+                if error_count > 0:
+                    message += f" ({error_count}個の設定に失敗)"
+                self.report({'INFO'}, message)
+                return {'FINISHED'}
+            else:
+                self.report({'WARNING'}, "設定可能なドライバーが見つかりませんでした")
+                return {'CANCELLED'}
+
+        except Exception as e:
+            self.report({'ERROR'}, f"エラーが発生しました: {str(e)}")
+            return {'CANCELLED'}
+        finally:
+            # プログレスバーを終了
+            self.end_progress(context)
+
+
+class MESH_OT_add_all_shape_key_drivers(Operator, ShapeKeyToolsBase):
+    bl_idname = "mesh.add_all_shape_key_drivers"
+    bl_label = "全シェイプキーにドライバー追加"
+    bl_description = "全シェイプキーに対してドライバーを設定します"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def execute(self, context):
+        source_obj = context.active_object
+        
+        # オブジェクトの妥当性チェック
+        valid, message = self.validate_object(source_obj)
+        if not valid:
+            self.report({'ERROR'}, message)
+            return {'CANCELLED'}
+
+        # 処理可能なシェイプキーを取得
+        shape_keys = self.get_processable_shape_keys(source_obj)
+        if not shape_keys:
+            self.report({'WARNING'}, "処理可能なシェイプキーが見つかりません")
+            return {'CANCELLED'}
+
+        # シーン内の対象オブジェクトを取得
+        target_objects = [obj for obj in bpy.data.objects 
+                         if obj != source_obj and obj.type == 'MESH' and obj.data.shape_keys]
+
+        if not target_objects:
+            self.report({'WARNING'}, "他にシェイプキーを持つオブジェクトが見つかりません")
+            return {'CANCELLED'}
+
+        # プログレスバーを初期化
+        total_steps = len(shape_keys)
+        self.setup_progress(context, total_steps)
+
+        try:
+            success_count = 0
+            error_count = 0
+            shape_key_count = 0
+            
+            # 各シェイプキーを処理
+            for i, key in enumerate(shape_keys):
+                try:
+                    # 現在のシェイプキーを選択
+                    source_obj.active_shape_key_index = list(source_obj.data.shape_keys.key_blocks).index(key)
+                    
+                    # 各対象オブジェクトに対してドライバーを設定
+                    for target_obj in target_objects:
+                        if key.name in target_obj.data.shape_keys.key_blocks:
+                            target_key = target_obj.data.shape_keys.key_blocks[key.name]
+                            
+                            # 既存のドライバーを削除
+                            if target_key.driver_remove("value"):
+                                print(f"Removed existing driver from {target_obj.name}.{key.name}")
+                            
+                            # 新しいドライバーを追加
+                            driver = target_key.driver_add("value")
+                            if driver:
+                                driver = driver.driver
+                                driver.type = 'AVERAGE'
+                                
+                                # 変数を追加
+                                var = driver.variables.new()
+                                var.name = "var"
+                                var.type = 'SINGLE_PROP'
+                                
+                                # ターゲットの設定
+                                target = var.targets[0]
+                                target.id_type = 'MESH'
+                                target.id = source_obj.data
+                                target.data_path = f'shape_keys.key_blocks["{key.name}"].value'
+                                
+                                shape_key_count += 1
+                                success_count += 1
+                            else:
+                                error_count += 1
+                    
+                except Exception as e:
+                    print(f"Error processing shape key {key.name}: {str(e)}")
+                    error_count += 1
+                
+                # プログレスバーを更新
+                self.update_progress(context, i + 1)
+
+            # 結果を報告
+            if success_count > 0:
+                message = f"{success_count}個のドライバーを設定しました（{shape_key_count}個のシェイプキー）"
+                if error_count > 0:
+                    message += f"\n{error_count}個の設定に失敗しました"
+                self.report({'INFO'}, message)
+                return {'FINISHED'}
+            else:
+                self.report({'WARNING'}, "ドライバーを設定できませんでした")
+                return {'CANCELLED'}
+
+        except Exception as e:
+            self.report({'ERROR'}, f"エラーが発生しました: {str(e)}")
+            return {'CANCELLED'}
+        finally:
+            # プログレスバーを終了
+            self.end_progress(context)
+            
+            
+            
+            
+            
+class MESH_OT_remove_shape_key_drivers(Operator, ShapeKeyToolsBase):
+    bl_idname = "mesh.remove_shape_key_drivers"
+    bl_label = "シェイプキードライバー削除"
+    bl_description = "選択シェイプキーと同名のシェイプキードライバーを削除します"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def execute(self, context):
+        source_obj = context.active_object
+        
+        # オブジェクトの妥当性チェック
+        valid, message = self.validate_object(source_obj)
+        if not valid:
+            self.report({'ERROR'}, message)
+            return {'CANCELLED'}
+
+        active_key = source_obj.active_shape_key
+        if not active_key:
+            self.report({'ERROR'}, "シェイプキーを選択してください")
+            return {'CANCELLED'}
+
+        # 他の全メッシュオブジェクトを処理
+        removed_count = 0
+        affected_objects = []
+        
+        for obj in bpy.data.objects:
+            if obj != source_obj and obj.type == 'MESH' and obj.data.shape_keys:
+                if active_key.name in obj.data.shape_keys.key_blocks:
+                    shape_key = obj.data.shape_keys.key_blocks[active_key.name]
+                    if shape_key.driver_remove("value"):
+                        removed_count += 1
+                        affected_objects.append(obj)
+                        
+                        # シェイプキーの値を0にリセット
+                        shape_key.value = 0.0
+
+        # 更新を強制
+        if affected_objects:
+            # 各オブジェクトの更新を強制
+            for obj in affected_objects:
+                # オブジェクトに変更があったことを通知
+                obj.update_tag()
+                
+                # メッシュデータに変更があったことを通知
+                if obj.data:
+                    obj.data.update()
+            
+            # シーンの更新を強制
+            context.view_layer.update()
+
+        if removed_count > 0:
+            self.report({'INFO'}, f"{removed_count}個のドライバーを削除しました")
+            return {'FINISHED'}
+        else:
+            self.report({'WARNING'}, "削除できるドライバーが見つかりませんでした")
+            return {'CANCELLED'}          
+
+
+class MESH_OT_analyze_shape_key_drivers(Operator, ShapeKeyToolsBase):
+    bl_idname = "mesh.analyze_shape_key_drivers"
+    bl_label = "シェイプキードライバーの解析"
+    bl_description = "ファイル内の全シェイプキーのドライバーを解析し、循環・連鎖・重複を検出します"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    fix: BoolProperty(
+        name="修正する",
+        description="連鎖しているドライバーを大元のソースに直接つなぎ替え、重複した変数と自己参照だけのドライバーを削除します",
+        default=False,
+    )
+
+    def print_findings(self, graph, chains, duplicates, self_links, cycles):
+        """検出結果をコンソールに出力する"""
+        for node, var, source, root, collapsible in chains:
+            note = "" if collapsible else "（途中のスライダーの範囲で値が制限されるため、つなぎ替えません）"
+            print(f"連鎖: {graph.label(node)} → {graph.label(source)} → … → {graph.label(root)}{note}")
+        for node, var in duplicates:
+            print(f"重複: {graph.label(node)} の変数 {var.name}")
+        for node in self_links:
+            print(f"自己参照: {graph.label(node)}")
+        for cycle in cycles:
+            print("循環: " + " → ".join(graph.label(node) for node in cycle + cycle[:1]))
+
+    def fix_graph(self, graph):
+        """連鎖・重複・自己参照を修正し、修正した数を返す"""
+        from .driver_graph import ShapeKeyDriverGraph
+
+        fixed = 0
+        for node, var, source, root, collapsible in graph.chains():
+            if collapsible:
+                graph.retarget(var, root)
+                fixed += 1
+
+        # つなぎ替えで新たに重複が生じることがあるため、解析し直してから削除する
+        graph = ShapeKeyDriverGraph()
+        for node, var in graph.duplicate_variables():
+            graph.drivers[node].driver.variables.remove(var)
+            fixed += 1
+
+        graph = ShapeKeyDriverGraph()
+        for node in graph.self_links():
+            if graph.identity.get(node) == node:
+                graph.remove_driver(node)
+                fixed += 1
+        return fixed
+
+    def execute(self, context):
+        from .driver_graph import ShapeKeyDriverGraph
+
+        try:
+            graph = ShapeKeyDriverGraph()
+            if not graph.driver_count:
+                self.report({'INFO'}, "シェイプキーのドライバーが見つかりません")
+                return {'CANCELLED'}
+
+            before_count = graph.driver_count
+            before_depth = graph.max_depth()
+            chains = graph.chains()
+            duplicates = graph.duplicate_variables()
+            self_links = graph.self_links()
+            cycles = graph.cycles()
+
+            print(f"[ドライバー解析] {before_count}個のドライバー（最大{before_depth}段）")
+            self.print_findings(graph, chains, duplicates, self_links, cycles)
+
+            message = (f"ドライバー {before_count}個（最大{before_depth}段）: 連鎖 {len(chains)}"
+                       f" / 重複 {len(duplicates)} / 自己参照 {len(self_links)} / 循環 {len(cycles)}")
+
+            if self.fix and (chains or duplicates or self_links):
+                fixed = self.fix_graph(graph)
+                after = ShapeKeyDriverGraph()
+                message += (f" → {fixed}箇所を修正し、ドライバー {after.driver_count}個"
+                            f"（最大{after.max_depth()}段）になりました")
+                context.view_layer.update()
+
+            if cycles:
+                message += "。循環は自動で修正できないため、コンソールの一覧を確認してください"
+                self.report({'WARNING'}, message)
+            else:
+                self.report({'INFO'}, message)
+            return {'FINISHED'}
+
+        except Exception as e:
+            self.report({'ERROR'}, f"エラーが発生しました: {str(e)}")
+            return {'CANCELLED'}
@@ -0,0 +1,112 @@
+"""重複したシェイプキーの検出と統合"""
+import bpy
+from bpy.types import Operator
+from bpy.props import BoolProperty, EnumProperty, FloatProperty
+
+from .anim_paths import retarget_driver_variables, retarget_key_animation
+from .base import ShapeKeyToolsBase
+from .naming import MMD_NAME_PAIRS, NAME_MAPPING
+
+
+def is_mmd_name(name):
+    """MMD用の名前（日本語を含む名前など）かどうか"""
+    return name in NAME_MAPPING or name in MMD_NAME_PAIRS or any(ord(c) > 127 for c in name)
+
+
+class MESH_OT_remove_duplicate_shape_keys(Operator, ShapeKeyToolsBase):
+    bl_idname = "mesh.remove_duplicate_shape_keys"
+    bl_label = "重複シェイプキーの統合"
+    bl_description = "変形が同じ（許容誤差内）シェイプキーを1つにまとめ、ドライバーとアニメーションを残すシェイプキーに付け替えます"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    tolerance: FloatProperty(
+        name="許容誤差",
+        description="各頂点の移動量の差がこれ以下なら同じ変形とみなします",
+        default=1e-4,
+        min=1e-7,
+        precision=5,
+    )
+    keep: EnumProperty(
+        name="残すシェイプキー",
+        items=[
+            ('FIRST', "最初", "並び順で最初のシェイプキーを残します"),
+            ('MMD', "MMD用の名前", "MMD用の名前（日本語の名前）のシェイプキーを優先して残します"),
+        ],
+        default='FIRST',
+    )
+    dry_run: BoolProperty(
+        name="ドライラン",
+        description="シェイプキーを変更せず、重複しているグループの一覧だけを表示します",
+        default=False,
+    )
+
+    def choose_canonical(self, group):
+        """グループの中で残すシェイプキー名を選ぶ"""
+        if self.keep == 'MMD':
+            for name in group:
+                if is_mmd_name(name):
+                    return name
+        return group[0]
+
+    def execute(self, context):
+        from .fingerprint import find_duplicate_groups
+
+        obj = context.active_object
+
+        # オブジェクトの妥当性チェック
+        valid, message = self.validate_object(obj)
+        if not valid:
+            self.report({'ERROR'}, message)
+            return {'CANCELLED'}
+
+        # 現在のモードを保存
+        original_mode = obj.mode
+        bpy.ops.object.mode_set(mode='OBJECT')
+
+        try:
+            groups = find_duplicate_groups(obj, self.tolerance)
+            if not groups:
+                self.report({'INFO'}, "重複しているシェイプキーは見つかりませんでした")
+                return {'CANCELLED'}
+
+            # 削除するシェイプキー名 → 残すシェイプキー名
+            mapping = {}
+            for group in groups:
+                canonical = self.choose_canonical(group)
+                print(f"重複: {canonical} を残す ← {', '.join(name for name in group if name != canonical)}")
+                mapping.update((name, canonical) for name in group if name != canonical)
+
+            if self.dry_run:
+                self.report({'INFO'}, f"ドライラン: {len(groups)}グループ、{len(mapping)}個のシェイプキーが重複しています"
+                                      f"。詳細はコンソールを参照")
+                return {'FINISHED'}
+
+            shape_keys = obj.data.shape_keys
+            key_blocks = shape_keys.key_blocks
+
+            # 削除するシェイプキーを相対キーにしているシェイプキーは、残すシェイプキーを相対キーにする
+            for key in key_blocks:
+                if key.relative_key.name in mapping and key.name not in mapping:
+                    key.relative_key = key_blocks[mapping[key.relative_key.name]]
+
+            # 削除すると一緒に消えるため、先にアニメーションとドライバーを付け替える
+            moved, skipped = retarget_key_animation(shape_keys, mapping)
+            variable_count = retarget_driver_variables(shape_keys, mapping)
+
+            for name in mapping:
+                obj.shape_key_remove(key_blocks[name])
+            obj.active_shape_key_index = min(obj.active_shape_key_index, len(key_blocks) - 1)
+
+            message = (f"{len(mapping)}個の重複シェイプキーを削除しました（{len(groups)}グループ）"
+                       f"。F-Curve {moved}個・ドライバー変数 {variable_count}個を付け替え")
+            if skipped:
+                message += f"、残すシェイプキーに既にある{skipped}個のF-Curveは削除"
+            self.report({'INFO'}, message)
+            return {'FINISHED'}
+
+        except Exception as e:
+            self.report({'ERROR'}, f"エラーが発生しました: {str(e)}")
+            return {'CANCELLED'}
+        finally:
+            # 元のモードに戻す
+            bpy.ops.object.mode_set(mode=original_mode)
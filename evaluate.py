@@ -0,0 +1,148 @@
+"""修飾子を適用した評価済みメッシュからの座標の取得"""
+import contextlib
+
+import numpy as np
+
+from .snapshot import ShapeKeySnapshot
+
+
+def mesh_topology(mesh):
+    """トポロジーの比較に使う (頂点数, 辺数, 面数, 辺の頂点のハッシュ)"""
+    edges = np.empty(len(mesh.edges) * 2, dtype=np.int32)
+    mesh.edges.foreach_get("vertices", edges)
+    return len(mesh.vertices), len(mesh.edges), len(mesh.polygons), hash(edges.tobytes())
+
+
+def evaluate_coords(context, obj, out=None):
+    """修飾子を適用した状態の頂点座標とトポロジーを取得する
+
+    ``to_mesh()`` は評価済みオブジェクトが所有する一時メッシュを返すため、
+    呼び出すたびにメッシュのデータブロックが増えることはない。``out`` の頂点数が
+    一致する場合はその配列に読み込む。
+
+    Returns:
+        ((頂点数, 3) の座標, mesh_topology() の結果)
+    """
+    depsgraph = context.evaluated_depsgraph_get()
+    eval_obj = obj.evaluated_get(depsgraph)
+    mesh = eval_obj.to_mesh()
+    try:
+        count = len(mesh.vertices)
+        if out is None or len(out) != count:
+            out = np.empty((count, 3), dtype=np.float32)
+        mesh.vertices.foreach_get("co", out.reshape(-1))
+        return out, mesh_topology(mesh)
+    finally:
+        eval_obj.to_mesh_clear()
+
+
+@contextlib.contextmanager
+def disabled_modifiers(modifiers):
+    """評価中だけ修飾子をビューポートで無効にする"""
+    states = [(mod, mod.show_viewport) for mod in modifiers]
+    for mod, state in states:
+        mod.show_viewport = False
+    try:
+        yield
+    finally:
+        for mod, state in states:
+            mod.show_viewport = state
+
+
+@contextlib.contextmanager
+def pinned_shape_key(obj):
+    """評価中だけシェイプキーを固定表示にし、終了時にアクティブなキーと表示を戻す"""
+    show_only = obj.show_only_shape_key
+    active_index = obj.active_shape_key_index
+    obj.show_only_shape_key = True
+    try:
+        yield
+    finally:
+        obj.show_only_shape_key = show_only
+        obj.active_shape_key_index = active_index
+
+
+def capture_poses(context, obj, poses, hidden_modifiers=(), include_shape_keys=False):
+    """フレームごとにシーンを評価し、修飾子を適用した座標を順に返す
+
+    フレームごとに評価は1回だけ行い、座標は使い回す1つの配列に読み込む
+    （次の座標を取得する前に書き込みを済ませること）。終了時には現在のフレームに戻す。
+
+    Args:
+        poses: [(名前, フレーム)]
+        include_shape_keys: Falseの場合は評価中だけBasisを固定表示にし、
+            既存のシェイプキーの変形を含めない
+
+    Yields:
+        (名前, (頂点数, 3) の座標)
+    """
+    scene = context.scene
+    frame, subframe = scene.frame_current, scene.frame_subframe
+    vertex_count = len(obj.data.vertices)
+    buffer = np.empty((vertex_count, 3), dtype=np.float32)
+    pinned = contextlib.nullcontext() if include_shape_keys else pinned_shape_key(obj)
+    try:
+        with disabled_modifiers(hidden_modifiers), pinned:
+            if not include_shape_keys:
+                obj.active_shape_key_index = 0
+            for name, pose_frame in poses:
+                scene.frame_set(int(pose_frame), subframe=pose_frame - int(pose_frame))
+                coords, topology = evaluate_coords(context, obj, buffer)
+                if topology[0] != vertex_count:
+                    raise RuntimeError(f"'{name}' の評価後の頂点数が変わるため中断しました"
+                                       f"（頂点数 {vertex_count} → {topology[0]}）")
+                yield name, coords
+    finally:
+        scene.frame_set(frame, subframe=subframe)
+
+
+class EvaluatedShapeKeySnapshot(ShapeKeySnapshot):
+    """全シェイプキーについて、修飾子を適用した状態の座標を保存する
+
+    シェイプキーを1つずつ固定表示にして評価する。評価ごとにトポロジーを比較し、
+    溶接（Weld）などでシェイプキーによって頂点の構成が変わる場合は、
+    何も変更しないうちに RuntimeError で中断する。
+    """
+
+    def __init__(self, context, obj, hidden_modifiers=(), memory_budget=None, progress=None):
+        key_blocks = obj.data.shape_keys.key_blocks
+        self.store_properties(key_blocks, memory_budget)
+        self.coords = None
+
+        try:
+            with disabled_modifiers(hidden_modifiers), pinned_shape_key(obj):
+                buffer = None
+                for i, key in enumerate(key_blocks):
+                    buffer, topology = self.evaluate_key(context, obj, i, key, buffer)
+                    if i == 0:
+                        self.topology = topology
+                        self.allocate((len(key_blocks), len(buffer), 3))
+                    elif topology != self.topology:
+                        raise RuntimeError(
+                            f"シェイプキー '{key.name}' で修飾子適用後のトポロジーが変わるため中断しました"
+                            f"（頂点数 {self.topology[0]} → {topology[0]}）")
+                    self.coords[i] = buffer
+                    if progress:
+                        progress(i + 1)
+        except Exception:
+            self.close()
+            raise
+
+    @property
+    def vertex_count(self):
+        return self.topology[0]
+
+    @staticmethod
+    def evaluate_key(context, obj, index, key, buffer):
+        """1つのシェイプキーを固定表示にして評価する
+
+        固定表示でもシェイプキーの頂点グループは反映されるため、評価中だけ外す
+        （頂点グループの設定は作り直したシェイプキーに復元される）。
+        """
+        vertex_group = key.vertex_group
+        key.vertex_group = ""
+        obj.active_shape_key_index = index
+        try:
+            return evaluate_coords(context, obj, buffer)
+        finally:
+            key.vertex_group = vertex_group
@@ -0,0 +1,126 @@
+"""頂点モーフ・コストレポートの書き出し"""
+import os
+
+import bpy
+from bpy.types import Operator
+from bpy.props import BoolProperty, EnumProperty, FloatProperty, StringProperty
+from bpy_extras.io_utils import ExportHelper
+
+from .base import ShapeKeyToolsBase
+from .naming import get_mmd_name
+
+# 書き出し形式ごとの拡張子
+FORMAT_EXTENSIONS = {
+    'CSV': ".csv",
+    'BINARY': ".pmorph",
+}
+
+
+class MESH_OT_export_shape_key_morphs(Operator, ExportHelper, ShapeKeyToolsBase):
+    bl_idname = "mesh.export_shape_key_morphs"
+    bl_label = "頂点モーフを書き出し"
+    bl_description = "全シェイプキーを、変形した頂点だけの頂点モーフ（モーフ名・頂点番号・オフセット）として書き出します"
+    bl_options = {'REGISTER'}
+
+    filename_ext = ".csv"
+    filter_glob: StringProperty(default="*.csv;*.pmorph", options={'HIDDEN'})
+
+    file_format: EnumProperty(
+        name="形式",
+        items=[
+            ('CSV', "CSV", "morph,vertex,x,y,z の形式のテキスト"),
+            ('BINARY', "バイナリ", "変換ツール向けのコンパクトなバイナリ（.pmorph）"),
+        ],
+        default='CSV',
+    )
+    mmd_names: BoolProperty(
+        name="MMD用の名前",
+        description="「笑い左」→「ウィンク」のように、MMD用の名前に変換して書き出します（シェイプキー名は変更しません）",
+        default=False,
+    )
+    include_empty: BoolProperty(
+        name="変形の無いモーフも含める",
+        description="どの頂点も動かないシェイプキーも、空のモーフとして書き出します",
+        default=False,
+    )
+    epsilon: FloatProperty(
+        name="最小移動量",
+        description="これより小さい移動は変形していないとみなします",
+        default=1e-6,  # kernels.DISPLACEMENT_EPSILON と同じ値
+        min=0.0,
+        precision=6,
+    )
+
+    def check(self, context):
+        """形式に合わせてファイルの拡張子を切り替える"""
+        root, ext = os.path.splitext(self.filepath)
+        extension = FORMAT_EXTENSIONS[self.file_format]
+        if ext.lower() != extension:
+            self.filepath = root + extension
+            return True
+        return False
+
+    def execute(self, context):
+        from .morphs import export_morphs
+
+        obj = context.active_object
+
+        # オブジェクトの妥当性チェック
+        valid, message = self.validate_object(obj)
+        if not valid:
+            self.report({'ERROR'}, message)
+            return {'CANCELLED'}
+
+        filepath = bpy.path.ensure_ext(self.filepath, FORMAT_EXTENSIONS[self.file_format])
+        try:
+            count, offset_count = export_morphs(
+                obj, filepath, self.file_format,
+                rename=get_mmd_name if self.mmd_names else None,
+                include_empty=self.include_empty,
+                epsilon=self.epsilon,
+            )
+        except Exception as e:
+            self.report({'ERROR'}, f"エラーが発生しました: {str(e)}")
+            return {'CANCELLED'}
+
+        self.report({'INFO'}, f"{count}個のモーフ（{offset_count}頂点分のオフセット）を"
+                              f"{os.path.basename(filepath)} に書き出しました")
+        return {'FINISHED'}
+
+
+class MESH_OT_export_shape_key_cost_report(Operator, ExportHelper):
+    bl_idname = "mesh.export_shape_key_cost_report"
+    bl_label = "シェイプキーのコストレポートを書き出し"
+    bl_description = ("シーン内の全メッシュのシェイプキーとドライバーを調べ、キャラクターごとの"
+                      "再生時のコストの見積もりをJSONで書き出します")
+    bl_options = {'REGISTER'}
+
+    filename_ext = ".json"
+    filter_glob: StringProperty(default="*.json", options={'HIDDEN'})
+
+    def execute(self, context):
+        from .costs import build_cost_report, print_summary, write_cost_report
+
+        # 編集モードの変更を反映する
+        obj = context.active_object
+        if obj and obj.mode == 'EDIT':
+            obj.update_from_editmode()
+
+        try:
+            report = build_cost_report(context.scene)
+            write_cost_report(report, self.filepath)
+        except Exception as e:
+            self.report({'ERROR'}, f"エラーが発生しました: {str(e)}")
+            return {'CANCELLED'}
+
+        print_summary(report)
+        totals = report["totals"]
+        self.report({'INFO'}, f"{len(report['characters'])}体のキャラクター（シェイプキー {totals['shape_keys']}個）"
+                              f"のレポートを {os.path.basename(self.filepath)} に書き出しました"
+                              f"（推定 {totals['estimated_ms_per_frame']:.3f} ms/フレーム）")
+        return {'FINISHED'}
+
+
+def export_menu(self, context):
+    self.layout.operator(MESH_OT_export_shape_key_morphs.bl_idname, text="頂点モーフ (.csv / .pmorph)")
+    self.layout.operator(MESH_OT_export_shape_key_cost_report.bl_idname, text="シェイプキーのコストレポート (.json)")
@@ -0,0 +1,259 @@
+"""シェイプキーのアニメーション（F-Curve）の複製と合成
+
+左右分割・統合でシェイプキーを作り直す際に、Keyデータブロックのアクションにある
+F-Curveを新しいシェイプキーへ引き継ぐ。キーフレームは keyframe_points の
+foreach_get / foreach_set で一括して読み書きし、左右のF-Curveを合成する際の評価も
+配列でまとめて行うため、毎フレームにキーがあるモーションキャプチャのアクションでも
+キーフレーム単位のループは発生しない（一括評価できない補間・修飾子がある場合を除く）。
+"""
+import bpy
+import numpy as np
+
+from .anim_paths import KEY_BLOCK_PATH, key_block_path, unescape_name
+
+# 一括で読み書きするキーフレームの属性 {属性名: (キーフレームあたりの要素数, 型)}
+# 列挙型の属性は整数の値として読み書きする
+KEYFRAME_ATTRIBUTES = {
+    "co": (2, np.float32),
+    "handle_left": (2, np.float32),
+    "handle_right": (2, np.float32),
+    "interpolation": (1, np.int32),
+    "handle_left_type": (1, np.int32),
+    "handle_right_type": (1, np.int32),
+    "easing": (1, np.int32),
+    "type": (1, np.int32),
+}
+
+
+def enum_value(attr, identifier):
+    """キーフレームの列挙型の属性の識別子を整数の値に変換する"""
+    return bpy.types.Keyframe.bl_rna.properties[attr].enum_items[identifier].value
+
+
+def read_keyframes(fcurve):
+    """F-Curveの全キーフレームを {属性名: 配列} として一括で読み込む"""
+    points = fcurve.keyframe_points
+    data = {}
+    for attr, (size, dtype) in KEYFRAME_ATTRIBUTES.items():
+        values = np.empty(len(points) * size, dtype=dtype)
+        points.foreach_get(attr, values)
+        data[attr] = values
+    return data
+
+
+def write_keyframes(fcurve, data):
+    """キーフレームの無いF-Curveに read_keyframes() の形式のキーフレームを一括で書き込む"""
+    points = fcurve.keyframe_points
+    points.add(len(data["co"]) // 2)
+    for attr, values in data.items():
+        points.foreach_set(attr, values)
+    fcurve.update()
+
+
+def copy_modifiers(fcurve, new_fcurve):
+    """F-Curve修飾子（周期・ノイズなど）を設定ごと複製する"""
+    for mod in fcurve.modifiers:
+        new_mod = new_fcurve.modifiers.new(mod.type)
+        for prop in mod.bl_rna.properties:
+            if prop.is_readonly or prop.type in {'POINTER', 'COLLECTION'}:
+                continue
+            setattr(new_mod, prop.identifier, getattr(mod, prop.identifier))
+        if mod.type == 'ENVELOPE':
+            for point in mod.control_points:
+                new_point = new_mod.control_points.add(point.frame)
+                new_point.min = point.min
+                new_point.max = point.max
+
+
+def copy_fcurve(fcurve, fcurves, data_path, data=None):
+    """F-Curveの設定・キーフレーム・修飾子を別のデータパスのF-Curveとして複製する
+
+    同じデータパスのF-Curveが既にある場合は置き換える。
+    """
+    existing = fcurves.find(data_path, index=fcurve.array_index)
+    if existing is not None:
+        fcurves.remove(existing)
+    group_name = fcurve.group.name if fcurve.group else ""
+    new_fcurve = fcurves.new(data_path, index=fcurve.array_index, action_group=group_name)
+    new_fcurve.extrapolation = fcurve.extrapolation
+    new_fcurve.mute = fcurve.mute
+    write_keyframes(new_fcurve, read_keyframes(fcurve) if data is None else data)
+    copy_modifiers(fcurve, new_fcurve)
+    return new_fcurve
+
+
+def key_fcurves(action):
+    """アクションのF-Curveをシェイプキー名ごとにまとめる
+
+    Returns:
+        {シェイプキー名: {(シェイプキー以降のデータパス, 配列のインデックス): F-Curve}}
+    """
+    curves = {}
+    for fcurve in action.fcurves:
+        match = KEY_BLOCK_PATH.match(fcurve.data_path)
+        if not match or match.group('head'):
+            continue
+        name = unescape_name(match.group('name'))
+        curves.setdefault(name, {})[(fcurve.data_path[match.end():], fcurve.array_index)] = fcurve
+    return curves
+
+
+# 一括で評価できるキーフレームの補間
+BULK_INTERPOLATIONS = ('CONSTANT', 'LINEAR', 'BEZIER')
+
+
+def evaluate_keyframes(fcurve, data, frames):
+    """read_keyframes() で読み込んだキーフレームから、F-Curveの値を frames で一括評価する
+
+    補間が一定・リニア・ベジェで外挿が一定のF-Curveだけに対応し、それ以外の補間・外挿や
+    有効なF-Curve修飾子がある場合は None を返す。ベジェの区間はBlenderと同じく
+    ハンドルのフレーム方向の長さを区間内に収めてから、フレームに対応する
+    パラメーターを二分法で求める。
+    """
+    co = data["co"].reshape(-1, 2).astype(np.float64)
+    interpolation = data["interpolation"]
+    constant, linear, bezier = (enum_value("interpolation", name) for name in BULK_INTERPOLATIONS)
+    if (fcurve.extrapolation != 'CONSTANT' or any(not mod.mute for mod in fcurve.modifiers)
+            or not np.isin(interpolation[:-1], (constant, linear, bezier)).all()):
+        return None
+
+    # 各フレームの直前のキーフレーム（範囲外は端のキーフレームの値）
+    segment = np.searchsorted(co[:, 0], frames, side='right') - 1
+    values = np.where(segment < 0, co[0, 1], co[-1, 1])
+    inside = np.flatnonzero((segment >= 0) & (segment < len(co) - 1))
+    i = segment[inside]
+    x0, y0 = co[i, 0], co[i, 1]
+    x1, y1 = co[i + 1, 0], co[i + 1, 1]
+    f = frames[inside]
+    result = np.where(interpolation[i] == constant, y0, y0 + (y1 - y0) * (f - x0) / (x1 - x0))
+
+    curved = np.flatnonzero((interpolation[i] == bezier) & (f > x0))
+    if len(curved):
+        j = i[curved]
+        p0, p3 = co[j], co[j + 1]
+        h1 = p0 - data["handle_right"].reshape(-1, 2)[j]
+        h2 = p3 - data["handle_left"].reshape(-1, 2)[j + 1]
+        # ハンドルが区間からはみ出す場合は縮める（Blenderの BKE_fcurve_correct_bezpart と同じ）
+        extent = np.abs(h1[:, 0]) + np.abs(h2[:, 0])
+        scale = np.where(extent > p3[:, 0] - p0[:, 0], (p3[:, 0] - p0[:, 0]) / np.maximum(extent, 1e-12), 1.0)
+        p1 = p0 - h1 * scale[:, None]
+        p2 = p3 - h2 * scale[:, None]
+
+        def bezier_point(t, axis):
+            u = 1.0 - t
+            return (u * u * u * p0[:, axis] + 3.0 * u * u * t * p1[:, axis]
+                    + 3.0 * u * t * t * p2[:, axis] + t * t * t * p3[:, axis])
+
+        target = f[curved]
+        low, high = np.zeros(len(curved)), np.ones(len(curved))
+        for _ in range(40):
+            middle = 0.5 * (low + high)
+            below = bezier_point(middle, 0) < target
+            low = np.where(below, middle, low)
+            high = np.where(below, high, middle)
+        result[curved] = bezier_point(0.5 * (low + high), 1)
+
+    values[inside] = result
+    return values
+
+
+def combine_keyframes(left, right):
+    """左右のF-Curveを、各フレームで大きい方の値をとるキーフレームにまとめる
+
+    キーフレームのフレームが一致する場合は、フレームごとに値の大きい方の
+    キーフレーム（ハンドル・補間を含む）を一括で選ぶ。一致しない場合は両方の
+    フレームで両側の値を evaluate_keyframes() で一括評価し、大きい方がキーフレームを
+    持つフレームはそのキーフレームを、持たないフレームはキーフレームのある側の
+    補間・ハンドルの種類を残して値だけを置き換える。一括評価できない補間・外挿・
+    修飾子がある場合だけ、フレームごとに fcurve.evaluate() で評価する。
+    """
+    left_data, right_data = read_keyframes(left), read_keyframes(right)
+    left_co = left_data["co"].reshape(-1, 2)
+    right_co = right_data["co"].reshape(-1, 2)
+
+    if np.array_equal(left_co[:, 0], right_co[:, 0]):
+        use_right = right_co[:, 1] > left_co[:, 1]
+        return {attr: np.where(np.repeat(use_right, KEYFRAME_ATTRIBUTES[attr][0]), right_data[attr], values)
+                for attr, values in left_data.items()}
+    # キーフレームの無いF-Curveは値を持たないため、もう片方をそのまま使う
+    if not len(left_co) or not len(right_co):
+        return right_data if len(right_co) else left_data
+
+    frames = np.union1d(left_co[:, 0], right_co[:, 0]).astype(np.float64)
+    left_values = evaluate_keyframes(left, left_data, frames)
+    right_values = evaluate_keyframes(right, right_data, frames)
+    if left_values is None:
+        left_values = np.array([left.evaluate(frame) for frame in frames.tolist()])
+    if right_values is None:
+        right_values = np.array([right.evaluate(frame) for frame in frames.tolist()])
+
+    # 各フレームのキーフレームの位置（無い場合は has_* が False）
+    left_index = np.minimum(np.searchsorted(left_co[:, 0], frames), len(left_co) - 1)
+    right_index = np.minimum(np.searchsorted(right_co[:, 0], frames), len(right_co) - 1)
+    has_left = left_co[left_index, 0] == frames
+    has_right = right_co[right_index, 0] == frames
+    from_right = has_right & ((right_values > left_values) | ~has_left)
+
+    combined = {}
+    for attr, (size, dtype) in KEYFRAME_ATTRIBUTES.items():
+        left_rows = left_data[attr].reshape(-1, size)[left_index]
+        right_rows = right_data[attr].reshape(-1, size)[right_index]
+        combined[attr] = np.where(from_right[:, None], right_rows, left_rows)
+
+    # 値を大きい方に置き換え、ハンドルも同じだけ移動する
+    values = np.maximum(left_values, right_values)
+    shift = values - combined["co"][:, 1]
+    combined["co"][:, 1] = values
+    for attr in ("handle_left", "handle_right"):
+        combined[attr][:, 1] += shift
+    return {attr: np.ascontiguousarray(rows.reshape(-1), dtype=KEYFRAME_ATTRIBUTES[attr][1])
+            for attr, rows in combined.items()}
+
+
+def split_key_animation(shape_keys, jobs):
+    """分割元のシェイプキーのF-Curveを、分割して作成したシェイプキーへ複製する
+
+    Args:
+        jobs: [(分割元の名前, [作成したシェイプキー名, ...])]
+
+    Returns:
+        作成したF-Curveの数
+    """
+    action = shape_keys.animation_data.action if shape_keys.animation_data else None
+    if action is None:
+        return 0
+
+    curves = key_fcurves(action)
+    count = 0
+    for source_name, new_names in jobs:
+        for (suffix, index), fcurve in curves.get(source_name, {}).items():
+            data = read_keyframes(fcurve)
+            for new_name in new_names:
+                copy_fcurve(fcurve, action.fcurves, key_block_path(new_name) + suffix, data)
+                count += 1
+    return count
+
+
+def merge_pair_animation(action, curves, left_name, right_name, merged_name):
+    """1組の左右のシェイプキーのF-Curveを、統合後のシェイプキーのF-Curveにまとめる
+
+    片側にだけあるF-Curveはそのまま複製し、両側にある場合は combine_keyframes() で
+    まとめる。左右のシェイプキーのF-Curveは、シェイプキーの削除と一緒に削除される。
+
+    Args:
+        curves: key_fcurves() でまとめたF-Curve
+
+    Returns:
+        作成したF-Curveの数
+    """
+    left_curves = curves.get(left_name, {})
+    right_curves = curves.get(right_name, {})
+    count = 0
+    for suffix, index in list(left_curves) + [item for item in right_curves if item not in left_curves]:
+        left = left_curves.get((suffix, index))
+        right = right_curves.get((suffix, index))
+        data = combine_keyframes(left, right) if left and right else None
+        copy_fcurve(left or right, action.fcurves, key_block_path(merged_name) + suffix, data)
+        count += 1
+    return count
+
@@ -0,0 +1,180 @@
+"""シェイプキーの変形量の指紋による重複検出
+
+各シェイプキーを1つずつ読み込み、次の2つの指紋だけを保持する。
+
+* 許容誤差で量子化した変形量のハッシュ（完全に近い重複を一括で検出）
+* 変形量のランダム射影（量子化の境界をまたぐ近い重複の候補を距離で絞り込む）
+
+射影は頂点範囲ごとに生成した行列で計算するため、頂点数が多くてもメモリ上限内で済む。
+
+ハッシュが一致したペアも含め、候補になったペアだけ変形量を読み直して、
+全頂点の差が許容誤差以内かを確かめてからまとめる。
+"""
+import numpy as np
+
+from .kernels import read_shape_key_coords
+from .preferences import get_memory_budget
+
+# ランダム射影の次元数
+PROJECTION_DIMS = 16
+
+
+def quantized_hash(delta, tolerance):
+    """許容誤差で量子化した変形量のハッシュ（許容誤差が0以下の場合は変形量そのもののハッシュ）"""
+    if tolerance <= 0.0:
+        return hash(np.ascontiguousarray(delta).tobytes())
+    return hash(np.round(delta / tolerance).astype(np.int64).tobytes())
+
+
+class RandomProjection:
+    """(頂点数, 3) の変形量を dims 次元に縮めるランダム射影
+
+    射影行列は頂点範囲ごとに (seed, 範囲の番号) から生成するため、行列全体を
+    確保しなくても、同じ seed・頂点数・メモリ上限なら同じ結果になる。行列全体が
+    メモリ上限の1/4に収まる場合だけ、生成した範囲を保持して使い回す。
+    """
+
+    def __init__(self, vertex_count, seed=0, dims=PROJECTION_DIMS, memory_budget=None):
+        budget = get_memory_budget() if memory_budget is None else memory_budget
+        row_bytes = 3 * dims * 4
+        self.vertex_count = vertex_count
+        self.seed = seed
+        self.dims = dims
+        self.chunk_rows = max(1024, budget // (4 * row_bytes))
+        self.keep = vertex_count * row_bytes <= budget // 4
+        self._chunks = {}
+
+    def chunk(self, index, rows):
+        """index 番目の頂点範囲 (rows * 3, dims) の射影行列"""
+        matrix = self._chunks.get(index)
+        if matrix is None:
+            rng = np.random.default_rng((self.seed, index))
+            matrix = rng.standard_normal((rows * 3, self.dims), dtype=np.float32)
+            matrix /= np.sqrt(self.dims)
+            if self.keep:
+                self._chunks[index] = matrix
+        return matrix
+
+    def project(self, deltas):
+        """(キー数, 頂点数, 3) の変形量を射影した (キー数, dims) の配列を返す"""
+        out = np.zeros((len(deltas), self.dims), dtype=np.float64)
+        for index, start in enumerate(range(0, self.vertex_count, self.chunk_rows)):
+            stop = min(start + self.chunk_rows, self.vertex_count)
+            out += deltas[:, start:stop].reshape(len(deltas), -1) @ self.chunk(index, stop - start)
+        return out
+
+
+def find_duplicate_groups(obj, tolerance, seed=0):
+    """変形量が許容誤差内で一致するシェイプキーのグループを返す
+
+    頂点グループや相対キーが異なるシェイプキーは、変形量が同じでも結果が
+    異なるため同じグループにしない。変形していないシェイプキーは対象外。
+
+    Returns:
+        シェイプキー名のリストのリスト（各リストはシェイプキーの並び順）
+    """
+    shape_keys = obj.data.shape_keys
+    basis = shape_keys.reference_key
+    basis_co = read_shape_key_coords(basis)
+    buffer = np.empty_like(basis_co)
+
+    # 射影は頂点範囲ごとに行列を生成するため、メモリ上限内でまとめた変形量に対して行う
+    projection = RandomProjection(len(basis_co), seed)
+    batch_size = min(len(shape_keys.key_blocks), max(1, get_memory_budget() // max(1, 4 * basis_co.nbytes)))
+    batch = np.empty((batch_size,) + basis_co.shape, dtype=np.float32)
+    pending = 0
+
+    names = []
+    contexts = []
+    hashes = []
+    signatures = []
+    norms = []
+    moved_counts = []
+    for key in shape_keys.key_blocks:
+        if key == basis:
+            continue
+        delta = np.subtract(read_shape_key_coords(key, buffer), basis_co, out=buffer)
+        moved = np.count_nonzero(np.abs(delta).max(axis=1) > tolerance)
+        if not moved:
+            continue
+        names.append(key.name)
+        contexts.append((key.vertex_group, key.relative_key.name))
+        hashes.append(quantized_hash(delta, tolerance))
+        norms.append(float(np.linalg.norm(delta)))
+        moved_counts.append(moved)
+        batch[pending] = delta
+        pending += 1
+        if pending == len(batch):
+            signatures.extend(projection.project(batch))
+            pending = 0
+    if pending:
+        signatures.extend(projection.project(batch[:pending]))
+
+    count = len(names)
+    if count < 2:
+        return []
+
+    parent = list(range(count))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    # グループの代表 → グループのシェイプキー
+    members = {i: [i] for i in range(count)}
+
+    def union(i, j):
+        root_i, root_j = find(i), find(j)
+        parent[root_j] = root_i
+        members[root_i].extend(members.pop(root_j))
+
+    # 量子化したハッシュが一致するものは、最初のシェイプキーとのペアを候補にする
+    buckets = {}
+    hash_pairs = []
+    for i, (context, value) in enumerate(zip(contexts, hashes)):
+        first = buckets.setdefault((context, value), i)
+        if first != i:
+            hash_pairs.append((first, i))
+
+    # 全頂点の差が許容誤差以内なら、差のL2ノルムは tolerance * sqrt(3 * 動いた頂点数) 以下になる。
+    # 射影した距離は元の距離の推定値なので、余裕を持たせた上限で候補を絞り込む。
+    signatures = np.stack(signatures)
+    norms = np.array(norms)
+    moved_counts = np.array(moved_counts)
+    bounds = tolerance * np.sqrt(3.0 * (moved_counts[:, None] + moved_counts[None, :]))
+    squared = np.einsum('ij,ij->i', signatures, signatures)
+    distances = np.sqrt(np.maximum(squared[:, None] + squared[None, :] - 2.0 * (signatures @ signatures.T), 0.0))
+    candidates = (distances <= 2.0 * bounds) & (np.abs(norms[:, None] - norms[None, :]) <= bounds)
+    pairs = hash_pairs + [(i, j) for i, j in zip(*np.nonzero(np.triu(candidates, k=1)))
+                          if contexts[i] == contexts[j]]
+
+    # 候補のペアだけ変形量を読み直して確認する（読み込んだ変形量はメモリ上限まで再利用）。
+    # どのシェイプキーを残しても削除するシェイプキーとの差が許容誤差以内になるよう、
+    # 2つのグループの全てのシェイプキーの組で全頂点の差が許容誤差以内の場合だけまとめる
+    key_blocks = shape_keys.key_blocks
+    cache = {}
+    cache_limit = max(2, get_memory_budget() // max(1, basis_co.nbytes))
+
+    def read_delta(i):
+        if i not in cache:
+            if len(cache) >= cache_limit:
+                cache.clear()
+            cache[i] = read_shape_key_coords(key_blocks[names[i]]) - basis_co
+        return cache[i]
+
+    def matches(i, j):
+        return np.abs(read_delta(i) - read_delta(j)).max() <= tolerance
+
+    for i, j in pairs:
+        root_i, root_j = find(i), find(j)
+        if root_i == root_j:
+            continue
+        if all(matches(a, b) for a in members[root_i] for b in members[root_j]):
+            union(i, j)
+
+    groups = {}
+    for i in range(count):
+        groups.setdefault(find(i), []).append(names[i])
+    return [group for group in groups.values() if len(group) > 1]
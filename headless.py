@@ -0,0 +1,95 @@
+"""ヘッドレス実行（cli.py）用の共通処理"""
+import contextlib
+import time
+
+import bpy
+
+
+@contextlib.contextmanager
+def registered(addon):
+    """アドオンが未登録なら一時的に登録する"""
+    if hasattr(bpy.types, "MESH_OT_split_all_shape_keys"):
+        yield
+        return
+    addon.register()
+    try:
+        yield
+    finally:
+        addon.unregister()
+
+
+# center_line=True で追加する中心線付近の頂点のX座標（左右判定のしきい値 0.001 の前後を含む）
+CENTER_LINE_X = (0.0, 0.0005, -0.0005, 0.001, -0.001, -0.0009999, -0.0010001, 0.002, -0.002)
+# ミラー修飾子を使う場合は右半分だけなので、結合されるもの・されないものを含む X ≥ 0 の値だけを使う
+MIRROR_CENTER_LINE_X = (0.0, 0.0005, 0.001, 0.0015, 0.002)
+
+
+def create_test_object(name, vertex_count, key_count, seed=0, mirror=False, center_line=False):
+    """X軸対称な頂点とランダムな変形のシェイプキーを持つテスト用オブジェクトを作成する
+
+    mirror=True の場合は右半分（X > 0）の頂点だけを作成し、ミラー修飾子を追加する。
+    center_line=True の場合は、左右判定の境界を確かめるため中心線上・付近の頂点も追加する。
+    """
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    half = rng.uniform(-1.0, 1.0, size=(vertex_count // 2, 3))
+    half[:, 0] = np.abs(half[:, 0]) + 0.01
+    co = half if mirror else np.vstack([half, half * [-1.0, 1.0, 1.0]])
+    if center_line:
+        center_x = MIRROR_CENTER_LINE_X if mirror else CENTER_LINE_X
+        center = rng.uniform(-1.0, 1.0, size=(len(center_x), 3))
+        center[:, 0] = center_x
+        co = np.vstack([co, center])
+    co = co.astype(np.float32)
+
+    mesh = bpy.data.meshes.new(name)
+    mesh.vertices.add(len(co))
+    mesh.vertices.foreach_set("co", co.reshape(-1))
+    mesh.update()
+
+    obj = bpy.data.objects.new(name, mesh)
+    bpy.context.scene.collection.objects.link(obj)
+    activate(obj)
+
+    obj.shape_key_add(name="Basis", from_mix=False)
+    for i in range(key_count):
+        key = obj.shape_key_add(name=f"Key{i:03d}", from_mix=False)
+        delta = rng.normal(scale=0.01, size=co.shape).astype(np.float32)
+        key.data.foreach_set("co", (co + delta).reshape(-1))
+
+    if mirror:
+        obj.modifiers.new("Mirror", 'MIRROR')
+    return obj
+
+
+def duplicate_object(obj, name):
+    """メッシュ（シェイプキーを含む）ごとオブジェクトを複製してシーンに追加する"""
+    copy = obj.copy()
+    copy.name = name
+    copy.data = obj.data.copy()
+    bpy.context.scene.collection.objects.link(copy)
+    return copy
+
+
+def activate(obj):
+    """オブジェクトを選択してアクティブにする"""
+    view_layer = bpy.context.view_layer
+    for other in view_layer.objects:
+        other.select_set(False)
+    obj.select_set(True)
+    view_layer.objects.active = obj
+
+
+def remove_object(obj):
+    """テスト用オブジェクトとメッシュを削除する"""
+    mesh = obj.data
+    bpy.data.objects.remove(obj)
+    bpy.data.meshes.remove(mesh)
+
+
+def timed(func, *args, **kwargs):
+    """関数を実行し、(戻り値, 経過秒数) を返す"""
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
@@ -0,0 +1,223 @@
+"""シェイプキーのインスペクター"""
+import bpy
+from bpy.types import Operator, Panel, PropertyGroup, UIList
+from bpy.props import (StringProperty, EnumProperty, IntProperty, FloatProperty,
+                       FloatVectorProperty, CollectionProperty)
+
+from .base import ShapeKeyToolsBase
+from .naming import get_opposite_side_name
+
+
+class MESH_OT_scan_shape_key_stats(Operator, ShapeKeyToolsBase):
+    bl_idname = "mesh.scan_shape_key_stats"
+    bl_label = "シェイプキー統計を更新"
+    bl_description = "全シェイプキーの変形量を調べ、インスペクターの統計を更新します"
+    bl_options = {'REGISTER'}
+
+    def execute(self, context):
+        from .stats import scan_shape_key_stats
+
+        obj = context.active_object
+
+        # オブジェクトの妥当性チェック
+        valid, message = self.validate_object(obj)
+        if not valid:
+            self.report({'ERROR'}, message)
+            return {'CANCELLED'}
+
+        # 編集モードの変更を反映するためオブジェクトモードで読み込む
+        original_mode = obj.mode
+        bpy.ops.object.mode_set(mode='OBJECT')
+
+        try:
+            updated = scan_shape_key_stats(obj)
+            total = len(obj.data.payu_shape_key_stats)
+            self.report({'INFO'}, f"{total}個のシェイプキーを調べました（{updated}個を再計算）")
+            return {'FINISHED'}
+
+        except Exception as e:
+            self.report({'ERROR'}, f"エラーが発生しました: {str(e)}")
+            return {'CANCELLED'}
+        finally:
+            # 元のモードに戻す
+            bpy.ops.object.mode_set(mode=original_mode)
+
+
+def select_stats_shape_key(self, context):
+    """統計の行を選択したら、対応するシェイプキーをアクティブにする"""
+    obj = context.object
+    if not obj or obj.data != self or not self.shape_keys:
+        return
+    if 0 <= self.payu_shape_key_stats_index < len(self.payu_shape_key_stats):
+        name = self.payu_shape_key_stats[self.payu_shape_key_stats_index].name
+        index = self.shape_keys.key_blocks.find(name)
+        if index >= 0:
+            obj.active_shape_key_index = index
+
+
+class ShapeKeyStatsItem(PropertyGroup):
+    """シェイプキー1つ分の統計（内容のハッシュで有効性を判定）"""
+    content_hash: StringProperty()
+    affected: IntProperty(name="頂点数", description="変形している頂点の数")
+    max_displacement: FloatProperty(name="最大", description="最大移動量", unit='LENGTH')
+    mean_displacement: FloatProperty(name="平均", description="変形している頂点の平均移動量", unit='LENGTH')
+    balance: FloatProperty(name="左右", description="左右の偏り（-1: 右のみ（X < 0）、0: 均等、1: 左のみ（X ≥ 0、分割した「〜左」と同じ側））")
+    bounds_min: FloatVectorProperty(name="範囲（最小）", size=3, unit='LENGTH')
+    bounds_max: FloatVectorProperty(name="範囲（最大）", size=3, unit='LENGTH')
+
+
+class MESH_UL_shape_key_stats(UIList):
+    """シェイプキー統計の一覧（列ごとの並べ替えと絞り込みに対応）"""
+
+    sort_column: EnumProperty(
+        name="並べ替え",
+        items=[
+            ('ORDER', "元の順番", ""),
+            ('NAME', "名前", ""),
+            ('AFFECTED', "頂点数", ""),
+            ('MAX', "最大移動量", ""),
+            ('MEAN', "平均移動量", ""),
+            ('BALANCE', "左右の偏り", ""),
+            ('SIZE', "範囲の大きさ", ""),
+        ],
+        default='ORDER',
+    )
+    filter_state: EnumProperty(
+        name="絞り込み",
+        items=[
+            ('ALL', "全て", ""),
+            ('EMPTY', "空", "変形していないシェイプキー"),
+            ('NONEMPTY', "空以外", "変形しているシェイプキー"),
+            ('ASYMMETRIC', "非対称", "左右に偏った未分割のシェイプキー"),
+            ('SPLIT', "分割済み", "片側だけのシェイプキー"),
+        ],
+        default='ALL',
+    )
+    filter_min: FloatProperty(
+        name="最小値",
+        description="並べ替えの列がこの値以上の行だけを表示（0で無効）",
+        default=0.0,
+        min=0.0,
+    )
+
+    ASYMMETRY_THRESHOLD = 0.2
+
+    @staticmethod
+    def column_value(item, column):
+        if column == 'AFFECTED':
+            return item.affected
+        if column == 'MAX':
+            return item.max_displacement
+        if column == 'MEAN':
+            return item.mean_displacement
+        if column == 'BALANCE':
+            return abs(item.balance)
+        if column == 'SIZE':
+            return sum((b - a) ** 2 for a, b in zip(item.bounds_min, item.bounds_max)) ** 0.5
+        return 0.0
+
+    def is_split(self, item):
+        return get_opposite_side_name(item.name)[0] is not None or abs(item.balance) > 0.99
+
+    def matches_state(self, item):
+        if self.filter_state == 'EMPTY':
+            return item.affected == 0
+        if self.filter_state == 'NONEMPTY':
+            return item.affected > 0
+        if self.filter_state == 'ASYMMETRIC':
+            return abs(item.balance) > self.ASYMMETRY_THRESHOLD and not self.is_split(item)
+        if self.filter_state == 'SPLIT':
+            return self.is_split(item)
+        return True
+
+    def draw_item(self, context, layout, data, item, icon, active_data, active_propname, index):
+        row = layout.row(align=True)
+        row.label(text=item.name, icon='SHAPEKEY_DATA' if item.affected else 'BLANK1')
+        row.label(text=str(item.affected))
+        row.label(text=f"{item.max_displacement:.4f}")
+        row.label(text=f"{item.mean_displacement:.4f}")
+        row.label(text=f"{item.balance:+.2f}")
+
+    def draw_filter(self, context, layout):
+        row = layout.row(align=True)
+        row.prop(self, "filter_name", text="")
+        row.prop(self, "use_filter_invert", text="", icon='ARROW_LEFTRIGHT')
+        row = layout.row(align=True)
+        row.prop(self, "filter_state", text="")
+        row.prop(self, "sort_column", text="")
+        row.prop(self, "use_filter_sort_reverse", text="", icon='SORT_DESC')
+        layout.prop(self, "filter_min")
+
+    def filter_items(self, context, data, propname):
+        items = getattr(data, propname)
+        helper = bpy.types.UI_UL_list
+
+        if self.filter_name:
+            flags = helper.filter_items_by_name(self.filter_name, self.bitflag_filter_item, items, "name")
+        else:
+            flags = [self.bitflag_filter_item] * len(items)
+
+        column = self.sort_column
+        for i, item in enumerate(items):
+            if not self.matches_state(item):
+                flags[i] = 0
+            elif self.filter_min > 0.0 and self.column_value(item, column) < self.filter_min:
+                flags[i] = 0
+
+        if column == 'ORDER':
+            order = []
+        elif column == 'NAME':
+            order = helper.sort_items_by_name(items, "name")
+        else:
+            order = helper.sort_items_helper(
+                [(i, self.column_value(item, column)) for i, item in enumerate(items)],
+                key=lambda x: x[1], reverse=True)
+        return flags, order
+
+
+class MESH_PT_shape_key_inspector(Panel):
+    bl_label = "インスペクター"
+    bl_space_type = 'PROPERTIES'
+    bl_region_type = 'WINDOW'
+    bl_context = "data"
+    bl_parent_id = "MESH_PT_shape_key_tools_main"
+    bl_options = {'DEFAULT_CLOSED'}
+
+    @classmethod
+    def poll(cls, context):
+        obj = context.object
+        return obj and obj.type == 'MESH' and obj.data.shape_keys
+
+    def draw(self, context):
+        layout = self.layout
+        mesh = context.object.data
+
+        # 統計はキャッシュのみを表示し、頂点データには触れない
+        row = layout.row()
+        row.operator("mesh.scan_shape_key_stats", text="統計を更新", icon='FILE_REFRESH')
+
+        stats = mesh.payu_shape_key_stats
+        if len(stats) != len(mesh.shape_keys.key_blocks) - 1:
+            layout.label(text="シェイプキーが変更されています。統計を更新してください", icon='INFO')
+
+        row = layout.row(align=True)
+        for text in ("名前", "頂点数", "最大", "平均", "左右"):
+            row.label(text=text)
+        layout.template_list("MESH_UL_shape_key_stats", "", mesh, "payu_shape_key_stats",
+                             mesh, "payu_shape_key_stats_index", rows=8)
+
+        if 0 <= mesh.payu_shape_key_stats_index < len(stats):
+            item = stats[mesh.payu_shape_key_stats_index]
+            col = layout.column(align=True)
+            col.label(text="範囲: " + ", ".join(
+                f"{axis} {a:.3f}〜{b:.3f}" for axis, a, b in zip("XYZ", item.bounds_min, item.bounds_max)))
+
+
+def register_properties():
+    bpy.types.Mesh.payu_shape_key_stats = CollectionProperty(type=ShapeKeyStatsItem)
+    bpy.types.Mesh.payu_shape_key_stats_index = IntProperty(update=select_stats_shape_key)
+
+
+def unregister_properties():
+    del bpy.types.Mesh.payu_shape_key_stats_index
+    del bpy.types.Mesh.payu_shape_key_stats
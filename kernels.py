@@ -0,0 +1,368 @@
+"""NumPyによるシェイプキーの一括処理
+
+頂点座標の一括読み書き（foreach_get / foreach_set）と、左右マスク・ミラー頂点対応・
+頂点グループのウェイトなどのキャッシュをまとめる。NumPyの読み込みを初回使用時まで
+遅らせるため、このモジュールは各オペレーターの実行時に読み込む。
+"""
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import bpy
+from mathutils.kdtree import KDTree
+import numpy as np
+
+
+# 左右判定に使うX座標の閾値（誤差を考慮）
+SIDE_THRESHOLD = 0.001
+
+# メッシュごとの左右マスクのキャッシュ {メッシュのポインタ: (頂点数, Basisのハッシュ, マスク)}
+_side_mask_cache = {}
+
+
+def read_shape_key_coords(key_block, out=None):
+    """シェイプキーの頂点座標を (頂点数, 3) のfloat32配列として一括取得する"""
+    count = len(key_block.data)
+    if out is None:
+        out = np.empty((count, 3), dtype=np.float32)
+    key_block.data.foreach_get("co", out.reshape(-1))
+    return out
+
+
+def write_shape_key_coords(key_block, coords):
+    """(頂点数, 3) の配列をシェイプキーの頂点座標へ一括書き込みする"""
+    coords = np.ascontiguousarray(coords, dtype=np.float32)
+    key_block.data.foreach_set("co", coords.reshape(-1))
+
+
+def get_side_mask(obj, basis_co=None):
+    """X ≥ 0 の頂点を示すブール配列を取得する
+
+    Basisの座標が変わらない限り、メッシュ単位でキャッシュしたマスクを返す。
+    分割では「〜左」がこのマスクの側の変形を、「〜右」が ``~mask``（X < 0）の側の変形を持つ。
+    適用範囲の 'LEFT' / 'RIGHT' も同じ対応を使う。
+    """
+    mesh = obj.data
+    if basis_co is None:
+        basis_co = read_shape_key_coords(mesh.shape_keys.reference_key)
+
+    ptr = mesh.as_pointer()
+    fingerprint = hash(basis_co[:, 0].tobytes())
+    cached = _side_mask_cache.get(ptr)
+    if cached and cached[0] == len(basis_co) and cached[1] == fingerprint:
+        return cached[2]
+
+    mask = basis_co[:, 0] > -SIDE_THRESHOLD
+    mask.flags.writeable = False
+    _side_mask_cache[ptr] = (len(basis_co), fingerprint, mask)
+    return mask
+
+
+# メッシュごとの隣接関係のキャッシュ {メッシュのポインタ: (頂点数, 辺のハッシュ, (行, 列, 次数))}
+_adjacency_cache = {}
+
+
+def get_adjacency(mesh):
+    """辺から作った頂点の隣接行列を疎な形式（COO）で取得する
+
+    隣接行列の非ゼロ要素の (行, 列) と、頂点ごとの次数を返す。辺の頂点を
+    foreach_get で一括取得し、トポロジーが変わらない限りキャッシュする。
+    """
+    edges = np.empty(len(mesh.edges) * 2, dtype=np.int32)
+    mesh.edges.foreach_get("vertices", edges)
+    count = len(mesh.vertices)
+
+    ptr = mesh.as_pointer()
+    fingerprint = hash(edges.tobytes())
+    cached = _adjacency_cache.get(ptr)
+    if cached and cached[0] == count and cached[1] == fingerprint:
+        return cached[2]
+
+    # 無向グラフなので両方向の要素を持たせる
+    rows = np.concatenate([edges[0::2], edges[1::2]])
+    cols = np.concatenate([edges[1::2], edges[0::2]])
+    degree = np.bincount(rows, minlength=count).astype(np.float32)
+    adjacency = (rows, cols, degree)
+    for array in adjacency:
+        array.flags.writeable = False
+    _adjacency_cache[ptr] = (count, fingerprint, adjacency)
+    return adjacency
+
+
+def get_side_weights(obj, basis_co, rings):
+    """右側のウェイト（0: 左、1: 右）を、中心線の付近でなめらかに変化させて取得する
+
+    中心線上の頂点を0.5とした左右の二値から始め、隣接する頂点との平均をとる拡散を
+    rings 回繰り返す（ウェイトが変わるのは中心線から辺 rings 本分の範囲まで）。
+    拡散は隣接行列とベクトルの積を np.bincount で一括計算する。
+    左側のウェイトは 1 - 右側のウェイトなので、左右を足すと元の変形に戻る。
+    """
+    rows, cols, degree = get_adjacency(obj.data)
+    x = basis_co[:, 0]
+    weights = np.where(np.abs(x) < SIDE_THRESHOLD, 0.5, (x > 0.0).astype(np.float32)).astype(np.float32)
+    count = len(weights)
+    for _ in range(rings):
+        neighbor_sum = np.bincount(rows, weights=weights[cols], minlength=count)
+        weights = ((weights + neighbor_sum) / (1.0 + degree)).astype(np.float32)
+    return weights
+
+
+def peek_side_mask(obj):
+    """キャッシュ済みの左右マスクを頂点データを読まずに返す（無い場合は None）
+
+    頂点数が一致するかだけを確認するため、Basisが編集された直後は古いマスクを
+    返すことがある。見積もりなど概算の用途に限って使う。
+    """
+    mesh = obj.data
+    cached = _side_mask_cache.get(mesh.as_pointer())
+    if cached and cached[0] == len(mesh.vertices):
+        return cached[2]
+    return None
+
+
+# メッシュごとのミラー頂点対応のキャッシュ {メッシュのポインタ: (Basisのハッシュ, 対応配列)}
+_mirror_map_cache = {}
+
+
+def get_mirror_map(obj, basis_co=None, tolerance=SIDE_THRESHOLD):
+    """各頂点のX軸ミラー位置にある頂点のインデックスを取得する（対応が無い頂点は -1）
+
+    座標を許容誤差で量子化した一括照合で大半の頂点を対応付け、量子化の境界で
+    外れた頂点だけをKDツリーで探索する。許容誤差が0以下の場合は座標が完全に一致する
+    頂点だけを対応付ける。複数の頂点が同じ頂点に対応した場合は最も近い1つだけを残す。
+    Basisの座標が変わらない限りキャッシュする。
+    """
+    mesh = obj.data
+    if basis_co is None:
+        basis_co = read_shape_key_coords(mesh.shape_keys.reference_key)
+
+    ptr = mesh.as_pointer()
+    fingerprint = hash((basis_co.tobytes(), tolerance))
+    cached = _mirror_map_cache.get(ptr)
+    if cached and cached[0] == fingerprint:
+        return cached[1]
+
+    count = len(basis_co)
+    # 0.0 を足して -0.0 を 0.0 にそろえる（完全一致の照合用）
+    mirrored_co = basis_co * np.array([-1.0, 1.0, 1.0], dtype=np.float32) + np.float32(0.0)
+
+    # 量子化した座標が一致する頂点を一括で対応付け
+    stacked = np.vstack([basis_co, mirrored_co])
+    quantized = np.round(stacked / tolerance).astype(np.int64) if tolerance > 0.0 else stacked
+    _, cell = np.unique(quantized, axis=0, return_inverse=True)
+    cell = cell.reshape(-1)
+    lookup = np.full(cell.max() + 1, -1, dtype=np.int64)
+    lookup[cell[:count]] = np.arange(count)
+    mirror_map = drop_shared_partners(lookup[cell[count:]], basis_co, mirrored_co)
+
+    # 量子化の境界で外れた頂点はKDツリーで探索
+    unmatched = np.flatnonzero(mirror_map < 0)
+    if len(unmatched):
+        tree = KDTree(count)
+        for i, co in enumerate(basis_co.tolist()):
+            tree.insert(co, i)
+        tree.balance()
+        for i in unmatched.tolist():
+            co, index, distance = tree.find(mirrored_co[i].tolist())
+            if index is not None and distance <= tolerance:
+                mirror_map[i] = index
+        mirror_map = drop_shared_partners(mirror_map, basis_co, mirrored_co)
+
+    mirror_map.flags.writeable = False
+    _mirror_map_cache[ptr] = (fingerprint, mirror_map)
+    return mirror_map
+
+
+def drop_shared_partners(mirror_map, basis_co, mirrored_co):
+    """同じ頂点に対応した頂点のうち、ミラー位置が最も近い1つ以外を対応無し（-1）にする"""
+    matched = np.flatnonzero(mirror_map >= 0)
+    partners = mirror_map[matched]
+    distances = np.linalg.norm(mirrored_co[matched] - basis_co[partners], axis=1)
+    order = np.lexsort((distances, partners))
+    sorted_partners = partners[order]
+    shared = np.zeros(len(order), dtype=bool)
+    shared[1:] = sorted_partners[1:] == sorted_partners[:-1]
+    mirror_map[matched[order[shared]]] = -1
+    return mirror_map
+
+
+def mirror_delta(delta, mirror_map):
+    """変形量をX軸で反転し、ミラー位置の頂点へ移す（対応が無い頂点は0）"""
+    matched = mirror_map >= 0
+    mirrored = np.zeros_like(delta)
+    mirrored[matched] = delta[mirror_map[matched]]
+    mirrored[:, 0] *= -1.0
+    return mirrored
+
+
+def get_symmetrize_plan(mirror_map, basis_co, mode):
+    """対称化で書き換える頂点と、その値の取り方を事前に決める
+
+    mode は 'LEFT_TO_RIGHT' / 'RIGHT_TO_LEFT' / 'AVERAGE'。左右は分割と同じく
+    左が X ≥ 0、右が X < 0。コピーの場合は反対側の頂点だけを書き換え、
+    中心の頂点はX方向の変形が0になるよう平均する。
+    ミラー位置に頂点が無い頂点は変更しない。
+
+    Returns:
+        (書き換える頂点, ミラー位置の頂点, 元の変形量を残す割合)
+    """
+    x = basis_co[:, 0]
+    matched = mirror_map >= 0
+    if mode == 'AVERAGE':
+        targets = np.flatnonzero(matched)
+        keep = np.full(len(targets), 0.5, dtype=np.float32)
+    else:
+        # コピー先（書き換える側）の頂点
+        target_side = x <= -SIDE_THRESHOLD if mode == 'LEFT_TO_RIGHT' else x >= SIDE_THRESHOLD
+        center = np.abs(x) < SIDE_THRESHOLD
+        copy_targets = np.flatnonzero(target_side & matched)
+        center_targets = np.flatnonzero(center & matched)
+        targets = np.concatenate([copy_targets, center_targets])
+        keep = np.concatenate([np.zeros(len(copy_targets), dtype=np.float32),
+                               np.full(len(center_targets), 0.5, dtype=np.float32)])
+    return targets, mirror_map[targets], keep[:, None]
+
+
+def symmetrize_delta(delta, plan):
+    """get_symmetrize_plan() の計画で変形量を対称にする（1回の収集と書き込み）"""
+    targets, sources, keep = plan
+    mirrored = delta[sources]
+    mirrored[:, 0] *= -1.0
+    delta[targets] = keep * delta[targets] + (1.0 - keep) * mirrored
+    return delta
+
+
+# 変形していないとみなす移動量
+DISPLACEMENT_EPSILON = 1e-6
+
+
+def apply_side_to_delta(delta, right_mask, side):
+    """変形量を指定した側（'BOTH' / 'LEFT' / 'RIGHT'）だけに制限する
+
+    分割と同じく 'LEFT' は X ≥ 0（``right_mask``）、'RIGHT' は X < 0 の変形を残す。
+    """
+    if side == 'LEFT':
+        delta[~right_mask] = 0.0
+    elif side == 'RIGHT':
+        delta[right_mask] = 0.0
+    return delta
+
+
+def split_key_coords(key_co, basis_co, right_side, side):
+    """左右分割後の片側の座標を計算する
+
+    従来の分割と同じく「〜左」は X ≥ 0（``right_side``）の変形を、「〜右」は X < 0 の変形を残す。
+    ``right_side`` が左右マスク（bool）の場合は反対側の頂点をBasisに戻す。
+    get_side_weights() の右側のウェイト（float）の場合は「〜左」の変形量にウェイトを掛ける
+    （「〜右」は 1 - ウェイト）。
+    """
+    if right_side.dtype != np.bool_:
+        weight = right_side if side == 'LEFT' else 1.0 - right_side
+        return basis_co + (key_co - basis_co) * weight[:, None]
+    keep = right_side if side == 'LEFT' else ~right_side
+    return np.where(keep[:, None], key_co, basis_co)
+
+
+def merge_key_coords(left_co, right_co, right_mask):
+    """左右のシェイプキーの座標を1つに統合する"""
+    return np.where(right_mask[:, None], right_co, left_co)
+
+
+def get_worker_count():
+    """配列計算に使うスレッド数"""
+    return os.cpu_count() or 1
+
+
+def pipelined(jobs, read, compute, max_workers=None, max_pending=None):
+    """配列計算をスレッドプールで先行させ、(ジョブ, Future) を順番に返す
+
+    ``read(job)`` はRNAにアクセスするためメインスレッドで呼び出し、
+    ``compute(job, data)`` はNumPyのみを使う前提でワーカースレッドで実行する
+    （NumPyの演算中はGILが解放される）。結果の書き込みは呼び出し側が
+    メインスレッドで行う。先行する計算は ``max_pending`` 件までに制限し、
+    メモリ使用量を抑える。
+    """
+    max_workers = max_workers or get_worker_count()
+    max_pending = max_pending or max_workers * 2
+    pending = deque()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for job in jobs:
+            pending.append((job, pool.submit(compute, job, read(job))))
+            if len(pending) >= max_pending:
+                yield pending.popleft()
+        while pending:
+            yield pending.popleft()
+
+
+# 頂点グループのウェイトのキャッシュ
+# {(オブジェクトのポインタ, メッシュのポインタ): (頂点グループ名のタプル, 頂点数, 頂点番号, グループ番号, ウェイト)}
+# 頂点グループはオブジェクトが持つため、メッシュを共有するオブジェクトごとに分けて保持する
+_weight_lookup_cache = {}
+
+
+def get_weight_lookup(obj):
+    """オブジェクトの全頂点グループのウェイトを (頂点番号, グループ番号, ウェイト) の配列で取得する
+
+    頂点ループ1回で全グループ分をまとめて読み込み、オブジェクトとメッシュの組ごとに
+    キャッシュする。頂点グループの名前・順番や頂点数が変わった場合は読み込み直す。
+    """
+    mesh = obj.data
+    cache_key = (obj.as_pointer(), mesh.as_pointer())
+    group_names = tuple(group.name for group in obj.vertex_groups)
+    vertex_count = len(mesh.vertices)
+    cached = _weight_lookup_cache.get(cache_key)
+    if cached is not None and cached[0] == group_names and cached[1] == vertex_count:
+        return cached[2:]
+
+    entries = [(v.index, g.group, g.weight) for v in mesh.vertices for g in v.groups]
+    vertices = np.array([entry[0] for entry in entries], dtype=np.int64)
+    groups = np.array([entry[1] for entry in entries], dtype=np.int64)
+    weights = np.array([entry[2] for entry in entries], dtype=np.float32)
+    for array in (vertices, groups, weights):
+        array.flags.writeable = False
+    _weight_lookup_cache[cache_key] = (group_names, vertex_count, vertices, groups, weights)
+    return vertices, groups, weights
+
+
+def get_weight_matrix(obj, group_names):
+    """頂点グループのウェイトを (頂点数, グループ数) の密行列として取得する
+
+    get_weight_lookup() のキャッシュから、指定したグループの列だけを一括で取り出す。
+    """
+    group_indices = []
+    for name in group_names:
+        group = obj.vertex_groups.get(name)
+        if group is None:
+            raise KeyError(f"頂点グループ '{name}' が見つかりません")
+        group_indices.append(group.index)
+
+    vertices, groups, weights = get_weight_lookup(obj)
+    # 重複を除いたグループごとに列を作り、最後に指定した順に並べる
+    unique_indices, order = np.unique(np.array(group_indices, dtype=np.int64), return_inverse=True)
+    # columns[グループ番号] = 列の番号（指定していないグループは -1）
+    columns = np.full(len(obj.vertex_groups), -1, dtype=np.int64)
+    columns[unique_indices] = np.arange(len(unique_indices))
+    column = columns[groups]
+    used = column >= 0
+
+    matrix = np.zeros((len(obj.data.vertices), len(unique_indices)), dtype=np.float32)
+    matrix[vertices[used], column[used]] = weights[used]
+    return matrix[:, order.reshape(-1)]
+
+
+def invalidate_weight_cache(depsgraph):
+    """ジオメトリが更新されたメッシュのウェイトキャッシュを破棄する"""
+    if not _weight_lookup_cache:
+        return
+    updated = set()
+    for update in depsgraph.updates:
+        if not update.is_updated_geometry:
+            continue
+        id_data = update.id.original
+        if isinstance(id_data, bpy.types.Object) and id_data.type == 'MESH':
+            updated.add(id_data.data.as_pointer())
+        elif isinstance(id_data, bpy.types.Mesh):
+            updated.add(id_data.as_pointer())
+    for cache_key in [k for k in _weight_lookup_cache if k[1] in updated]:
+        del _weight_lookup_cache[cache_key]
@@ -0,0 +1,301 @@
+"""2つのメッシュ・2つの .blend ファイルのシェイプキーの差分を一覧にします
+
+再書き出ししたアバターなどで、どのシェイプキーが実際に変わったかを調べる。
+両方のシェイプキーを ShapeKeyStack に1回ずつ読み込み、同じ名前のシェイプキーは
+相対キーとの差（Blenderが合成する変形量）をまとめて比較する。片方にしか無い
+シェイプキーは、変形量の指紋（量子化したハッシュとランダム射影）で名前だけが
+変わったものを見つけ、候補だけを全頂点で確かめる。
+"""
+import json
+import os
+
+import numpy as np
+
+from .fingerprint import RandomProjection, quantized_hash
+from .keystack import ShapeKeyStack
+from .preferences import get_memory_budget
+
+# 頂点の移動量の差がこれ以下なら変わっていないとみなす（既定値）
+DIFF_TOLERANCE = 1e-4
+
+def measure(deltas, tolerance):
+    """(キー数, 頂点数, 3) の変形量から、各キーの頂点の最大移動量と tolerance を超えて動いた頂点数を返す"""
+    lengths = np.sqrt(np.einsum('kij,kij->ki', deltas, deltas))
+    return lengths.max(axis=1, initial=0.0), np.count_nonzero(lengths > tolerance, axis=1)
+
+
+def batched(names, vertex_count, copies=3):
+    """変形量を copies 個分確保してもメモリ上限に収まる数ずつに names を分ける"""
+    batch_size = max(1, get_memory_budget() // max(1, vertex_count * 3 * 4 * copies))
+    for start in range(0, len(names), batch_size):
+        yield names[start:start + batch_size]
+
+
+def fingerprint_keys(stack, names, tolerance, projection=None):
+    """シェイプキーごとに (量子化した変形量のハッシュ, 射影, 最大移動量, 動いた頂点数) を計算する"""
+    prints = {}
+    for batch in batched(names, stack.coords.shape[1]):
+        deltas = stack.relative_deltas(batch)
+        magnitudes, affected = measure(deltas, tolerance)
+        signatures = projection.project(deltas) if projection is not None else None
+        for j, name in enumerate(batch):
+            prints[name] = (quantized_hash(deltas[j], tolerance),
+                            None if signatures is None else signatures[j],
+                            float(magnitudes[j]), int(affected[j]))
+    return prints
+
+
+def find_renames(old, new, removed, added, tolerance, seed=0):
+    """削除されたシェイプキーと追加されたシェイプキーのうち、変形量が同じものを対応付ける
+
+    Returns:
+        ([(旧名, 新名, 最大の差)], 旧名の指紋, 新名の指紋)
+    """
+    projection = None
+    if removed and added:
+        # 射影行列は頂点範囲ごとに生成する（行列全体を確保しない）
+        projection = RandomProjection(old.coords.shape[1], seed)
+    old_prints = fingerprint_keys(old, removed, tolerance, projection)
+    new_prints = fingerprint_keys(new, added, tolerance, projection)
+    if projection is None:
+        return [], old_prints, new_prints
+
+    # ハッシュが一致するペアと、射影した距離が近いペアを候補にする。全頂点の差が tolerance 以内なら、
+    # 射影した距離はおおよそ tolerance * sqrt(動いた頂点数) 以内になる
+    old_hashes = np.array([old_prints[name][0] for name in removed], dtype=np.int64)
+    new_hashes = np.array([new_prints[name][0] for name in added], dtype=np.int64)
+    old_signatures = np.stack([old_prints[name][1] for name in removed])
+    new_signatures = np.stack([new_prints[name][1] for name in added])
+    old_affected = np.array([old_prints[name][3] for name in removed])
+    new_affected = np.array([new_prints[name][3] for name in added])
+    distances = np.sqrt(np.maximum(
+        np.einsum('ij,ij->i', old_signatures, old_signatures)[:, None]
+        + np.einsum('ij,ij->i', new_signatures, new_signatures)[None, :]
+        - 2.0 * (old_signatures @ new_signatures.T), 0.0))
+    distances[old_hashes[:, None] == new_hashes[None, :]] = 0.0
+    bounds = 2.0 * tolerance * np.sqrt(old_affected[:, None] + new_affected[None, :] + 1.0)
+    rows, cols = np.nonzero(distances <= bounds)
+
+    # 近い候補から順に全頂点で確かめ、1対1で対応付ける
+    renames = []
+    matched_old, matched_new = set(), set()
+    for k in np.argsort(distances[rows, cols], kind='stable').tolist():
+        old_name, new_name = removed[rows[k]], added[cols[k]]
+        if old_name in matched_old or new_name in matched_new:
+            continue
+        difference = new.relative_deltas([new_name]) - old.relative_deltas([old_name])
+        magnitude, _ = measure(difference, tolerance)
+        if magnitude[0] <= tolerance:
+            renames.append((old_name, new_name, float(magnitude[0])))
+            matched_old.add(old_name)
+            matched_new.add(new_name)
+    return renames, old_prints, new_prints
+
+
+def diff_shape_keys(old_obj, new_obj, tolerance=DIFF_TOLERANCE):
+    """old_obj から new_obj へのシェイプキーの差分を調べる
+
+    変形量は各シェイプキーの相対キーとの差で比較する。Basisの変化は
+    basis_max_offset として別に報告する。
+
+    Returns:
+        差分のレポート（JSONに書き出せる辞書）。changed_keys は new_obj 側で
+        処理し直す必要のあるシェイプキー（追加・名前の変更・変更）の名前
+    """
+    old_mesh, new_mesh = old_obj.data, new_obj.data
+    if len(old_mesh.vertices) != len(new_mesh.vertices):
+        raise ValueError(f"頂点数が異なるため比較できません（{len(old_mesh.vertices)} / {len(new_mesh.vertices)}）")
+
+    old_settings = {key.name: (key.relative_key.name, key.vertex_group) for key in old_mesh.shape_keys.key_blocks}
+    new_settings = {key.name: (key.relative_key.name, key.vertex_group) for key in new_mesh.shape_keys.key_blocks}
+
+    with ShapeKeyStack(old_obj) as old, ShapeKeyStack(new_obj) as new:
+        offsets = np.sqrt(np.einsum('ij,ij->i', new.basis_co - old.basis_co, new.basis_co - old.basis_co))
+        basis_max_offset = float(offsets.max(initial=0.0))
+
+        old_keys, new_keys = old.names[1:], new.names[1:]
+        common = [name for name in new_keys if name in old.index and old.index[name] != 0]
+        removed = [name for name in old_keys if name not in new.index]
+        added = [name for name in new_keys if name not in old.index]
+
+        # 同じ名前のシェイプキーは変形量の差をまとめて計算する
+        modified = []
+        unchanged = 0
+        for batch in batched(common, len(offsets)):
+            magnitudes, changed = measure(new.relative_deltas(batch) - old.relative_deltas(batch), tolerance)
+            for name, magnitude, count in zip(batch, magnitudes.tolist(), changed.tolist()):
+                relative_changed = old_settings[name][0] != new_settings[name][0]
+                vertex_group_changed = old_settings[name][1] != new_settings[name][1]
+                if count or relative_changed or vertex_group_changed:
+                    modified.append({
+                        "name": name,
+                        "max_difference": magnitude,
+                        "changed_vertices": count,
+                        "relative_key_changed": relative_changed,
+                        "vertex_group_changed": vertex_group_changed,
+                    })
+                else:
+                    unchanged += 1
+
+        renames, old_prints, new_prints = find_renames(old, new, removed, added, tolerance)
+
+    renamed_old = {old_name for old_name, _, _ in renames}
+    renamed_new = {new_name for _, new_name, _ in renames}
+    modified.sort(key=lambda entry: entry["max_difference"], reverse=True)
+    return {
+        "old": old_obj.name,
+        "new": new_obj.name,
+        "vertices": len(new_mesh.vertices),
+        "tolerance": tolerance,
+        "basis_max_offset": basis_max_offset,
+        "basis_changed": basis_max_offset > tolerance,
+        "added": [{"name": name, "max_displacement": new_prints[name][2], "affected_vertices": new_prints[name][3]}
+                  for name in added if name not in renamed_new],
+        "removed": [{"name": name, "max_displacement": old_prints[name][2], "affected_vertices": old_prints[name][3]}
+                    for name in removed if name not in renamed_old],
+        "renamed": [{"old_name": old_name, "new_name": new_name, "max_difference": magnitude}
+                    for old_name, new_name, magnitude in renames],
+        "modified": modified,
+        "unchanged": unchanged,
+        "changed_keys": ([name for name in added if name not in renamed_new]
+                         + [new_name for _, new_name, _ in renames]
+                         + [entry["name"] for entry in modified]),
+    }
+
+
+def diff_blend_file(filepath, new_objects, tolerance=DIFF_TOLERANCE):
+    """別の .blend ファイルにある同じ名前のオブジェクトと比較する
+
+    比較元のオブジェクトは一時的にリンクし、比較後にライブラリごと削除する。
+
+    Args:
+        new_objects: 比較するこのファイルのオブジェクト
+
+    Returns:
+        (レポートのリスト, 比較元のファイルに無かったオブジェクト名のリスト)
+    """
+    import bpy
+
+    filepath = bpy.path.abspath(filepath)
+    if not os.path.isfile(filepath):
+        raise ValueError(f"ファイルが見つかりません: {filepath}")
+    existing_libraries = set(bpy.data.libraries)
+
+    wanted = {obj.name for obj in new_objects}
+    with bpy.data.libraries.load(filepath, link=True) as (data_from, data_to):
+        data_to.objects = [name for name in data_from.objects if name in wanted]
+    old_objects = {obj.name: obj for obj in data_to.objects if obj is not None}
+
+    try:
+        reports = []
+        missing = []
+        for new_obj in new_objects:
+            old_obj = old_objects.get(new_obj.name)
+            if old_obj is None or old_obj.type != 'MESH' or not old_obj.data.shape_keys:
+                missing.append(new_obj.name)
+                continue
+            try:
+                report = diff_shape_keys(old_obj, new_obj, tolerance)
+            except ValueError as e:
+                report = {"old": old_obj.name, "new": new_obj.name, "error": str(e)}
+            report["old_file"] = filepath
+            reports.append(report)
+        return reports, missing
+    finally:
+        # 比較のためにリンクしたデータを削除する（既にリンクしていたライブラリは残す）
+        for library in set(bpy.data.libraries) - existing_libraries:
+            linked = [id_data for id_data in bpy.data.user_map() if id_data.library == library]
+            bpy.data.batch_remove(linked)
+            bpy.data.libraries.remove(library)
+
+
+def print_diff(report):
+    if "error" in report:
+        print(f"{report['new']}: {report['error']}")
+        return
+    print(f"{report['old']} → {report['new']}: 追加 {len(report['added'])}個、削除 {len(report['removed'])}個"
+          f"、名前の変更 {len(report['renamed'])}個、変更 {len(report['modified'])}個、変更なし {report['unchanged']}個")
+    if report["basis_changed"]:
+        print(f"  Basisが変更されています（最大 {report['basis_max_offset']:.6g}）")
+    for entry in report["added"]:
+        print(f"  + {entry['name']}（最大移動量 {entry['max_displacement']:.6g}、{entry['affected_vertices']}頂点）")
+    for entry in report["removed"]:
+        print(f"  - {entry['name']}（最大移動量 {entry['max_displacement']:.6g}、{entry['affected_vertices']}頂点）")
+    for entry in report["renamed"]:
+        print(f"  > {entry['old_name']} → {entry['new_name']}")
+    for entry in report["modified"]:
+        notes = []
+        if entry["relative_key_changed"]:
+            notes.append("相対キー")
+        if entry["vertex_group_changed"]:
+            notes.append("頂点グループ")
+        note = f"、設定の変更: {'・'.join(notes)}" if notes else ""
+        print(f"  * {entry['name']}（最大の差 {entry['max_difference']:.6g}、{entry['changed_vertices']}頂点{note}）")
+
+
+def write_diff_report(reports, filepath):
+    with open(filepath, "w", encoding="utf-8") as f:
+        json.dump(reports, f, ensure_ascii=False, indent=2)
+
+
+def has_changes(report):
+    return "error" in report or bool(report["changed_keys"] or report["removed"] or report["basis_changed"])
+
+
+def add_arguments(parser):
+    parser.add_argument("old", help="比較元の .blend ファイル、またはこのファイル内の比較元のオブジェクト名")
+    parser.add_argument("--object", action="append",
+                        help="比較するオブジェクト名（複数指定可。省略時は .blend ファイルとの比較では"
+                             "シェイプキーを持つ全メッシュ、オブジェクトとの比較ではアクティブオブジェクト）")
+    parser.add_argument("--tolerance", type=float, default=DIFF_TOLERANCE, help="頂点の移動量の差の許容誤差")
+    parser.add_argument("--json", help="差分をJSONで書き出すファイル")
+    parser.add_argument("--fail-on-change", action="store_true", help="差分がある場合は終了コード1")
+
+
+def run(addon, args):
+    import bpy
+
+    if args.object:
+        new_objects = [bpy.data.objects.get(name) for name in args.object]
+        if None in new_objects:
+            print(f"オブジェクトが見つかりません: {', '.join(n for n, o in zip(args.object, new_objects) if o is None)}")
+            return 1
+    elif args.old.lower().endswith(".blend"):
+        new_objects = [obj for obj in bpy.data.objects
+                       if obj.type == 'MESH' and obj.data.shape_keys and obj.library is None]
+    else:
+        new_objects = [bpy.context.active_object] if bpy.context.active_object else []
+    new_objects = [obj for obj in new_objects if obj.type == 'MESH' and obj.data.shape_keys]
+    if not new_objects:
+        print("シェイプキーを持つメッシュオブジェクトが見つかりません")
+        return 1
+
+    if args.old.lower().endswith(".blend"):
+        try:
+            reports, missing = diff_blend_file(args.old, new_objects, args.tolerance)
+        except ValueError as e:
+            print(e)
+            return 1
+        for name in missing:
+            print(f"{name}: 比較元のファイルにシェイプキーを持つ同じ名前のメッシュがありません")
+    else:
+        old_obj = bpy.data.objects.get(args.old)
+        if old_obj is None or old_obj.type != 'MESH' or not old_obj.data.shape_keys:
+            print(f"シェイプキーを持つメッシュオブジェクト {args.old} が見つかりません")
+            return 1
+        reports = []
+        for new_obj in new_objects:
+            try:
+                reports.append(diff_shape_keys(old_obj, new_obj, args.tolerance))
+            except ValueError as e:
+                reports.append({"old": old_obj.name, "new": new_obj.name, "error": str(e)})
+
+    for report in reports:
+        print_diff(report)
+    if args.json:
+        write_diff_report(reports, args.json)
+        print(f"差分を {args.json} に書き出しました")
+
+    if args.fail_on_change and any(has_changes(report) for report in reports):
+        return 1
+    return 0
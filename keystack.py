@@ -0,0 +1,128 @@
+"""相対キーを考慮したシェイプキーの変形量
+
+Blenderはシェイプキーを「Basis + Σ 値 × (シェイプキー − 相対キー)」で合成する。
+各シェイプキーの変形量は Basis ではなく相対キーとの差なので、他のシェイプキーを
+相対キーにしているシェイプキーを Basis との差で分割・統合すると結果がずれる。
+ShapeKeyStack は必要なシェイプキーと相対キーを1つの配列に1回だけ読み込み、
+分割・統合・合成・統計で共通に使う変形量を提供する。
+"""
+import numpy as np
+
+from .kernels import merge_key_coords, read_shape_key_coords
+from .snapshot import ShapeKeySnapshot
+
+
+def resolve_relative_order(relative):
+    """相対キーの依存関係を解決し、(相対キーが先になる並び順, 各シェイプキーの連鎖の深さ) を返す
+
+    先頭（インデックス0）のシェイプキーと自身を相対キーにしているシェイプキーの深さを0とし、
+    相対キーの深さ + 1 を段ごとにまとめて決める（Basisを相対キーにしているシェイプキーは1）。
+    循環している相対キーは深さをシェイプキー数とし、並び順の最後にまとめる。
+    """
+    count = len(relative)
+    indices = np.arange(count)
+    resolved = relative == indices
+    resolved[0] = True
+    depth = np.zeros(count, dtype=np.intp)
+    for level in range(1, count + 1):
+        frontier = ~resolved & resolved[relative]
+        if not frontier.any():
+            break
+        depth[frontier] = level
+        resolved |= frontier
+    depth[~resolved] = count
+    return np.lexsort((indices, depth)), depth
+
+
+class ShapeKeyStack(ShapeKeySnapshot):
+    """シェイプキーの座標を1つの配列に読み込み、相対キーとの変形量を提供する
+
+    ``names`` を指定した場合は、そのシェイプキーと相対キー・Basisだけを読み込む
+    （この場合は一部のシェイプキーしか持たないため restore() には使えない）。
+    座標がメモリ上限を超える場合は ShapeKeySnapshot と同じく一時ファイルに置く。
+    """
+
+    def __init__(self, obj, names=None, memory_budget=None):
+        key_blocks = obj.data.shape_keys.key_blocks
+        self.store_properties(key_blocks, memory_budget)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.relative = np.array([self.index.get(name, 0) for name in self.relative_names], dtype=np.intp)
+        self.order, self.depth = resolve_relative_order(self.relative)
+
+        if names is None:
+            loaded = list(range(len(self.names)))
+        else:
+            wanted = {self.index[name] for name in names}
+            loaded = sorted({0} | wanted | {int(self.relative[i]) for i in wanted})
+        # rows[シェイプキーの番号] = 配列の行（読み込んでいないシェイプキーは -1）
+        self.rows = np.full(len(self.names), -1, dtype=np.intp)
+        self.rows[loaded] = np.arange(len(loaded))
+
+        self.allocate((len(loaded), len(obj.data.vertices), 3))
+        buffer = np.empty(self.coords.shape[1:], dtype=np.float32)
+        for row, i in enumerate(loaded):
+            self.coords[row] = read_shape_key_coords(key_blocks[i], buffer)
+
+    @property
+    def basis_co(self):
+        return self.coords[0]
+
+    def key_coords(self, name):
+        """シェイプキーの座標"""
+        return self.coords[self.rows[self.index[name]]]
+
+    def relative_name(self, name):
+        return self.names[self.relative[self.index[name]]]
+
+    def relative_coords(self, name):
+        """シェイプキーの相対キーの座標"""
+        return self.coords[self.rows[self.relative[self.index[name]]]]
+
+    def relative_delta(self, name):
+        """相対キーとの差（Blenderが値を掛けて合成する変形量）"""
+        return self.key_coords(name) - self.relative_coords(name)
+
+    def relative_deltas(self, names):
+        """複数のシェイプキーの相対キーとの差を (キー数, 頂点数, 3) で一括計算する"""
+        indices = np.array([self.index[name] for name in names], dtype=np.intp)
+        return self.coords[self.rows[indices]] - self.coords[self.rows[self.relative[indices]]]
+
+    def absolute_deltas(self, names):
+        """複数のシェイプキーのBasisとの差（相対キーの連鎖を含めた変形量）を一括計算する"""
+        indices = np.array([self.index[name] for name in names], dtype=np.intp)
+        return self.coords[self.rows[indices]] - self.basis_co
+
+    def weighted_delta(self, weights):
+        """Σ 重み × 相対キーとの差 を計算する
+
+        重みを配列の行ごとの係数（シェイプキーに +重み、相対キーに −重み）にまとめ、
+        全ての行との1回の積和で計算する。
+
+        Args:
+            weights: [(シェイプキー名, 重み)]
+        """
+        coefficients = np.zeros(len(self.coords), dtype=np.float64)
+        for name, weight in weights:
+            i = self.index[name]
+            coefficients[self.rows[i]] += weight
+            coefficients[self.rows[self.relative[i]]] -= weight
+        return np.tensordot(coefficients, self.coords, axes=1).astype(np.float32)
+
+    def merge_pair(self, left_name, right_name, right_mask, merged_names=None):
+        """左右のシェイプキーを統合した座標と、統合後のシェイプキーの相対キー名を返す
+
+        統合後の相対キーは左の相対キー（それ自体が統合される場合は統合後の名前）にする。
+        左右の相対キーが統合後に異なる場合は、右の変形量を左の相対キーを基準に付け替える。
+
+        Args:
+            merged_names: 同時に統合するシェイプキー {左右の名前: 統合後の名前}
+        """
+        merged_names = merged_names or {}
+        left_relative = self.relative_name(left_name)
+        right_relative = self.relative_name(right_name)
+        relative_name = merged_names.get(left_relative, left_relative)
+
+        right_co = self.key_coords(right_name)
+        if merged_names.get(right_relative, right_relative) != relative_name:
+            right_co = right_co - self.relative_coords(right_name) + self.relative_coords(left_name)
+        return merge_key_coords(self.key_coords(left_name), right_co, right_mask), relative_name
@@ -0,0 +1,231 @@
+"""高速化前の頂点ごとの実装（verify コマンドでの比較用）
+
+NumPy化する前の分割・統合・ミラー適用の処理を、結果を比較するためにそのまま
+残したもの。アドオンの機能としては使わない。
+"""
+import bpy
+import mathutils
+
+from .naming import MMD_NAME_PAIRS
+
+
+def store_shape_keys(obj):
+    """シェイプキーのデータを一時保存する"""
+    if not obj.data.shape_keys:
+        return None
+
+    shape_keys_data = []
+    for key_block in obj.data.shape_keys.key_blocks:
+        vertex_data = []
+        for v in key_block.data:
+            vertex_data.append([v.co.x, v.co.y, v.co.z])
+
+        shape_keys_data.append({
+            'name': key_block.name,
+            'value': key_block.value,
+            'vertices': vertex_data
+        })
+
+    return shape_keys_data
+
+
+def restore_shape_keys_with_mirror(obj, shape_keys_data, original_vertex_count):
+    """シェイプキーを復元し、右側にミラーリング"""
+    if not shape_keys_data:
+        return
+
+    # 最初のシェイプキー（Basis）を作成
+    basis_data = shape_keys_data[0]
+    basis = obj.shape_key_add(name=basis_data['name'])
+
+    # 残りのシェイプキーを作成
+    for key_data in shape_keys_data[1:]:
+        key_block = obj.shape_key_add(name=key_data['name'])
+
+        # まず全頂点をBasisの位置にリセット
+        for i in range(len(key_block.data)):
+            key_block.data[i].co = basis.data[i].co.copy()
+
+        # 左側の頂点データを適用（オリジナルの頂点）
+        for i in range(original_vertex_count):
+            key_block.data[i].co = mathutils.Vector(key_data['vertices'][i])
+
+        # 右側の頂点に左側の変形をミラーリング
+        current_vertex_count = len(obj.data.vertices)
+        for i in range(original_vertex_count):
+            left_idx = i
+            right_idx = i + original_vertex_count
+
+            if right_idx < current_vertex_count:
+                # 左側頂点の変形量を計算
+                left_basis_co = mathutils.Vector(basis_data['vertices'][left_idx])
+                left_shaped_co = mathutils.Vector(key_data['vertices'][left_idx])
+                deform = left_shaped_co - left_basis_co
+
+                # X座標を反転した変形を右側に適用
+                mirrored_deform = mathutils.Vector((-deform.x, deform.y, deform.z))
+                key_block.data[right_idx].co = basis.data[right_idx].co + mirrored_deform
+
+        # シェイプキーの値を設定
+        key_block.value = key_data['value']
+
+
+def apply_mirror_with_shape_keys(context, obj):
+    """ミラー修飾子を適用する（シェイプキーを保持）"""
+    # 現在の頂点数を保存（ミラー適用前）
+    original_vertex_count = len(obj.data.vertices)
+
+    # シェイプキーデータを保存
+    shape_keys_data = store_shape_keys(obj)
+
+    # シェイプキーを一時的に削除
+    while obj.data.shape_keys:
+        bpy.ops.object.shape_key_remove(all=True)
+
+    # ミラー修飾子を適用
+    for mod in obj.modifiers:
+        if mod.type == 'MIRROR' and mod.show_viewport:
+            context.view_layer.objects.active = obj
+            bpy.ops.object.modifier_apply(modifier=mod.name)
+
+    # シェイプキーを復元（右側にミラーリング）
+    restore_shape_keys_with_mirror(obj, shape_keys_data, original_vertex_count)
+
+
+def split_shape_key(obj, active_key, basis_key):
+    """シェイプキーを左右に分割する"""
+    # 基準となるシェイプキー名を取得
+    base_name = active_key.name.replace("左", "").replace("右", "")
+
+    # 元のシェイプキーの値を保存
+    original_value = active_key.value
+    active_key.value = 1.0
+
+    # 左右のシェイプキーを作成
+    left_key = obj.shape_key_add(name=f"{base_name}左")
+    right_key = obj.shape_key_add(name=f"{base_name}右")
+
+    # まず両方のキーに元のシェイプキーの値をコピー
+    for i in range(len(basis_key.data)):
+        left_key.data[i].co = active_key.data[i].co.copy()
+        right_key.data[i].co = active_key.data[i].co.copy()
+
+    # X座標を基準に左右を判定して、それぞれの反対側をBasisに戻す
+    threshold = 0.001  # 誤差を考慮した閾値
+    for i in range(len(basis_key.data)):
+        vertex_x = basis_key.data[i].co.x
+        if vertex_x > -threshold:  # 右側の頂点（X ≥ 0）
+            # 右シェイプキーをBasisに戻す
+            right_key.data[i].co = basis_key.data[i].co.copy()
+        else:  # 左側の頂点（X < 0）
+            # 左シェイプキーをBasisに戻す
+            left_key.data[i].co = basis_key.data[i].co.copy()
+
+    # 元のシェイプキーの値を復元
+    active_key.value = original_value
+
+    # 新規シェイプキーの値を0に設定
+    left_key.value = 0.0
+    right_key.value = 0.0
+
+    return len(obj.data.shape_keys.key_blocks) - 2
+
+
+def get_shape_key_pairs(obj):
+    """統合可能な左右のシェイプキーペアを収集"""
+    pairs = []
+    processed = set()
+    basis = obj.data.shape_keys.reference_key
+
+    # すべてのシェイプキーをチェック
+    for key in obj.data.shape_keys.key_blocks:
+        if key == basis or key.name in processed:
+            continue
+
+        # MMDパターンをチェック
+        for mmd_name, (left_name, right_name) in MMD_NAME_PAIRS.items():
+            if key.name == left_name:
+                right_key = obj.data.shape_keys.key_blocks.get(right_name)
+                if right_key:
+                    pairs.append((key, right_key, mmd_name))
+                    processed.add(left_name)
+                    processed.add(right_name)
+                    break
+            elif key.name == right_name:
+                left_key = obj.data.shape_keys.key_blocks.get(left_name)
+                if left_key:
+                    pairs.append((left_key, key, mmd_name))
+                    processed.add(left_name)
+                    processed.add(right_name)
+                    break
+
+        # 通常パターンをチェック
+        if key.name.endswith("左"):
+            base_name = key.name[:-1]
+            right_key = obj.data.shape_keys.key_blocks.get(base_name + "右")
+            if right_key:
+                pairs.append((key, right_key, base_name))
+                processed.add(key.name)
+                processed.add(right_key.name)
+        elif key.name.endswith("右") and key.name not in processed:
+            base_name = key.name[:-1]
+            left_key = obj.data.shape_keys.key_blocks.get(base_name + "左")
+            if left_key:
+                pairs.append((left_key, key, base_name))
+                processed.add(left_key.name)
+                processed.add(key.name)
+
+    return pairs
+
+
+def merge_single_pair(obj, left_key, right_key, merged_name):
+    """1組のシェイプキーを安全に統合"""
+    if not all([left_key, right_key]):
+        return False
+
+    try:
+        # 既存のシェイプキーをチェック
+        existing_key = obj.data.shape_keys.key_blocks.get(merged_name)
+        if existing_key:
+            # 既存のキーを保持し、左右のキーを個別に削除
+            if left_key.name in obj.data.shape_keys.key_blocks:
+                obj.shape_key_remove(left_key)
+            if right_key.name in obj.data.shape_keys.key_blocks:
+                obj.shape_key_remove(right_key)
+            return True
+
+        # 新しいキーを作成
+        original_value = left_key.value
+        new_key = obj.shape_key_add(name=merged_name, from_mix=False)
+        basis_key = obj.data.shape_keys.reference_key
+
+        # 頂点データをコピー
+        for i, data in enumerate(new_key.data):
+            if basis_key.data[i].co.x > -0.001:  # 右側
+                data.co = right_key.data[i].co.copy()
+            else:  # 左側
+                data.co = left_key.data[i].co.copy()
+
+        # 値を設定
+        new_key.value = original_value
+
+        # 古いキーを個別に削除
+        if right_key.name in obj.data.shape_keys.key_blocks:
+            obj.shape_key_remove(right_key)
+        if left_key.name in obj.data.shape_keys.key_blocks:
+            obj.shape_key_remove(left_key)
+
+        return True
+
+    except Exception as e:
+        print(f"Error merging pair {left_key.name}/{right_key.name}: {str(e)}")
+        return False
+
+
+def merge_all_shape_keys(obj):
+    """全ての左右シェイプキーを統合する（ペアは名前で取り直す）"""
+    key_blocks = obj.data.shape_keys.key_blocks
+    names = [(left_key.name, right_key.name, merged_name)
+             for left_key, right_key, merged_name in get_shape_key_pairs(obj)]
+    for left_name, right_name, merged_name in names:
+        merge_single_pair(obj, key_blocks.get(left_name), key_blocks.get(right_name), merged_name)
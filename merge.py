@@ -0,0 +1,536 @@
+"""左右統合・合成"""
+import time
+
+import bpy
+from bpy.types import Operator
+from bpy.props import StringProperty, EnumProperty, BoolProperty
+
+from .base import ShapeKeyToolsBase, SIDE_ITEMS
+from .naming import MMD_NAME_PAIRS
+from .planner import (BYTES_PER_VERTEX, describe_side_counts, estimate_seconds, format_bytes,
+                      is_mmd_rename, plan_merge_all, record_throughput)
+
+
+class MESH_OT_merge_shape_key(Operator):
+    bl_idname = "mesh.merge_shape_key"
+    bl_label = "シェイプキー左右統合"
+    bl_description = "選択したシェイプキーの左右を統合します"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def find_matching_shape_keys(self, obj, active_key):
+        """選択されたシェイプキーに対応する左右のシェイプキーを見つける"""
+        if not active_key or not active_key.name:
+            return None, None, None
+
+        active_name = active_key.name
+        
+        # MMDパターンをチェック
+        for mmd_name, (left_name, right_name) in MMD_NAME_PAIRS.items():
+            # 左側が選択された場合
+            if active_name == left_name:
+                # 右側を探す
+                right_key = obj.data.shape_keys.key_blocks.get(right_name)
+                if right_key:
+                    return active_key, right_key, mmd_name
+            # 右側が選択された場合
+            elif active_name == right_name:
+                # 左側を探す
+                left_key = obj.data.shape_keys.key_blocks.get(left_name)
+                if left_key:
+                    return left_key, active_key, mmd_name
+
+        # 通常パターンをチェック（「左」「右」で終わる名前）
+        if active_name.endswith("左"):
+            base_name = active_name[:-1]
+            right_key = obj.data.shape_keys.key_blocks.get(base_name + "右")
+            if right_key:
+                return active_key, right_key, base_name
+        elif active_name.endswith("右"):
+            base_name = active_name[:-1]
+            left_key = obj.data.shape_keys.key_blocks.get(base_name + "左")
+            if left_key:
+                return left_key, active_key, base_name
+
+        return None, None, None
+
+    def merge_shape_keys(self, obj, left_key, right_key, merged_name):
+        """左右のシェイプキーを統合"""
+        from .kernels import get_side_mask, write_shape_key_coords
+        from .keystack import ShapeKeyStack
+
+        if not (left_key and right_key):
+            return None
+        
+        # 元のシェイプキーの値を保存
+        original_value = left_key.value
+        
+        # 同名のシェイプキーが既に存在するかチェック
+        existing_key = obj.data.shape_keys.key_blocks.get(merged_name)
+        
+        # 同名のシェイプキーが存在する場合
+        if existing_key:
+            # 左右のシェイプキーを削除
+            obj.shape_key_remove(right_key)
+            obj.shape_key_remove(left_key)
+            return existing_key
+        
+        # X座標を基準に左右を判定し、相対キーを考慮して統合
+        with ShapeKeyStack(obj, [left_key.name, right_key.name]) as stack:
+            right_mask = get_side_mask(obj, stack.basis_co)
+            merged_co, relative_name = stack.merge_pair(left_key.name, right_key.name, right_mask)
+
+        # 新しいシェイプキーを作成
+        merged_key = obj.shape_key_add(name=merged_name, from_mix=False)
+        write_shape_key_coords(merged_key, merged_co)
+        if relative_name not in (left_key.name, right_key.name):
+            merged_key.relative_key = obj.data.shape_keys.key_blocks[relative_name]
+        
+        # 値を設定
+        merged_key.value = original_value
+        
+        # 元のシェイプキーを削除
+        obj.shape_key_remove(right_key)
+        obj.shape_key_remove(left_key)
+        
+        return merged_key
+
+    def execute(self, context):
+        obj = context.active_object
+        if not obj or not obj.data.shape_keys:
+            self.report({'ERROR'}, "シェイプキーが存在しません")
+            return {'CANCELLED'}
+        
+        active_key = obj.active_shape_key
+        if not active_key:
+            self.report({'ERROR'}, "シェイプキーを選択してください")
+            return {'CANCELLED'}
+        
+        # 左右のシェイプキーを見つける
+        left_key, right_key, merged_name = self.find_matching_shape_keys(obj, active_key)
+        
+        if not (left_key and right_key):
+            self.report({'ERROR'}, "対応する左右のシェイプキーが見つかりません")
+            return {'CANCELLED'}
+        
+        # シェイプキーを統合
+        merged_key = self.merge_shape_keys(obj, left_key, right_key, merged_name)
+        
+        if not merged_key:
+            self.report({'ERROR'}, "シェイプキーの統合に失敗しました")
+            return {'CANCELLED'}
+        
+        # 統合したシェイプキーを選択
+        obj.active_shape_key_index = list(obj.data.shape_keys.key_blocks).index(merged_key)
+        
+        self.report({'INFO'}, f"シェイプキーを '{merged_name}' として統合しました")
+        return {'FINISHED'}
+
+
+class MESH_OT_merge_all_shape_keys(Operator, ShapeKeyToolsBase):
+    bl_idname = "mesh.merge_all_shape_keys"
+    bl_label = "全シェイプキー左右統合"
+    bl_description = "全ての左右シェイプキーを統合します"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    dry_run: BoolProperty(
+        name="ドライラン",
+        description="シェイプキーを変更せず、統合・削除されるシェイプキーと必要なメモリ・時間の見積もりだけを表示します",
+        default=False,
+    )
+    transfer_animation: BoolProperty(
+        name="アニメーションを引き継ぐ",
+        description="左右のシェイプキーのF-Curveを統合後のシェイプキーにまとめます（両側にある場合は各フレームで大きい方の値）",
+        default=False,
+    )
+
+    def get_shape_key_pairs(self, obj):
+        """統合可能な左右のシェイプキーペアを収集"""
+        pairs = []
+        processed = set()
+        basis = obj.data.shape_keys.reference_key
+
+        # すべてのシェイプキーをチェック
+        for key in obj.data.shape_keys.key_blocks:
+            if key == basis or key.name in processed:
+                continue
+
+            # MMDパターンをチェック
+            # MMD_NAME_PAIRSの値をタプルとして取得
+            for mmd_name, (left_name, right_name) in MMD_NAME_PAIRS.items():
+                if key.name == left_name:
+                    right_key = obj.data.shape_keys.key_blocks.get(right_name)
+                    if right_key:
+                        pairs.append((key, right_key, mmd_name))
+                        processed.add(left_name)
+                        processed.add(right_name)
+                        break
+                elif key.name == right_name:
+                    left_key = obj.data.shape_keys.key_blocks.get(left_name)
+                    if left_key:
+                        pairs.append((left_key, key, mmd_name))
+                        processed.add(left_name)
+                        processed.add(right_name)
+                        break
+
+            # 通常パターンをチェック
+            if key.name.endswith("左"):
+                base_name = key.name[:-1]
+                right_key = obj.data.shape_keys.key_blocks.get(base_name + "右")
+                if right_key:
+                    pairs.append((key, right_key, base_name))
+                    processed.add(key.name)
+                    processed.add(right_key.name)
+            elif key.name.endswith("右") and key.name not in processed:
+                base_name = key.name[:-1]
+                left_key = obj.data.shape_keys.key_blocks.get(base_name + "左")
+                if left_key:
+                    pairs.append((left_key, key, base_name))
+                    processed.add(left_key.name)
+                    processed.add(key.name)
+
+        return pairs
+
+    def report_dry_run(self, obj, pairs):
+        """名前とキャッシュ済みの左右マスクだけで統合計画を報告する（データは変更しない）"""
+        plan = plan_merge_all([(left_key.name, right_key.name, merged_name)
+                               for left_key, right_key, merged_name in pairs],
+                              obj.data.shape_keys.key_blocks.keys())
+
+        vertex_count = len(obj.data.vertices)
+        lines = [describe_side_counts(obj)]
+        created_count = 0
+        for left_name, right_name, merged_name, create in plan:
+            if not create:
+                lines.append(f"削除のみ（既存の {merged_name} を保持）: {left_name} / {right_name}")
+                continue
+            created_count += 1
+            if is_mmd_rename(merged_name, (left_name, right_name)):
+                lines.append(f"統合（MMD名から変換）: {left_name} / {right_name} → {merged_name}")
+            else:
+                lines.append(f"統合: {left_name} / {right_name} → {merged_name}")
+
+        removed_count = len(plan) * 2
+        key_memory = (created_count - removed_count) * vertex_count * BYTES_PER_VERTEX
+        seconds = estimate_seconds("merge", created_count, vertex_count)
+        lines.append(f"作成 {created_count}個 / 削除 {removed_count}個"
+                     f" / メモリの増減: 約 {format_bytes(key_memory)} / 推定時間: 約 {seconds:.2f} 秒")
+
+        print(f"[ドライラン] {obj.name} の全シェイプキー左右統合")
+        for line in lines:
+            print("  " + line)
+        self.report({'INFO'}, f"ドライラン: {len(plan)}組を統合、{removed_count}個を削除"
+                              f"（約 {format_bytes(key_memory)}、約 {seconds:.2f} 秒）。詳細はコンソールを参照")
+        return {'FINISHED'}
+
+    def merge_single_pair(self, obj, left_key, right_key, merged_name, merged_co=None, relative_name=None,
+                          animation=None):
+        """1組のシェイプキーを安全に統合
+
+        Args:
+            animation: アニメーションを引き継ぐ場合は (アクション, key_fcurves() でまとめたF-Curve)。
+                統合後のシェイプキーを作成した後、左右を削除する前に引き継ぐ
+                （作成済みの引き継ぎ数は self.transferred_count に加算する）
+        """
+        from .kernels import get_side_mask, write_shape_key_coords
+        from .keystack import ShapeKeyStack
+
+        if not all([left_key, right_key]):
+            return False
+
+        try:
+            # 既存のシェイプキーをチェック
+            existing_key = obj.data.shape_keys.key_blocks.get(merged_name)
+            if existing_key:
+                # 既存のキーを保持し、左右のキーを個別に削除
+                if left_key.name in obj.data.shape_keys.key_blocks:
+                    obj.shape_key_remove(left_key)
+                if right_key.name in obj.data.shape_keys.key_blocks:
+                    obj.shape_key_remove(right_key)
+                return True
+
+            # 統合後の座標を計算（事前に計算済みでない場合）
+            if merged_co is None:
+                with ShapeKeyStack(obj, [left_key.name, right_key.name]) as stack:
+                    merged_co, relative_name = stack.merge_pair(left_key.name, right_key.name,
+                                                                get_side_mask(obj, stack.basis_co))
+
+            # 新しいキーを作成
+            original_value = left_key.value
+            new_key = obj.shape_key_add(name=merged_name, from_mix=False)
+
+            # 頂点データをコピー
+            write_shape_key_coords(new_key, merged_co)
+
+            # 相対キーを設定（統合する左右自身を相対キーにしていた場合はBasisのまま）
+            key_blocks = obj.data.shape_keys.key_blocks
+            if relative_name in key_blocks and relative_name not in (merged_name, left_key.name, right_key.name):
+                new_key.relative_key = key_blocks[relative_name]
+
+            # 値を設定
+            new_key.value = original_value
+
+            # 左右のF-Curveはシェイプキーの削除と一緒に削除されるため、削除前に統合後のシェイプキーへまとめる
+            if animation is not None:
+                from .fcurves import merge_pair_animation
+                self.transferred_count += merge_pair_animation(*animation, left_key.name, right_key.name,
+                                                               merged_name)
+
+            # 古いキーを個別に削除
+            if right_key.name in obj.data.shape_keys.key_blocks:
+                obj.shape_key_remove(right_key)
+            if left_key.name in obj.data.shape_keys.key_blocks:
+                obj.shape_key_remove(left_key)
+
+            return True
+
+        except Exception as e:
+            print(f"Error merging pair {left_key.name}/{right_key.name}: {str(e)}")
+            return False
+
+    def execute(self, context):
+        from .kernels import get_side_mask, pipelined
+        from .keystack import ShapeKeyStack
+
+        obj = context.active_object
+        
+        # オブジェクトの妥当性チェック
+        valid, message = self.validate_object(obj)
+        if not valid:
+            self.report({'ERROR'}, message)
+            return {'CANCELLED'}
+
+        # 統合可能なペアを収集
+        pairs = self.get_shape_key_pairs(obj)
+        if not pairs:
+            self.report({'WARNING'}, "統合可能なシェイプキーが見つかりません")
+            return {'CANCELLED'}
+
+        if self.dry_run:
+            return self.report_dry_run(obj, pairs)
+
+        # プログレスバーを初期化
+        self.setup_progress(context, len(pairs))
+        
+        try:
+            success_count = 0
+            error_count = 0
+
+            key_blocks = obj.data.shape_keys.key_blocks
+            jobs = [(left_key.name, right_key.name, merged_name)
+                    for left_key, right_key, merged_name in pairs]
+
+            # 左右のシェイプキー名 → 統合後の名前
+            merged_names = {name: merged_name for left_name, right_name, merged_name in jobs
+                            for name in (left_name, right_name)}
+            # 削除する左右のシェイプキーを相対キーにしているシェイプキーは、統合後に付け替える
+            dependents = [(key.name, merged_names[key.relative_key.name]) for key in key_blocks
+                          if key.relative_key.name in merged_names and key.name not in merged_names]
+
+            def read(job):
+                # 同名のシェイプキーが既にある場合は既存を保持するので計算不要
+                return job[2] not in key_blocks
+
+            def compute(job, needed):
+                if not needed:
+                    return None, None
+                return stack.merge_pair(job[0], job[1], right_mask, merged_names)
+
+            start = time.perf_counter()
+
+            # 統合に成功したペアだけ、左右のF-Curveを統合後のシェイプキーへまとめる
+            # （統合後の名前のシェイプキーが既にある場合は、そのアニメーションを保持する）
+            self.transferred_count = 0
+            animation = None
+            shape_keys = obj.data.shape_keys
+            if self.transfer_animation and shape_keys.animation_data and shape_keys.animation_data.action:
+                from .fcurves import key_fcurves
+                action = shape_keys.animation_data.action
+                animation = (action, key_fcurves(action))
+
+            # 統合するシェイプキーと相対キーを1回だけ読み込み、配列計算はスレッドプールで先行させ、
+            # 書き込みはメインスレッドで処理
+            with ShapeKeyStack(obj, [name for job in jobs if job[2] not in key_blocks for name in job[:2]]) as stack:
+                right_mask = get_side_mask(obj, stack.basis_co)
+                # 統合後の相対キーが先に作成されるよう、相対キーの連鎖が浅い順に処理する
+                jobs.sort(key=lambda job: stack.depth[stack.index[job[0]]])
+
+                for i, ((left_name, right_name, merged_name), future) in enumerate(pipelined(jobs, read, compute)):
+                    try:
+                        left_key = key_blocks.get(left_name)
+                        right_key = key_blocks.get(right_name)
+                        merged_co, relative_name = future.result()
+                        if self.merge_single_pair(obj, left_key, right_key, merged_name, merged_co, relative_name,
+                                                  animation):
+                            success_count += 1
+                        else:
+                            error_count += 1
+                    except Exception as e:
+                        print(f"Error processing pair: {str(e)}")
+                        error_count += 1
+
+                    self.update_progress(context, i + 1)
+
+            # 削除したシェイプキーを相対キーにしていたシェイプキーを、統合後のシェイプキーに付け替える
+            for name, merged_name in dependents:
+                if name in key_blocks and merged_name in key_blocks:
+                    key_blocks[name].relative_key = key_blocks[merged_name]
+
+            record_throughput("merge", success_count, len(obj.data.vertices), time.perf_counter() - start)
+
+            # 結果を報告
+            if success_count > 0:
+                message = f"{success_count}組のシェイプキーを統合しました"
+                if error_count > 0:
+                    message += f" ({error_count}個の処理に失敗)"
+                if self.transferred_count > 0:
+                    message += f"、F-Curve {self.transferred_count}個を引き継ぎ"
+                self.report({'INFO'}, message)
+                return {'FINISHED'}
+            else:
+                self.report({'ERROR'}, "シェイプキーの統合に失敗しました")
+                return {'CANCELLED'}
+
+        except Exception as e:
+            self.report({'ERROR'}, f"エラーが発生しました: {str(e)}")
+            return {'CANCELLED'}
+        finally:
+            self.end_progress(context)            
+            
+            
+class MESH_OT_compose_shape_keys(Operator, ShapeKeyToolsBase):
+    bl_idname = "mesh.compose_shape_keys"
+    bl_label = "シェイプキー合成"
+    bl_description = "複数のシェイプキーの変形量を重み付きで合算し、1つのシェイプキーに書き込みます"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    source: EnumProperty(
+        name="合成元",
+        items=[
+            ('SLIDERS', "現在のスライダー値", "各シェイプキーの現在の値を重みとして使用します"),
+            ('PRESET', "プリセット", "「名前:重み」の一覧を重みとして使用します"),
+        ],
+        default='SLIDERS',
+    )
+    preset: StringProperty(
+        name="プリセット",
+        description="「名前:重み」をカンマ区切りで指定（例: ウィンク:1.0, あ:0.5）",
+        default="",
+    )
+    target_name: StringProperty(
+        name="書き込み先",
+        description="書き込み先のシェイプキー名（存在しない場合は新規作成）",
+        default="合成",
+    )
+    side: EnumProperty(
+        name="適用範囲",
+        items=SIDE_ITEMS,
+        default='BOTH',
+    )
+
+    def parse_preset(self, text):
+        """プリセット文字列を (名前, 重み) のリストに変換"""
+        weights = []
+        for item in text.split(","):
+            item = item.strip()
+            if not item:
+                continue
+            name, sep, weight = item.rpartition(":")
+            if not sep:
+                name, weight = item, "1.0"
+            weights.append((name.strip(), float(weight)))
+        return weights
+
+    def collect_weights(self, obj):
+        """合成に使う (シェイプキー, 重み) のリストを取得"""
+        key_blocks = obj.data.shape_keys.key_blocks
+        basis = obj.data.shape_keys.reference_key
+
+        if self.source == 'SLIDERS':
+            return [(key, key.value) for key in key_blocks
+                    if key != basis and not key.mute and key.value != 0.0]
+
+        weights = []
+        for name, weight in self.parse_preset(self.preset):
+            key = key_blocks.get(name)
+            if key is None:
+                raise KeyError(f"シェイプキー '{name}' が見つかりません")
+            if key != basis and weight != 0.0:
+                weights.append((key, weight))
+        return weights
+
+    def compose(self, obj, weights, target_key=None):
+        """重み付きの変形量の合計を計算（書き込み先の相対キー + Σ 重み × 変形量）
+
+        変形量は各シェイプキーの相対キーとの差（Blenderが合成に使う値）。
+        書き込み先が無い場合はBasisを相対キーとする。
+        """
+        from .kernels import apply_side_to_delta, get_side_mask
+        from .keystack import ShapeKeyStack
+
+        names = [key.name for key, weight in weights]
+        if target_key is not None:
+            names.append(target_key.name)
+
+        with ShapeKeyStack(obj, names) as stack:
+            delta = stack.weighted_delta([(key.name, weight) for key, weight in weights])
+            apply_side_to_delta(delta, get_side_mask(obj, stack.basis_co), self.side)
+            base_co = stack.basis_co if target_key is None else stack.relative_coords(target_key.name)
+            return base_co + delta
+
+    def invoke(self, context, event):
+        return context.window_manager.invoke_props_dialog(self)
+
+    def execute(self, context):
+        from .kernels import write_shape_key_coords
+
+        obj = context.active_object
+
+        # オブジェクトの妥当性チェック
+        valid, message = self.validate_object(obj)
+        if not valid:
+            self.report({'ERROR'}, message)
+            return {'CANCELLED'}
+
+        if not self.target_name:
+            self.report({'ERROR'}, "書き込み先の名前を指定してください")
+            return {'CANCELLED'}
+
+        target_key = obj.data.shape_keys.key_blocks.get(self.target_name)
+        if target_key == obj.data.shape_keys.reference_key:
+            self.report({'ERROR'}, "Basisシェイプキーには書き込めません")
+            return {'CANCELLED'}
+
+        try:
+            weights = self.collect_weights(obj)
+        except (KeyError, ValueError) as e:
+            self.report({'ERROR'}, f"プリセットが不正です: {str(e)}")
+            return {'CANCELLED'}
+
+        if not weights:
+            self.report({'WARNING'}, "合成するシェイプキーがありません")
+            return {'CANCELLED'}
+
+        # 現在のモードを保存
+        original_mode = obj.mode
+        bpy.ops.object.mode_set(mode='OBJECT')
+
+        try:
+            coords = self.compose(obj, weights, target_key)
+
+            if target_key is None:
+                target_key = obj.shape_key_add(name=self.target_name, from_mix=False)
+                target_key.value = 0.0
+            write_shape_key_coords(target_key, coords)
+            obj.data.update()
+
+            obj.active_shape_key_index = list(obj.data.shape_keys.key_blocks).index(target_key)
+
+            self.report({'INFO'}, f"{len(weights)}個のシェイプキーを '{target_key.name}' に合成しました")
+            return {'FINISHED'}
+
+        except Exception as e:
+            self.report({'ERROR'}, f"エラーが発生しました: {str(e)}")
+            return {'CANCELLED'}
+        finally:
+            # 元のモードに戻す
+            bpy.ops.object.mode_set(mode=original_mode)
@@ -0,0 +1,38 @@
+"""MMD用の名前変換"""
+from bpy.types import Operator
+
+from .base import ShapeKeyToolsBase
+from .naming import get_mmd_name
+
+
+class MESH_OT_rename_shape_keys_for_mmd(Operator, ShapeKeyToolsBase):
+    bl_idname = "mesh.rename_shape_keys_for_mmd"
+    bl_label = "シェイプキー名をMMD用に変更"
+    bl_description = "シェイプキーの名前をMMD用に変更します"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def execute(self, context):
+        obj = context.active_object
+        
+        # オブジェクトの妥当性チェック
+        valid, message = self.validate_object(obj)
+        if not valid:
+            self.report({'ERROR'}, message)
+            return {'CANCELLED'}
+
+        renamed_count = 0
+        # 全てのシェイプキーをチェック
+        for key_block in obj.data.shape_keys.key_blocks:
+            # 「左」「右」で終わり、MMDペアに対応する名前を変換
+            mmd_name = get_mmd_name(key_block.name)
+            if mmd_name != key_block.name:
+                key_block.name = mmd_name
+                renamed_count += 1
+
+        if renamed_count > 0:
+            self.report({'INFO'}, f"{renamed_count}個のシェイプキーの名前を変更しました")
+            return {'FINISHED'}
+        else:
+            self.report({'WARNING'}, "変更対象のシェイプキーが見つかりませんでした")
+            return {'CANCELLED'}
+                
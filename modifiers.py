@@ -0,0 +1,119 @@
+"""シェイプキーを保持したままの修飾子の適用"""
+import bmesh
+import bpy
+from bpy.types import Operator
+from bpy.props import BoolProperty
+
+from .base import ShapeKeyToolsBase
+
+
+class MESH_OT_apply_modifiers_keep_shape_keys(Operator, ShapeKeyToolsBase):
+    bl_idname = "mesh.apply_modifiers_keep_shape_keys"
+    bl_label = "修飾子を適用（シェイプキーを保持）"
+    bl_description = "ビューポートで有効な修飾子を、シェイプキーを保持したまま適用します"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    keep_armature: BoolProperty(
+        name="アーマチュアを残す",
+        description="アーマチュア修飾子は適用せずに残します（評価中はポーズを反映しません）",
+        default=True,
+    )
+
+    def get_target_modifiers(self, obj):
+        """適用する修飾子と、残す修飾子のリストを返す"""
+        targets = []
+        kept = []
+        for mod in obj.modifiers:
+            if not mod.show_viewport:
+                continue
+            if self.keep_armature and mod.type == 'ARMATURE':
+                kept.append(mod)
+            else:
+                targets.append(mod)
+        return targets, kept
+
+    def execute(self, context):
+        from .evaluate import EvaluatedShapeKeySnapshot
+
+        obj = context.active_object
+
+        # オブジェクトの妥当性チェック
+        valid, message = self.validate_object(obj)
+        if not valid:
+            self.report({'ERROR'}, message)
+            return {'CANCELLED'}
+        if obj.data.users > 1:
+            self.report({'ERROR'}, "複数のオブジェクトで共有されているメッシュには適用できません")
+            return {'CANCELLED'}
+
+        targets, kept = self.get_target_modifiers(obj)
+        if not targets:
+            self.report({'WARNING'}, "適用できる修飾子が見つかりません")
+            return {'CANCELLED'}
+
+        # 現在のモードを保存
+        original_mode = obj.mode
+        bpy.ops.object.mode_set(mode='OBJECT')
+
+        # プログレスバーを初期化（評価と書き戻しの2段階）
+        key_count = len(obj.data.shape_keys.key_blocks)
+        self.setup_progress(context, key_count + 1)
+
+        work = None
+        try:
+            # 全シェイプキーを評価してから変更を始める（トポロジーが変わる場合はここで中断）
+            with EvaluatedShapeKeySnapshot(context, obj, kept,
+                                           progress=lambda step: self.update_progress(context, step)) as snapshot:
+                target_names = [mod.name for mod in targets]
+
+                # 修飾子は一時的な複製に適用し、頂点数を確かめてから元のオブジェクトに反映する
+                # （途中で中断しても元のメッシュ・シェイプキー・修飾子は変更しない）
+                work = obj.copy()
+                work.data = obj.data.copy()
+                context.scene.collection.objects.link(work)
+                work.shape_key_clear()
+                context.view_layer.objects.active = work
+                for name in target_names:
+                    bpy.ops.object.modifier_apply(modifier=name)
+                context.view_layer.objects.active = obj
+
+                if len(work.data.vertices) != snapshot.vertex_count:
+                    raise RuntimeError(f"適用後の頂点数 {len(work.data.vertices)} が評価時の"
+                                       f" {snapshot.vertex_count} と一致しません")
+
+                # 適用後の形状は元のメッシュに書き戻す。メッシュとKeyデータブロックを作り直さないため、
+                # シェイプキーのアクション・ドライバーや、このメッシュを参照しているドライバーもそのまま残る
+                bm = bmesh.new()
+                try:
+                    bm.from_mesh(work.data)
+                    bm.to_mesh(obj.data)
+                finally:
+                    bm.free()
+                work_mesh = work.data
+                bpy.data.objects.remove(work)
+                work = None
+                bpy.data.meshes.remove(work_mesh)
+                for name in target_names:
+                    obj.modifiers.remove(obj.modifiers[name])
+
+                snapshot.overwrite(obj)
+                obj.data.update()
+                self.update_progress(context, key_count + 1)
+
+            self.report({'INFO'}, f"{len(target_names)}個の修飾子を適用し、"
+                                  f"{key_count}個のシェイプキーを保持しました")
+            return {'FINISHED'}
+
+        except Exception as e:
+            self.report({'ERROR'}, f"エラーが発生しました: {str(e)}")
+            return {'CANCELLED'}
+        finally:
+            if work is not None:
+                # 中断した場合は一時的な複製を削除する
+                work_mesh = work.data
+                bpy.data.objects.remove(work)
+                bpy.data.meshes.remove(work_mesh)
+                context.view_layer.objects.active = obj
+            self.end_progress(context)
+            # 元のモードに戻す
+            bpy.ops.object.mode_set(mode=original_mode)
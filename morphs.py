@@ -0,0 +1,140 @@
+"""頂点モーフ（変形した頂点だけの疎なオフセット表）を書き出します
+
+シェイプキーを1つずつ foreach_get で読み込み、Basisから動いた頂点の
+(モーフ名, 頂点インデックス, オフセット) だけを書き出す。全シェイプキーを
+同時にメモリに保持しないため、モーフ数が多いモデルでも使用メモリは
+頂点数に比例する分だけで済む。
+
+バイナリ形式（リトルエンディアン）:
+    ヘッダー   b"PMRF", uint32 バージョン, uint32 頂点数, uint32 モーフ数
+    モーフごと uint16 名前のバイト数, 名前（UTF-8）, uint32 頂点数 n,
+               uint32 × n 頂点インデックス, float32 × n × 3 オフセット
+"""
+import csv
+import io
+import struct
+
+import numpy as np
+
+from .kernels import DISPLACEMENT_EPSILON, read_shape_key_coords
+
+BINARY_MAGIC = b"PMRF"
+BINARY_VERSION = 1
+CSV_HEADER = ("morph", "vertex", "x", "y", "z")
+
+
+def iter_sparse_morphs(obj, names=None, epsilon=DISPLACEMENT_EPSILON):
+    """(シェイプキー名, 動いた頂点のインデックス, オフセット) をシェイプキーごとに返す
+
+    オフセットはBasisからのオブジェクト空間での移動量。読み込み用の配列は
+    全シェイプキーで使い回す。
+    """
+    shape_keys = obj.data.shape_keys
+    basis = shape_keys.reference_key
+    basis_co = read_shape_key_coords(basis)
+    buffer = np.empty_like(basis_co)
+    threshold = epsilon * epsilon
+
+    for key in shape_keys.key_blocks:
+        if key == basis or (names is not None and key.name not in names):
+            continue
+        delta = np.subtract(read_shape_key_coords(key, buffer), basis_co, out=buffer)
+        moved = np.flatnonzero(np.einsum('ij,ij->i', delta, delta) > threshold)
+        yield key.name, moved, delta[moved]
+
+
+def write_csv(f, morphs):
+    """テキストファイルにCSVで書き出し、書き出したモーフの数を返す"""
+    f.write(",".join(CSV_HEADER) + "\n")
+    count = 0
+    for name, indices, offsets in morphs:
+        # モーフ名の列はCSVの規則でクォートし、数値の列はNumPyでまとめて整形する
+        prefix = io.StringIO()
+        csv.writer(prefix, lineterminator="").writerow([name])
+        prefix = prefix.getvalue() + ","
+        count += 1
+        if not len(indices):
+            # 変形していないモーフは頂点の列を空にした1行だけを書き出す
+            f.write(prefix + ",,,\n")
+            continue
+        body = io.StringIO()
+        np.savetxt(body, np.column_stack([indices, offsets]),
+                   fmt=("%d", "%.7g", "%.7g", "%.7g"), delimiter=",")
+        lines = body.getvalue().splitlines()
+        f.write(prefix + ("\n" + prefix).join(lines) + "\n")
+    return count
+
+
+def write_binary(f, morphs, vertex_count):
+    """バイナリファイルに書き出し、書き出したモーフの数を返す"""
+    header = struct.Struct("<4sIII")
+    f.write(header.pack(BINARY_MAGIC, BINARY_VERSION, vertex_count, 0))
+    count = 0
+    for name, indices, offsets in morphs:
+        encoded = name.encode("utf-8")
+        f.write(struct.pack("<H", len(encoded)))
+        f.write(encoded)
+        f.write(struct.pack("<I", len(indices)))
+        f.write(indices.astype("<u4").tobytes())
+        f.write(offsets.astype("<f4").tobytes())
+        count += 1
+
+    # モーフ数は書き出した後にヘッダーへ書き戻す
+    f.seek(0)
+    f.write(header.pack(BINARY_MAGIC, BINARY_VERSION, vertex_count, count))
+    f.seek(0, io.SEEK_END)
+    return count
+
+
+def export_morphs(obj, filepath, file_format, rename=None, include_empty=False,
+                  epsilon=DISPLACEMENT_EPSILON):
+    """オブジェクトの全シェイプキーを疎な頂点モーフとして書き出す
+
+    Args:
+        file_format: 'CSV' または 'BINARY'
+        rename: 書き出すモーフ名を決める関数（None の場合はシェイプキー名のまま）
+
+    Returns:
+        (書き出したモーフの数, 書き出したオフセットの数)
+    """
+    offset_count = 0
+
+    def morphs():
+        nonlocal offset_count
+        for name, indices, offsets in iter_sparse_morphs(obj, epsilon=epsilon):
+            if not len(indices) and not include_empty:
+                continue
+            offset_count += len(indices)
+            yield (rename(name) if rename else name), indices, offsets
+
+    if file_format == 'CSV':
+        with open(filepath, "w", encoding="utf-8", newline="") as f:
+            count = write_csv(f, morphs())
+    else:
+        with open(filepath, "wb") as f:
+            count = write_binary(f, morphs(), len(obj.data.vertices))
+    return count, offset_count
+
+
+def add_arguments(parser):
+    parser.add_argument("output", help="書き出すファイル（拡張子 .csv または .pmorph で形式を判定）")
+    parser.add_argument("--object", help="書き出すオブジェクト名（省略時はアクティブオブジェクト）")
+    parser.add_argument("--mmd-names", action="store_true", help="MMD用の名前に変換して書き出す")
+    parser.add_argument("--include-empty", action="store_true", help="変形の無いモーフも含める")
+
+
+def run(addon, args):
+    import bpy
+    from .naming import get_mmd_name
+
+    obj = bpy.data.objects.get(args.object) if args.object else bpy.context.active_object
+    if obj is None or obj.type != 'MESH' or not obj.data.shape_keys:
+        print("シェイプキーを持つメッシュオブジェクトが見つかりません")
+        return 1
+
+    file_format = 'BINARY' if args.output.lower().endswith(".pmorph") else 'CSV'
+    count, offset_count = export_morphs(obj, args.output, file_format,
+                                        rename=get_mmd_name if args.mmd_names else None,
+                                        include_empty=args.include_empty)
+    print(f"{count}個のモーフ（{offset_count}頂点分のオフセット）を {args.output} に書き出しました")
+    return 0
@@ -0,0 +1,127 @@
+"""シェイプキー名の規則（左右・MMD用の名前）"""
+
+
+# MMD用の名前マッピング
+MMD_NAME_PAIRS = {
+    "まばたき": ("ウィンク2", "ｳｨﾝｸ2右"),
+    "笑い": ("ウィンク", "ウィンク右"),
+}
+
+# 逆引き用の名前マッピング（統合時に使用）
+NAME_MAPPING = {
+    "ウィンク2": "まばたき",
+    "ｳｨﾝｸ2右": "まばたき",
+    "ウィンク": "笑い",
+    "ウィンク右": "笑い"
+}
+
+
+def plan_split(key_name, existing_names):
+    """シェイプキー名だけから、左右分割で作成するシェイプキーを決定する
+
+    Returns:
+        (作成する (名前, 'LEFT' または 'RIGHT') のリスト, メッセージ)
+    """
+    # まず、このシェイプキー自体が「左」「右」で終わっているかチェック
+    if key_name.endswith("左") or key_name.endswith("右"):
+        return [], "既に分割済み"
+
+    # MMDの名前に関連するチェックを先に行う
+    for mmd_name, (left_name, right_name) in MMD_NAME_PAIRS.items():
+        # ケース1：このシェイプキーがMMDの名前（例：笑い）の場合
+        if key_name == mmd_name:
+            # まず「笑い左」「笑い右」の存在をチェック
+            mmd_left = mmd_name + "左"
+            mmd_right = mmd_name + "右"
+            if mmd_left in existing_names and mmd_right in existing_names:
+                return [], f"既に {mmd_left} と {mmd_right} が存在します"
+            break
+
+        # ケース2：このシェイプキーが「ウィンク」等の場合は分割をスキップ
+        elif key_name == left_name or key_name == right_name:
+            return [], "MMD用のシェイプキーは分割できません"
+    else:
+        # 通常の左右分割
+        left_name = f"{key_name}左"
+        right_name = f"{key_name}右"
+
+    if left_name in existing_names and right_name in existing_names:
+        return [], f"既に {left_name} と {right_name} が存在します"
+
+    # 存在しないシェイプキーのみ作成
+    creates = [(name, side) for name, side in ((left_name, 'LEFT'), (right_name, 'RIGHT'))
+               if name not in existing_names]
+    return creates, f"{' と '.join(name for name, side in creates)} を作成しました"
+
+
+def get_opposite_side_name(key_name):
+    """片側のシェイプキー名から反対側の名前を取得する
+
+    Returns:
+        (反対側の名前, 元のシェイプキーの側 'LEFT' / 'RIGHT')。片側の名前でない場合は (None, None)
+    """
+    for mmd_name, (left_name, right_name) in MMD_NAME_PAIRS.items():
+        if key_name == left_name:
+            return right_name, 'LEFT'
+        if key_name == right_name:
+            return left_name, 'RIGHT'
+
+    if key_name.endswith("左"):
+        return key_name[:-1] + "右", 'LEFT'
+    if key_name.endswith("右"):
+        return key_name[:-1] + "左", 'RIGHT'
+    return None, None
+
+
+def get_mmd_name(key_name):
+    """「笑い左」「まばたき右」などのMMD用の名前を返す（対象外の名前はそのまま）"""
+    if key_name.endswith("左") or key_name.endswith("右"):
+        pair = MMD_NAME_PAIRS.get(key_name[:-1])
+        if pair:
+            return pair[0] if key_name.endswith("左") else pair[1]
+    return key_name
+
+
+def get_split_source_name(key_name):
+    """左右分割で作られるシェイプキー名から、分割元の名前と側を取得する
+
+    Returns:
+        (分割元の名前, 'LEFT' / 'RIGHT')。片側の名前でない場合は (None, None)
+    """
+    if key_name in NAME_MAPPING:
+        left_name, right_name = MMD_NAME_PAIRS[NAME_MAPPING[key_name]]
+        return NAME_MAPPING[key_name], 'LEFT' if key_name == left_name else 'RIGHT'
+    if key_name.endswith("左"):
+        return key_name[:-1], 'LEFT'
+    if key_name.endswith("右"):
+        return key_name[:-1], 'RIGHT'
+    return None, None
+
+
+# MMDのモーフの分類（表示パネル）と、分類ごとの代表的なモーフ名
+MMD_CATEGORIES = (
+    ("眉", ("真面目", "困る", "にこり", "怒り", "上", "下", "前", "眉頭上", "眉頭下")),
+    ("目", ("まばたき", "笑い", "ウィンク", "ウィンク右", "ウィンク2", "ｳｨﾝｸ2右", "はぅ", "なごみ",
+           "びっくり", "じと目", "ｷﾘｯ", "はちゅ目", "星目", "はぁと", "瞳小", "瞳大", "瞳縦潰れ",
+           "光下", "恐ろしい子！", "ハイライト消", "映り込み消")),
+    ("リップ", ("あ", "い", "う", "え", "お", "あ２", "ん", "▲", "∧", "□", "ワ", "ω", "ω□",
+             "にやり", "にやり２", "にっこり", "ぺろっ", "てへぺろ", "てへぺろ２", "口角上げ", "口角下げ",
+             "口横広げ", "歯無し上", "歯無し下")),
+    ("その他", ("照れ", "青ざめ", "がーん", "涙", "頬染め", "汗")),
+)
+
+# モーフ名 → 分類の番号（MMD_CATEGORIES の並び順）
+_MMD_CATEGORY_INDEX = {name: index for index, (category, names) in enumerate(MMD_CATEGORIES)
+                       for name in names}
+
+
+def get_mmd_category(key_name):
+    """シェイプキー名のMMDの分類の番号を返す（分類できない名前は「その他」）
+
+    「笑い左」のように左右分割した名前は、分割元の名前で分類する。
+    """
+    index = _MMD_CATEGORY_INDEX.get(key_name)
+    if index is None:
+        source_name, side = get_split_source_name(key_name)
+        index = _MMD_CATEGORY_INDEX.get(source_name)
+    return len(MMD_CATEGORIES) - 1 if index is None else index
@@ -0,0 +1,136 @@
+"""シェイプキーの並べ替え"""
+import time
+from fnmatch import fnmatchcase
+
+import bpy
+from bpy.types import Operator
+from bpy.props import BoolProperty, EnumProperty, StringProperty
+
+from .base import ShapeKeyToolsBase
+from .naming import get_mmd_category, get_opposite_side_name, get_split_source_name
+
+
+def parse_rules(text):
+    """カンマ区切りの並べ替えルール（* ? を使えるパターン）をリストにする"""
+    return [rule.strip() for rule in text.split(",") if rule.strip()]
+
+
+def plan_shape_key_order(names, mode='KEEP', pairs_adjacent=True, rules=()):
+    """名前だけから、並べ替え後のシェイプキー名の並び順を1回で計算する
+
+    Args:
+        names: 現在の並び順のシェイプキー名（先頭はBasis）
+        mode: 'KEEP'（現在の順序）/ 'MMD'（MMDの分類順）/ 'ALPHABETICAL'（名前順）/ 'CUSTOM'（rules の順）
+        pairs_adjacent: 左右分割したシェイプキーを分割元の直後（左・右の順）に並べる
+        rules: 'CUSTOM' で使うパターンのリスト。先に一致したパターンほど前に並べ、
+            どれにも一致しないシェイプキーは最後に並べる
+
+    Returns:
+        Basisを先頭にしたシェイプキー名のリスト
+    """
+    basis_name, key_names = names[0], names[1:]
+
+    # 各シェイプキーの並び順の基準（同じ基準の場合は現在の順序を保つ）
+    ranks = {}
+    for index, name in enumerate(key_names):
+        if mode == 'MMD':
+            primary = get_mmd_category(name)
+        elif mode == 'ALPHABETICAL':
+            primary = name.casefold()
+        elif mode == 'CUSTOM':
+            primary = next((i for i, rule in enumerate(rules) if fnmatchcase(name, rule)), len(rules))
+        else:
+            primary = 0
+        ranks[name] = (primary, index)
+
+    if not pairs_adjacent:
+        return [basis_name] + sorted(key_names, key=ranks.__getitem__)
+
+    def sort_key(name):
+        source_name, side = get_split_source_name(name)
+        if source_name is None:
+            return ranks[name], 0
+        side_order = 1 if side == 'LEFT' else 2
+        if source_name in ranks:
+            # 分割元の直後に並べる
+            return ranks[source_name], side_order
+        opposite_name, _ = get_opposite_side_name(name)
+        if opposite_name in ranks:
+            # 分割元が無い場合は、左右のうち前にある方の位置にまとめる
+            return min(ranks[name], ranks[opposite_name]), side_order
+        return ranks[name], 0
+
+    return [basis_name] + sorted(key_names, key=sort_key)
+
+
+class MESH_OT_sort_shape_keys(Operator, ShapeKeyToolsBase):
+    bl_idname = "mesh.sort_shape_keys"
+    bl_label = "シェイプキーを並べ替え"
+    bl_description = "並び順を一度に計算し、移動を繰り返さずにシェイプキーを並べ替えます"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    mode: EnumProperty(
+        name="並び順",
+        items=[
+            ('KEEP', "現在の順序", "現在の順序のまま、左右のシェイプキーだけを分割元の隣に移動します"),
+            ('MMD', "MMDの分類", "眉・目・リップ・その他の順にまとめます"),
+            ('ALPHABETICAL', "名前順", "名前の順に並べます"),
+            ('CUSTOM', "カスタム", "指定したパターンの順に並べます"),
+        ],
+        default='KEEP',
+    )
+    pairs_adjacent: BoolProperty(
+        name="左右を分割元の隣に",
+        description="「笑い左」「笑い右」などを分割元のシェイプキーの直後に並べます",
+        default=True,
+    )
+    rules: StringProperty(
+        name="パターン",
+        description="カンマ区切りのパターン（* ? 使用可）。先に一致したパターンほど前に並べます",
+        default="まばたき*, 笑い*, ウィンク*, あ*, い*, う*, え*, お*",
+    )
+
+    def invoke(self, context, event):
+        return context.window_manager.invoke_props_dialog(self)
+
+    def draw(self, context):
+        layout = self.layout
+        layout.prop(self, "mode")
+        layout.prop(self, "pairs_adjacent")
+        if self.mode == 'CUSTOM':
+            layout.prop(self, "rules")
+
+    def execute(self, context):
+        obj = context.active_object
+
+        # オブジェクトの妥当性チェック
+        valid, message = self.validate_object(obj)
+        if not valid:
+            self.report({'ERROR'}, message)
+            return {'CANCELLED'}
+
+        names = [key.name for key in obj.data.shape_keys.key_blocks]
+        order = plan_shape_key_order(names, self.mode, self.pairs_adjacent, parse_rules(self.rules))
+        if order == names:
+            self.report({'INFO'}, "既に指定の順序で並んでいます")
+            return {'CANCELLED'}
+
+        # 現在のモードを保存
+        original_mode = obj.mode
+        bpy.ops.object.mode_set(mode='OBJECT')
+
+        try:
+            from .snapshot import permute_shape_keys
+
+            start = time.perf_counter()
+            moved_count = permute_shape_keys(obj, order)
+            self.report({'INFO'}, f"{moved_count}個のシェイプキーを並べ替えました"
+                                  f"（{time.perf_counter() - start:.2f}秒）")
+            return {'FINISHED'}
+
+        except Exception as e:
+            self.report({'ERROR'}, f"エラーが発生しました: {str(e)}")
+            return {'CANCELLED'}
+        finally:
+            # 元のモードに戻す
+            bpy.ops.object.mode_set(mode=original_mode)
@@ -0,0 +1,114 @@
+"""全分割・全統合の実行計画と見積もり（ドライラン）
+
+名前とキャッシュ済みの左右マスクだけを使い、頂点データは読み書きしない。
+NumPyを読み込まずに使えるよう、kernels は読み込み済みの場合だけ参照する。
+"""
+import sys
+
+from .naming import MMD_NAME_PAIRS, plan_split
+
+# Blenderがシェイプキー1つに保持する頂点あたりのバイト数（float32 × 3）
+BYTES_PER_VERTEX = 12
+
+# 処理時間の見積もりに使う既定値（実行するたびに実測値で更新する）
+DEFAULT_SECONDS_PER_VERTEX = 2e-8
+SECONDS_PER_KEY = 2e-4
+
+# 処理の種類ごとの実測スループット {"split" / "merge": 頂点1つ・シェイプキー1つあたりの秒数}
+_throughput = {}
+
+
+def plan_split_all(key_names, existing_names):
+    """名前だけで全シェイプキーの分割計画を作成する
+
+    Returns:
+        (ジョブ [(元の名前, [(作成する名前, 'LEFT'|'RIGHT'), ...])],
+         スキップ [(元の名前, 理由)])
+    """
+    existing_names = set(existing_names)
+    jobs = []
+    skipped = []
+    for key_name in key_names:
+        creates, message = plan_split(key_name, existing_names)
+        if creates:
+            jobs.append((key_name, creates))
+            existing_names.update(name for name, side in creates)
+        else:
+            skipped.append((key_name, message))
+    return jobs, skipped
+
+
+def plan_merge_all(pairs, existing_names):
+    """名前だけで全シェイプキーの統合計画を作成する
+
+    Args:
+        pairs: [(左の名前, 右の名前, 統合後の名前)]
+
+    Returns:
+        [(左の名前, 右の名前, 統合後の名前, 新しく作成するか)]
+        統合後の名前が既にある場合は既存を保持し、左右を削除するだけになる。
+    """
+    existing_names = set(existing_names)
+    plan = []
+    for left_name, right_name, merged_name in pairs:
+        create = merged_name not in existing_names
+        existing_names.discard(left_name)
+        existing_names.discard(right_name)
+        existing_names.add(merged_name)
+        plan.append((left_name, right_name, merged_name, create))
+    return plan
+
+
+def peek_side_counts(obj):
+    """キャッシュ済みの左右マスクから (左の頂点数, 右の頂点数) を返す（未計算なら None）"""
+    kernels = sys.modules.get(__package__ + ".kernels")
+    if kernels is None:
+        return None
+    mask = kernels.peek_side_mask(obj)
+    if mask is None:
+        return None
+    right_count = int(mask.sum())
+    return len(mask) - right_count, right_count
+
+
+def record_throughput(kind, key_count, vertex_count, seconds):
+    """実行にかかった時間から、次回の見積もりに使うスループットを更新する"""
+    work = key_count * vertex_count
+    if work <= 0:
+        return
+    rate = max(seconds - key_count * SECONDS_PER_KEY, 0.0) / work
+    previous = _throughput.get(kind)
+    _throughput[kind] = rate if previous is None else (previous + rate) / 2.0
+
+
+def estimate_seconds(kind, key_count, vertex_count):
+    """シェイプキー key_count 個を処理する時間の見積もり（秒）"""
+    rate = _throughput.get(kind, DEFAULT_SECONDS_PER_VERTEX)
+    return key_count * (SECONDS_PER_KEY + vertex_count * rate)
+
+
+def format_bytes(size):
+    """バイト数を読みやすい単位の文字列にする"""
+    for unit in ("B", "KB", "MB"):
+        if abs(size) < 1024.0:
+            return f"{size:.1f} {unit}"
+        size /= 1024.0
+    return f"{size:.1f} GB"
+
+
+def describe_side_counts(obj):
+    """左右の頂点数の説明文（キャッシュが無い場合はその旨）"""
+    counts = peek_side_counts(obj)
+    if counts is None:
+        return "左右の頂点数: 未計算（一度分割・統合を実行するとキャッシュされます）"
+    left_count, right_count = counts
+    message = f"左右の頂点数: 左 {left_count} / 右 {right_count}（中心は右に含む）"
+    if left_count == 0 or right_count == 0:
+        message += " ※片側に頂点がありません"
+    return message
+
+
+def is_mmd_rename(name, side_names):
+    """左右の名前が name のMMD用の名前（ウィンクなど）への変換かどうか"""
+    pair = MMD_NAME_PAIRS.get(name)
+    return bool(pair) and set(side_names) <= set(pair)
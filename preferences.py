@@ -0,0 +1,28 @@
+"""アドオン設定"""
+import bpy
+from bpy.types import AddonPreferences
+from bpy.props import IntProperty
+
+
+def get_memory_budget():
+    """シェイプキーの一時保存に使えるメモリ量（バイト）"""
+    addon = bpy.context.preferences.addons.get(__package__)
+    budget_mb = addon.preferences.memory_budget_mb if addon else PayuShapeKeyPreferences.DEFAULT_MEMORY_BUDGET_MB
+    return budget_mb * 1024 * 1024
+
+
+class PayuShapeKeyPreferences(AddonPreferences):
+    bl_idname = __package__
+
+    DEFAULT_MEMORY_BUDGET_MB = 1024
+
+    memory_budget_mb: IntProperty(
+        name="メモリ上限 (MB)",
+        description="シェイプキーの一時保存に使うメモリの上限。超える場合は一時ファイルを使用します",
+        default=DEFAULT_MEMORY_BUDGET_MB,
+        min=64,
+    )
+
+    def draw(self, context):
+        layout = self.layout
+        layout.prop(self, "memory_budget_mb")
@@ -0,0 +1,198 @@
+"""シェイプキーの一時保存（メモリ上限を超える場合はディスクへ退避）"""
+import os
+import tempfile
+
+import numpy as np
+
+from .kernels import read_shape_key_coords, write_shape_key_coords
+from .preferences import get_memory_budget
+
+
+class ShapeKeySnapshot:
+    """全シェイプキーの座標と設定を一時保存する
+
+    座標は (キー数, 頂点数, 3) のfloat32配列に保存する。メモリ上限を超える場合は
+    一時ファイルに書き出す（np.memmap）ため、Blenderがメッシュを保持できる限り
+    処理を継続できる。
+    """
+
+    KEY_PROPERTIES = ("slider_max", "slider_min", "value", "mute", "vertex_group", "interpolation")
+
+    def __init__(self, obj, memory_budget=None):
+        key_blocks = obj.data.shape_keys.key_blocks
+        self.store_properties(key_blocks, memory_budget)
+        shape = (len(key_blocks), len(obj.data.vertices), 3)
+        self.allocate(shape)
+
+        # 1キーずつ読み込み、ディスクへの書き出しもキー単位で行う
+        buffer = np.empty(shape[1:], dtype=np.float32)
+        for i, key in enumerate(key_blocks):
+            self.coords[i] = read_shape_key_coords(key, buffer)
+
+    def store_properties(self, key_blocks, memory_budget=None):
+        """シェイプキーの名前・相対キー・設定を保存する"""
+        self.names = [key.name for key in key_blocks]
+        self.relative_names = [key.relative_key.name for key in key_blocks]
+        self.properties = [{attr: getattr(key, attr) for attr in self.KEY_PROPERTIES}
+                           for key in key_blocks]
+        self.memory_budget = get_memory_budget() if memory_budget is None else memory_budget
+        self._path = None
+
+    def allocate(self, shape):
+        """座標の保存先を確保する（メモリ上限を超える場合は一時ファイル）"""
+        if np.prod(shape) * 4 > self.memory_budget:
+            fd, self._path = tempfile.mkstemp(prefix="payu_shape_key_", suffix=".npy")
+            os.close(fd)
+            self.coords = np.lib.format.open_memmap(self._path, mode='w+', dtype=np.float32, shape=shape)
+        else:
+            self.coords = np.empty(shape, dtype=np.float32)
+
+    def restore(self, obj):
+        """保存した座標でシェイプキーを作り直す（頂点数が保存時と同じ場合）"""
+        for i, name in enumerate(self.names):
+            key_block = obj.shape_key_add(name=name, from_mix=False)
+            write_shape_key_coords(key_block, self.coords[i])
+        self.restore_properties(obj)
+
+    def overwrite(self, obj):
+        """保存した座標を既存のシェイプキーに書き込む（シェイプキーの並びと頂点数が保存時と同じ場合）
+
+        Keyデータブロックをそのまま使うため、シェイプキーのアニメーションとドライバーは維持される。
+        """
+        key_blocks = obj.data.shape_keys.key_blocks
+        if [key.name for key in key_blocks] != self.names:
+            raise RuntimeError("保存時からシェイプキーの構成が変わっているため書き込めません")
+        for key_block, coords in zip(key_blocks, self.coords):
+            write_shape_key_coords(key_block, coords)
+        self.restore_properties(obj)
+
+    def restore_properties(self, obj):
+        """作り直したシェイプキーに設定と相対キーを復元する"""
+        key_blocks = obj.data.shape_keys.key_blocks
+        for name, properties in zip(self.names[1:], self.properties[1:]):
+            for attr, value in properties.items():
+                setattr(key_blocks[name], attr, value)
+
+        # 相対キーは全シェイプキーの作成後に名前で復元
+        for name, relative_name in zip(self.names, self.relative_names):
+            if relative_name in key_blocks:
+                key_blocks[name].relative_key = key_blocks[relative_name]
+
+    @property
+    def is_spilled(self):
+        return self._path is not None
+
+    @property
+    def chunk_rows(self):
+        """メモリ上限内で一度に処理する頂点数"""
+        # 読み込み元・変形量・書き込み先の3つ分の作業領域を見込む
+        return max(1024, self.memory_budget // (3 * 3 * 4 * 4))
+
+    def close(self):
+        """一時ファイルを削除する"""
+        if self._path is not None:
+            del self.coords
+            os.remove(self._path)
+            self._path = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def permute_shape_keys(obj, order):
+    """シェイプキーを名前のリスト order（Basisを含む）の並び順にする
+
+    shape_key_move を繰り返す代わりに、並び順が変わる位置のシェイプキーだけ
+    座標・設定・名前を書き換える。置換を巡回ごとにたどるため、作業領域は
+    2キー分だけで済む。F-Curveとドライバーは名前で参照しているため、名前の
+    入れ替えによるBlenderの自動書き換えを元に戻せば、そのまま同じシェイプキーを指す。
+
+    Returns:
+        位置が変わったシェイプキーの数
+    """
+    from .anim_paths import record_key_block_paths, restore_data_paths
+
+    key_blocks = obj.data.shape_keys.key_blocks
+    names = [key.name for key in key_blocks]
+    if len(order) != len(names) or set(order) != set(names) or order[0] != names[0]:
+        raise ValueError("並び順にはBasisを先頭に全てのシェイプキーを1回ずつ指定してください")
+
+    # sources[i]: 並べ替え後に i 番目になるシェイプキーの現在の位置
+    position = {name: i for i, name in enumerate(names)}
+    sources = [position[name] for name in order]
+    moved = [i for i, source in enumerate(sources) if source != i]
+    if not moved:
+        return 0
+
+    active_name = names[obj.active_shape_key_index]
+    relative_names = {key.name: key.relative_key.name for key in key_blocks}
+    properties = {i: {attr: getattr(key_blocks[i], attr) for attr in ShapeKeySnapshot.KEY_PROPERTIES}
+                  for i in moved}
+    records = record_key_block_paths()
+    try:
+        # 名前の重複を避けるため、移動するシェイプキーに一時的な名前を付けておく
+        for i in moved:
+            key_blocks[i].name = f"__payu_sort_{i}"
+
+        saved = read_shape_key_coords(key_blocks[0])
+        buffer = np.empty_like(saved)
+        done = set()
+        for start in moved:
+            if start in done:
+                continue
+            # 巡回の先頭の座標を退避し、移動元から順に詰めていく
+            read_shape_key_coords(key_blocks[start], saved)
+            i = start
+            while True:
+                done.add(i)
+                source = sources[i]
+                key_block = key_blocks[i]
+                if source == start:
+                    write_shape_key_coords(key_block, saved)
+                else:
+                    write_shape_key_coords(key_block, read_shape_key_coords(key_blocks[source], buffer))
+                key_block.name = names[source]
+                # 値が範囲で制限されないよう、スライダーの範囲を広げてから設定する
+                key_block.slider_min, key_block.slider_max = -10.0, 10.0
+                for attr, value in properties[source].items():
+                    setattr(key_block, attr, value)
+                if source == start:
+                    break
+                i = source
+
+        # 相対キーは位置（KeyBlock）で保持されているため、全シェイプキーを名前で設定し直す
+        for key_block in key_blocks:
+            relative_name = relative_names[key_block.name]
+            if key_block.relative_key.name != relative_name:
+                key_block.relative_key = key_blocks[relative_name]
+    finally:
+        restore_data_paths(records)
+
+    obj.active_shape_key_index = order.index(active_name)
+    return len(moved)
+
+
+def mirror_key_coords(out, key_co, basis_co, original_vertex_count, chunk_rows):
+    """ミラー適用後の座標を頂点範囲ごとに計算する
+
+    ``out`` には新しいBasisの座標を渡す。元の頂点はそのまま、ミラーで追加された
+    頂点（元の頂点数だけインデックスがずれる）には左側の変形量をX反転して加える。
+    """
+    n = original_vertex_count
+    mirrored = max(0, min(n, len(out) - n))
+
+    # 左側の頂点データを適用（オリジナルの頂点）
+    for start in range(0, n, chunk_rows):
+        stop = min(start + chunk_rows, n)
+        out[start:stop] = key_co[start:stop]
+
+    # 右側の頂点に左側の変形をミラーリング
+    for start in range(0, mirrored, chunk_rows):
+        stop = min(start + chunk_rows, mirrored)
+        deform = key_co[start:stop] - basis_co[start:stop]
+        deform[:, 0] *= -1.0
+        out[n + start:n + stop] += deform
+    return out
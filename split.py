@@ -0,0 +1,650 @@
+"""左右分割・領域分割・反対側の作成"""
+import time
+
+import bpy
+from bpy.types import Operator
+from bpy.props import StringProperty, BoolProperty, IntProperty
+
+from .base import ShapeKeyToolsBase
+from .naming import get_opposite_side_name
+from .planner import (BYTES_PER_VERTEX, describe_side_counts, estimate_seconds, format_bytes,
+                      is_mmd_rename, plan_split_all, record_throughput)
+
+
+class SeamBlendMixin:
+    """中心線の付近で左右の変形をなめらかに配分する設定"""
+
+    blend_rings: IntProperty(
+        name="中心のぼかし",
+        description="中心線から辺の数でこの範囲まで、左右の変形をなめらかに配分します（0で中心線で切り分け）",
+        default=0,
+        min=0,
+        soft_max=10,
+    )
+
+    def get_right_side(self, obj, basis_co):
+        """右側の頂点のマスク、またはぼかしを指定した場合は右側のウェイトを取得する"""
+        from .kernels import get_side_mask, get_side_weights
+
+        if self.blend_rings:
+            return get_side_weights(obj, basis_co, self.blend_rings)
+        return get_side_mask(obj, basis_co)
+
+
+class MirrorApplyMixin:
+    """ミラー修飾子をシェイプキーを保持したまま適用する機能"""
+
+    def store_original_vertices_count(self, obj):
+        """元の頂点数を保存（ミラー適用前の左側の頂点数）"""
+        return len(obj.data.vertices)
+
+    def store_shape_keys(self, obj):
+        """シェイプキーのデータを一時保存する"""
+        from .snapshot import ShapeKeySnapshot
+
+        if not obj.data.shape_keys:
+            return None
+        return ShapeKeySnapshot(obj)
+
+    def restore_shape_keys_with_mirror(self, obj, shape_keys_data, original_vertex_count):
+        """シェイプキーを復元し、右側にミラーリング"""
+        import numpy as np
+        from .kernels import read_shape_key_coords, write_shape_key_coords
+        from .snapshot import mirror_key_coords
+
+        if not shape_keys_data:
+            return
+
+        snapshot = shape_keys_data
+        basis_co = snapshot.coords[0]
+
+        # 最初のシェイプキー（Basis）を作成
+        basis = obj.shape_key_add(name=snapshot.names[0], from_mix=False)
+        new_basis_co = read_shape_key_coords(basis)
+        buffer = np.empty_like(new_basis_co)
+
+        # 残りのシェイプキーを1つずつ作成
+        for i in range(1, len(snapshot.names)):
+            key_block = obj.shape_key_add(name=snapshot.names[i], from_mix=False)
+
+            # まず全頂点をBasisの位置にリセットしてから、頂点範囲ごとにミラーリング
+            np.copyto(buffer, new_basis_co)
+            mirror_key_coords(buffer, snapshot.coords[i], basis_co,
+                              original_vertex_count, snapshot.chunk_rows)
+            write_shape_key_coords(key_block, buffer)
+
+        # シェイプキーの設定と相対キーを復元
+        snapshot.restore_properties(obj)
+
+    def apply_mirror_with_shape_keys(self, context, obj):
+        """ミラー修飾子を適用する（シェイプキーを保持）"""
+        # 現在の頂点数を保存（ミラー適用前）
+        original_vertex_count = self.store_original_vertices_count(obj)
+
+        # シェイプキーデータを保存（メモリ上限を超える場合はディスクへ）
+        with self.store_shape_keys(obj) as snapshot:
+            # シェイプキーを一時的に削除
+            while obj.data.shape_keys:
+                bpy.ops.object.shape_key_remove(all=True)
+
+            # ミラー修飾子を適用
+            for mod in obj.modifiers:
+                if mod.type == 'MIRROR' and mod.show_viewport:
+                    context.view_layer.objects.active = obj
+                    bpy.ops.object.modifier_apply(modifier=mod.name)
+
+            # シェイプキーを復元（右側にミラーリング）
+            self.restore_shape_keys_with_mirror(obj, snapshot, original_vertex_count)
+
+
+class MESH_OT_split_shape_key(Operator, SeamBlendMixin, MirrorApplyMixin, ShapeKeyToolsBase):
+    bl_idname = "mesh.split_shape_key"
+    bl_label = "シェイプキー左右分割"
+    bl_description = "選択したシェイプキーを左右に分割します"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def split_shape_key(self, obj, active_key, basis_key):
+        """シェイプキーを左右に分割する（分割したシェイプキーは元と同じ相対キーにする）"""
+        from .kernels import split_key_coords, write_shape_key_coords
+        from .keystack import ShapeKeyStack
+
+        # 基準となるシェイプキー名を取得
+        base_name = active_key.name.replace("左", "").replace("右", "")
+
+        with ShapeKeyStack(obj, [active_key.name]) as stack:
+            key_co = stack.key_coords(active_key.name)
+            relative_co = stack.relative_coords(active_key.name)
+            relative_key = active_key.relative_key
+
+            # 左右のシェイプキーを作成
+            left_key = obj.shape_key_add(name=f"{base_name}左", from_mix=False)
+            right_key = obj.shape_key_add(name=f"{base_name}右", from_mix=False)
+
+            # X座標を基準に左右を判定して、それぞれの反対側を相対キーに戻す（ぼかし指定時は中心付近で配分）
+            right_side = self.get_right_side(obj, stack.basis_co)
+            write_shape_key_coords(left_key, split_key_coords(key_co, relative_co, right_side, 'LEFT'))
+            write_shape_key_coords(right_key, split_key_coords(key_co, relative_co, right_side, 'RIGHT'))
+
+        # 新規シェイプキーの値を0に設定
+        for new_key in (left_key, right_key):
+            new_key.relative_key = relative_key
+            new_key.value = 0.0
+        
+        return len(obj.data.shape_keys.key_blocks) - 2
+
+    def execute(self, context):
+        obj = context.active_object
+        
+        # オブジェクトの妥当性チェック
+        valid, message = self.validate_object(obj)
+        if not valid:
+            self.report({'ERROR'}, message)
+            return {'CANCELLED'}
+        
+        # 現在のモードを保存
+        original_mode = obj.mode
+        bpy.ops.object.mode_set(mode='OBJECT')
+        
+        try:
+            # 最初にミラー修飾子を適用
+            for mod in obj.modifiers:
+                if mod.type == 'MIRROR' and mod.show_viewport:
+                    self.report({'WARNING'}, "ミラー修飾子を適用します...")
+                    self.apply_mirror_with_shape_keys(context, obj)
+                    self.report({'INFO'}, "ミラー修飾子を適用しました")
+                    break
+            
+            # シェイプキーを取得
+            active_key = obj.active_shape_key
+            if not active_key:
+                self.report({'ERROR'}, "シェイプキーを選択してください")
+                return {'CANCELLED'}
+            
+            basis_key = obj.data.shape_keys.reference_key
+            if active_key == basis_key:
+                self.report({'ERROR'}, "Basisシェイプキーは分割できません")
+                return {'CANCELLED'}
+            
+            # シェイプキーの分割を実行
+            new_index = self.split_shape_key(obj, active_key, basis_key)
+            
+            # 新しく作成した左のシェイプキーを選択状態にする
+            obj.active_shape_key_index = new_index
+            
+            self.report({'INFO'}, "シェイプキーを左右に分割しました")
+            return {'FINISHED'}
+            
+        except Exception as e:
+            self.report({'ERROR'}, f"エラーが発生しました: {str(e)}")
+            return {'CANCELLED'}
+        finally:
+            # 元のモードに戻す
+            bpy.ops.object.mode_set(mode=original_mode)
+
+
+class MESH_OT_split_all_shape_keys(Operator, SeamBlendMixin, MirrorApplyMixin, ShapeKeyToolsBase):
+    bl_idname = "mesh.split_all_shape_keys"
+    bl_label = "全シェイプキー左右分割"
+    bl_description = "Basis以外の全てのシェイプキーを左右に分割します"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    dry_run: BoolProperty(
+        name="ドライラン",
+        description="シェイプキーを変更せず、作成・スキップされるシェイプキーと必要なメモリ・時間の見積もりだけを表示します",
+        default=False,
+    )
+    transfer_animation: BoolProperty(
+        name="アニメーションを引き継ぐ",
+        description="分割元のシェイプキーのF-Curveを、作成した左右のシェイプキーに複製します",
+        default=False,
+    )
+
+    def report_dry_run(self, obj):
+        """名前とキャッシュ済みの左右マスクだけで分割計画を報告する（データは変更しない）"""
+        key_blocks = obj.data.shape_keys.key_blocks
+        basis = obj.data.shape_keys.reference_key
+        jobs, skipped = plan_split_all([key.name for key in key_blocks if key != basis],
+                                       key_blocks.keys())
+
+        vertex_count = len(obj.data.vertices)
+        lines = []
+        has_mirror = any(mod.type == 'MIRROR' and mod.show_viewport for mod in obj.modifiers)
+        if has_mirror:
+            # ミラー適用後の頂点数は中心の頂点の結合で減るため、2倍は上限の見積もり
+            lines.append(f"ミラー修飾子を適用します（頂点数 {vertex_count} → 最大 {vertex_count * 2}）")
+            vertex_count *= 2
+        else:
+            lines.append(describe_side_counts(obj))
+
+        created_count = 0
+        for key_name, creates in jobs:
+            names = [name for name, side in creates]
+            created_count += len(names)
+            if is_mmd_rename(key_name, names):
+                lines.append(f"作成（MMD名に変換）: {key_name} → {' / '.join(names)}")
+            else:
+                lines.append(f"作成: {key_name} → {' / '.join(names)}")
+        for key_name, message in skipped:
+            lines.append(f"スキップ: {key_name}（{message}）")
+
+        key_memory = created_count * vertex_count * BYTES_PER_VERTEX
+        seconds = estimate_seconds("split", created_count, vertex_count)
+        if has_mirror:
+            seconds += estimate_seconds("split", len(key_blocks), vertex_count)
+        lines.append(f"追加メモリ: 約 {format_bytes(key_memory)} / 推定時間: 約 {seconds:.2f} 秒")
+
+        print(f"[ドライラン] {obj.name} の全シェイプキー左右分割")
+        for line in lines:
+            print("  " + line)
+        self.report({'INFO'}, f"ドライラン: {len(jobs)}個を分割、{len(skipped)}個をスキップ"
+                              f"（約 {format_bytes(key_memory)}、約 {seconds:.2f} 秒）。詳細はコンソールを参照")
+        return {'FINISHED'}
+
+    def split_all(self, context, obj, shape_keys):
+        """計画に従って全シェイプキーを分割する
+
+        分割元のシェイプキーと相対キーは最初に1回だけ読み込み、配列計算はスレッドプールで
+        先行させ、シェイプキーの作成と書き込みだけをメインスレッドで行う。
+        分割したシェイプキーは分割元と同じ相対キーにする。
+
+        Returns:
+            (成功数, スキップ数, メッセージのリスト, 作成した [(元の名前, [作成した名前, ...])])
+        """
+        from .kernels import pipelined, split_key_coords, write_shape_key_coords
+        from .keystack import ShapeKeyStack
+
+        success_count = 0
+        skipped_count = 0
+        messages = []
+        created = []
+
+        # 名前だけで分割計画を作成
+        jobs, skipped = plan_split_all([key.name for key in shape_keys],
+                                       obj.data.shape_keys.key_blocks.keys())
+        for key_name, message in skipped:
+            if "既に" in message:
+                skipped_count += 1
+            if message not in messages:  # 重複するメッセージを避ける
+                messages.append(message)
+
+        key_blocks = obj.data.shape_keys.key_blocks
+
+        def read(job):
+            return stack.key_coords(job[0]), stack.relative_coords(job[0])
+
+        def compute(job, data):
+            key_co, relative_co = data
+            return [split_key_coords(key_co, relative_co, right_side, side) for name, side in job[1]]
+
+        # プログレスバーを初期化
+        self.setup_progress(context, len(jobs))
+
+        with ShapeKeyStack(obj, [key_name for key_name, creates in jobs]) as stack:
+            right_side = self.get_right_side(obj, stack.basis_co)
+            for i, ((key_name, creates), future) in enumerate(pipelined(jobs, read, compute)):
+                try:
+                    relative_key = key_blocks[stack.relative_name(key_name)]
+                    for (name, side), coords in zip(creates, future.result()):
+                        new_key = obj.shape_key_add(name=name, from_mix=False)
+                        write_shape_key_coords(new_key, coords)
+                        new_key.relative_key = relative_key
+                        new_key.value = 0.0
+                    success_count += 1
+                    created.append((key_name, [name for name, side in creates]))
+                except Exception as e:
+                    print(f"Error processing shape key {key_name}: {str(e)}")
+                    messages.append(f"{key_name} の処理中にエラーが発生しました")
+
+                self.update_progress(context, i + 1)
+
+        return success_count, skipped_count, messages, created
+
+    def execute(self, context):
+        obj = context.active_object
+        
+        # オブジェクトの妥当性チェック
+        valid, message = self.validate_object(obj)
+        if not valid:
+            self.report({'ERROR'}, message)
+            return {'CANCELLED'}
+
+        if self.dry_run:
+            return self.report_dry_run(obj)
+
+        # 現在のモードを保存
+        original_mode = obj.mode
+        bpy.ops.object.mode_set(mode='OBJECT')
+
+        try:
+            # 最初にミラー修飾子を適用
+            for mod in obj.modifiers:
+                if mod.type == 'MIRROR' and mod.show_viewport:
+                    self.report({'WARNING'}, "ミラー修飾子を適用します...")
+                    self.apply_mirror_with_shape_keys(context, obj)
+                    self.report({'INFO'}, "ミラー修飾子を適用しました")
+                    break
+
+            # 処理可能なシェイプキーを取得
+            basis_key = obj.data.shape_keys.reference_key
+            shape_keys = [key for key in obj.data.shape_keys.key_blocks if key != basis_key]
+            
+            if not shape_keys:
+                self.report({'WARNING'}, "処理可能なシェイプキーが見つかりません")
+                return {'CANCELLED'}
+
+            start = time.perf_counter()
+            success_count, skipped_count, messages, created = self.split_all(context, obj, shape_keys)
+            record_throughput("split", success_count * 2, len(obj.data.vertices),
+                              time.perf_counter() - start)
+
+            transferred_count = 0
+            if self.transfer_animation and created:
+                from .fcurves import split_key_animation
+                transferred_count = split_key_animation(obj.data.shape_keys, created)
+
+            # 結果を報告
+            if success_count > 0:
+                message = f"{success_count}個のシェイプキーを分割しました"
+                if skipped_count > 0:
+                    message += f" ({skipped_count}個をスキップ)"
+                if transferred_count > 0:
+                    message += f"、F-Curve {transferred_count}個を引き継ぎ"
+                self.report({'INFO'}, message)
+                # 詳細なメッセージをコンソールに出力
+                for msg in messages:
+                    print(msg)
+                return {'FINISHED'}
+            else:
+                if skipped_count > 0:
+                    self.report({'INFO'}, f"全ての{skipped_count}個のシェイプキーが既に処理済みです")
+                else:
+                    self.report({'WARNING'}, "分割可能なシェイプキーが見つかりませんでした")
+                return {'CANCELLED'}
+
+        except Exception as e:
+            self.report({'ERROR'}, f"エラーが発生しました: {str(e)}")
+            return {'CANCELLED'}
+        finally:
+            # プログレスバーを終了
+            self.end_progress(context)
+            # 元のモードに戻す
+            bpy.ops.object.mode_set(mode=original_mode)
+
+
+class MESH_OT_split_shape_key_regions(Operator, ShapeKeyToolsBase):
+    bl_idname = "mesh.split_shape_key_regions"
+    bl_label = "シェイプキー領域分割"
+    bl_description = "頂点グループのウェイトを使って、シェイプキーを複数の領域に分割します"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    groups: StringProperty(
+        name="頂点グループ",
+        description="分割に使う頂点グループ名をカンマ区切りで指定",
+        default="",
+    )
+    name_format: StringProperty(
+        name="名前の形式",
+        description="作成するシェイプキー名（{key}は元の名前、{group}は頂点グループ名）",
+        default="{key}_{group}",
+    )
+    use_falloff: BoolProperty(
+        name="ウェイトでぼかす",
+        description="ウェイトをそのまま使い、領域の境界をぼかします（オフの場合はウェイト>0で二値化）",
+        default=True,
+    )
+    normalize: BoolProperty(
+        name="ウェイトを正規化",
+        description="重なった領域のウェイトの合計が1を超えないように正規化します",
+        default=True,
+    )
+    include_remainder: BoolProperty(
+        name="残りの領域も作成",
+        description="どの頂点グループにも含まれない変形を別のシェイプキーとして作成します",
+        default=False,
+    )
+    all_keys: BoolProperty(
+        name="全シェイプキー",
+        description="Basis以外の全てのシェイプキーを分割します",
+        default=False,
+    )
+
+    REMAINDER_NAME = "その他"
+
+    def get_region_weights(self, obj):
+        """領域ごとのウェイト行列と領域名のリストを取得"""
+        import numpy as np
+        from .kernels import get_weight_matrix
+
+        group_names = [name.strip() for name in self.groups.split(",") if name.strip()]
+        if not group_names:
+            return None, []
+        weights = get_weight_matrix(obj, group_names)
+
+        if not self.use_falloff:
+            weights = (weights > 0.0).astype(np.float32)
+
+        if self.normalize:
+            total = weights.sum(axis=1, keepdims=True)
+            np.divide(weights, total, out=weights, where=total > 1.0)
+
+        if self.include_remainder:
+            remainder = np.clip(1.0 - weights.sum(axis=1, keepdims=True), 0.0, 1.0)
+            weights = np.hstack([weights, remainder])
+            group_names.append(self.REMAINDER_NAME)
+
+        return weights, group_names
+
+    def split_regions(self, obj, stack, source_name, weights, region_names):
+        """1つのシェイプキーを全領域分まとめて計算し、書き込む（領域キーは元と同じ相対キーにする）"""
+        from .kernels import write_shape_key_coords
+
+        relative_co = stack.relative_coords(source_name)
+        delta = stack.key_coords(source_name) - relative_co
+        # (領域数, 頂点数, 3) を1回のブロードキャストで計算
+        regions = relative_co[None] + weights.T[:, :, None] * delta[None]
+
+        key_blocks = obj.data.shape_keys.key_blocks
+        relative_key = key_blocks[stack.relative_name(source_name)]
+        for region_co, group_name in zip(regions, region_names):
+            name = self.name_format.format(key=source_name, group=group_name)
+            region_key = key_blocks.get(name)
+            if region_key is None:
+                region_key = obj.shape_key_add(name=name, from_mix=False)
+                region_key.value = 0.0
+            write_shape_key_coords(region_key, region_co)
+            region_key.relative_key = relative_key
+
+    def invoke(self, context, event):
+        return context.window_manager.invoke_props_dialog(self)
+
+    def execute(self, context):
+        from .keystack import ShapeKeyStack
+
+        obj = context.active_object
+
+        # オブジェクトの妥当性チェック
+        valid, message = self.validate_object(obj)
+        if not valid:
+            self.report({'ERROR'}, message)
+            return {'CANCELLED'}
+
+        if self.all_keys:
+            shape_keys = self.get_processable_shape_keys(obj)
+        else:
+            active_key = obj.active_shape_key
+            if not active_key or active_key == obj.data.shape_keys.reference_key:
+                self.report({'ERROR'}, "Basis以外のシェイプキーを選択してください")
+                return {'CANCELLED'}
+            shape_keys = [active_key]
+
+        if not shape_keys:
+            self.report({'WARNING'}, "処理可能なシェイプキーが見つかりません")
+            return {'CANCELLED'}
+
+        # 現在のモードを保存
+        original_mode = obj.mode
+        bpy.ops.object.mode_set(mode='OBJECT')
+
+        try:
+            weights, region_names = self.get_region_weights(obj)
+            if not region_names:
+                self.report({'ERROR'}, "頂点グループを指定してください")
+                return {'CANCELLED'}
+
+            # 以前に作成した領域キーは分割対象から除外
+            source_names = [key.name for key in shape_keys]
+            generated = {self.name_format.format(key=name, group=group_name)
+                         for name in source_names for group_name in region_names}
+            source_names = [name for name in source_names if name not in generated]
+
+            # プログレスバーを初期化
+            self.setup_progress(context, len(source_names))
+
+            # 分割元と相対キーは書き込みを始める前にまとめて読み込む
+            with ShapeKeyStack(obj, source_names) as stack:
+                for i, name in enumerate(source_names):
+                    self.split_regions(obj, stack, name, weights, region_names)
+                    self.update_progress(context, i + 1)
+
+            obj.data.update()
+            self.report({'INFO'}, f"{len(source_names)}個のシェイプキーを{len(region_names)}領域に分割しました")
+            return {'FINISHED'}
+
+        except KeyError as e:
+            self.report({'ERROR'}, str(e.args[0]))
+            return {'CANCELLED'}
+        except Exception as e:
+            self.report({'ERROR'}, f"エラーが発生しました: {str(e)}")
+            return {'CANCELLED'}
+        finally:
+            # プログレスバーを終了
+            self.end_progress(context)
+            # 元のモードに戻す
+            bpy.ops.object.mode_set(mode=original_mode)
+
+
+class MESH_OT_generate_opposite_shape_key(Operator, ShapeKeyToolsBase):
+    bl_idname = "mesh.generate_opposite_shape_key"
+    bl_label = "反対側のシェイプキーを作成"
+    bl_description = "片側のシェイプキー（〇〇左 / 〇〇右）から反対側のシェイプキーをミラーで作成します"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    all_keys: BoolProperty(
+        name="全シェイプキー",
+        description="反対側が存在しない全ての片側シェイプキーについて作成します",
+        default=False,
+    )
+    overwrite: BoolProperty(
+        name="上書き",
+        description="反対側のシェイプキーが既に存在する場合は上書きします",
+        default=False,
+    )
+
+    def plan(self, obj, shape_keys):
+        """作成する (元の名前, 反対側の名前, 元の側) のリストを名前だけで決定"""
+        existing_names = set(obj.data.shape_keys.key_blocks.keys())
+        sources = {key.name for key in shape_keys}
+        jobs = []
+        for key in shape_keys:
+            opposite_name, side = get_opposite_side_name(key.name)
+            if opposite_name is None:
+                continue
+            if opposite_name in existing_names and not self.overwrite:
+                continue
+            # 両側とも対象の場合は左から右だけを作成
+            if opposite_name in sources and side == 'RIGHT' and self.overwrite:
+                continue
+            jobs.append((key.name, opposite_name, side))
+        return jobs
+
+    def execute(self, context):
+        import numpy as np
+        from .kernels import SIDE_THRESHOLD, get_mirror_map, mirror_delta, pipelined, write_shape_key_coords
+        from .keystack import ShapeKeyStack
+
+        obj = context.active_object
+
+        # オブジェクトの妥当性チェック
+        valid, message = self.validate_object(obj)
+        if not valid:
+            self.report({'ERROR'}, message)
+            return {'CANCELLED'}
+
+        if self.all_keys:
+            shape_keys = self.get_processable_shape_keys(obj)
+        else:
+            active_key = obj.active_shape_key
+            if not active_key or active_key == obj.data.shape_keys.reference_key:
+                self.report({'ERROR'}, "Basis以外のシェイプキーを選択してください")
+                return {'CANCELLED'}
+            if get_opposite_side_name(active_key.name)[0] is None:
+                self.report({'ERROR'}, "「左」「右」で終わるシェイプキーを選択してください")
+                return {'CANCELLED'}
+            shape_keys = [active_key]
+
+        jobs = self.plan(obj, shape_keys)
+        if not jobs:
+            self.report({'WARNING'}, "作成する反対側のシェイプキーがありません")
+            return {'CANCELLED'}
+
+        # 現在のモードを保存
+        original_mode = obj.mode
+        bpy.ops.object.mode_set(mode='OBJECT')
+
+        try:
+            key_blocks = obj.data.shape_keys.key_blocks
+
+            # 分割元と相対キーは書き込みを始める前にまとめて読み込み、相対キーとの差をミラーする
+            with ShapeKeyStack(obj, [job[0] for job in jobs]) as stack:
+                basis_co = stack.basis_co
+                mirror_map = get_mirror_map(obj, basis_co)
+                # 中央の頂点は両側に含める
+                left_side = basis_co[:, 0] < SIDE_THRESHOLD
+                right_side = basis_co[:, 0] > -SIDE_THRESHOLD
+
+                def read(job):
+                    return stack.key_coords(job[0]), stack.relative_coords(job[0])
+
+                def compute(job, coords):
+                    key_co, relative_co = coords
+                    delta = key_co - relative_co
+                    # 分割と同じく「〜左」は X ≥ 0、「〜右」は X < 0 の変形を持つ
+                    delta[~(right_side if job[2] == 'LEFT' else left_side)] = 0.0
+                    return relative_co + mirror_delta(delta, mirror_map)
+
+                # プログレスバーを初期化
+                self.setup_progress(context, len(jobs))
+
+                created = []
+                for i, ((source_name, opposite_name, side), future) in enumerate(pipelined(jobs, read, compute)):
+                    opposite_key = key_blocks.get(opposite_name)
+                    if opposite_key is None:
+                        opposite_key = obj.shape_key_add(name=opposite_name, from_mix=False)
+                        opposite_key.value = 0.0
+                    write_shape_key_coords(opposite_key, future.result())
+                    # 反対側のシェイプキーは元と同じ相対キーにする
+                    opposite_key.relative_key = key_blocks[stack.relative_name(source_name)]
+                    created.append(opposite_name)
+                    self.update_progress(context, i + 1)
+
+            obj.data.update()
+            if not self.all_keys:
+                obj.active_shape_key_index = list(key_blocks).index(key_blocks[created[0]])
+
+            message = f"{len(created)}個の反対側のシェイプキーを作成しました"
+            unmatched = int(np.count_nonzero(mirror_map < 0))
+            if unmatched:
+                message += f"（ミラー位置に頂点が無い{unmatched}個の頂点は変形しません）"
+                self.report({'WARNING'}, message)
+            else:
+                self.report({'INFO'}, message)
+            return {'FINISHED'}
+
+        except Exception as e:
+            self.report({'ERROR'}, f"エラーが発生しました: {str(e)}")
+            return {'CANCELLED'}
+        finally:
+            # プログレスバーを終了
+            self.end_progress(context)
+            # 元のモードに戻す
+            bpy.ops.object.mode_set(mode=original_mode)
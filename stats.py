@@ -0,0 +1,116 @@
+"""シェイプキーごとの変形量の統計"""
+import hashlib
+
+import numpy as np
+
+from .kernels import DISPLACEMENT_EPSILON, get_side_mask
+from .keystack import ShapeKeyStack
+from .preferences import get_memory_budget
+
+
+def compute_delta_stats(deltas, basis_co, right_mask):
+    """(キー数, 頂点数, 3) の変形量からシェイプキーごとの統計をまとめて計算する"""
+    lengths = np.linalg.norm(deltas, axis=2)
+    moved = lengths > DISPLACEMENT_EPSILON
+    affected = np.count_nonzero(moved, axis=1)
+
+    # 分割と同じく X ≥ 0（right_mask）を左、X < 0 を右とする
+    left_sum = lengths[:, right_mask].sum(axis=1)
+    right_sum = lengths[:, ~right_mask].sum(axis=1)
+    total = left_sum + right_sum
+
+    # 変形した頂点のBasis上の範囲
+    inf = np.float32(np.inf)
+    bounds_min = np.where(moved[:, :, None], basis_co[None], inf).min(axis=1)
+    bounds_max = np.where(moved[:, :, None], basis_co[None], -inf).max(axis=1)
+    bounds_min[affected == 0] = 0.0
+    bounds_max[affected == 0] = 0.0
+
+    return {
+        'affected': affected,
+        'max_displacement': lengths.max(axis=1, initial=0.0),
+        'mean_displacement': lengths.sum(axis=1) / np.maximum(affected, 1),
+        'balance': np.divide(left_sum - right_sum, total, out=np.zeros_like(total), where=total > 0),
+        'bounds_min': bounds_min,
+        'bounds_max': bounds_max,
+    }
+
+
+STATS_FIELDS = ('affected', 'max_displacement', 'mean_displacement', 'balance', 'bounds_min', 'bounds_max')
+
+
+def scan_shape_key_stats(obj):
+    """全シェイプキーの統計を計算し、メッシュの統計キャッシュを更新する
+
+    全シェイプキーを ShapeKeyStack に1回だけ読み込み、変形量は相対キーとの差で計算する。
+    統計は内容（シェイプキーと相対キーの座標）のハッシュごとにキャッシュし、
+    変更のあったシェイプキーだけをメモリ上限内のまとまりで一括計算する。
+
+    Returns:
+        再計算したシェイプキーの数
+    """
+    mesh = obj.data
+
+    # キャッシュ済みの統計はPythonの値として取り出しておく（コレクションは後で作り直す）
+    cached = {item.name: (item.content_hash, {
+        'affected': item.affected,
+        'max_displacement': item.max_displacement,
+        'mean_displacement': item.mean_displacement,
+        'balance': item.balance,
+        'bounds_min': tuple(item.bounds_min),
+        'bounds_max': tuple(item.bounds_max),
+    }) for item in mesh.payu_shape_key_stats}
+
+    rows = []
+    pending = []
+    updated = 0
+
+    with ShapeKeyStack(obj) as stack:
+        basis_co = np.array(stack.basis_co)
+        right_mask = get_side_mask(obj, basis_co)
+        batch_size = max(1, get_memory_budget() // max(1, basis_co.nbytes * 4))
+        basis_digest = hashlib.blake2b(basis_co.tobytes(), digest_size=16).digest()
+        digests = [hashlib.blake2b(stack.coords[row].tobytes(), digest_size=16).digest()
+                   for row in range(len(stack.coords))]
+
+        def flush():
+            stats = compute_delta_stats(stack.relative_deltas([name for _, name in pending]), basis_co, right_mask)
+            for j, (row_index, _) in enumerate(pending):
+                rows[row_index][2].update({
+                    'affected': int(stats['affected'][j]),
+                    'max_displacement': float(stats['max_displacement'][j]),
+                    'mean_displacement': float(stats['mean_displacement'][j]),
+                    'balance': float(stats['balance'][j]),
+                    'bounds_min': tuple(stats['bounds_min'][j].tolist()),
+                    'bounds_max': tuple(stats['bounds_max'][j].tolist()),
+                })
+            pending.clear()
+
+        for i, name in enumerate(stack.names):
+            if i == 0:
+                continue
+            relative = stack.relative[i]
+            content_hash = hashlib.blake2b(digests[i] + digests[relative], digest_size=16,
+                                           key=basis_digest).hexdigest()
+            cached_hash, cached_stats = cached.get(name, (None, None))
+            if cached_hash == content_hash:
+                rows.append((name, content_hash, cached_stats))
+                continue
+
+            # 変更のあったシェイプキーはまとめて一括計算
+            rows.append((name, content_hash, {}))
+            pending.append((len(rows) - 1, name))
+            updated += 1
+            if len(pending) >= batch_size:
+                flush()
+        if pending:
+            flush()
+    mesh.payu_shape_key_stats.clear()
+    for name, content_hash, stats in rows:
+        item = mesh.payu_shape_key_stats.add()
+        item.name = name
+        item.content_hash = content_hash
+        for field in STATS_FIELDS:
+            setattr(item, field, stats[field])
+
+    return updated
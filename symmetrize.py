@@ -0,0 +1,126 @@
+"""シェイプキーの左右対称化"""
+import bpy
+from bpy.types import Operator
+from bpy.props import BoolProperty, EnumProperty, FloatProperty
+
+from .base import ShapeKeyToolsBase
+from .naming import get_opposite_side_name
+
+
+class MESH_OT_symmetrize_shape_key(Operator, ShapeKeyToolsBase):
+    bl_idname = "mesh.symmetrize_shape_key"
+    bl_label = "シェイプキー対称化"
+    bl_description = "シェイプキーの変形を左右対称にします（片側をコピー、または左右を平均）"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    mode: EnumProperty(
+        name="方向",
+        items=[
+            ('LEFT_TO_RIGHT', "左 → 右", "左側（X ≥ 0、分割した「〜左」と同じ側）の変形を右側にコピーします"),
+            ('RIGHT_TO_LEFT', "右 → 左", "右側（X < 0、分割した「〜右」と同じ側）の変形を左側にコピーします"),
+            ('AVERAGE', "平均", "左右の変形を平均します"),
+        ],
+        default='LEFT_TO_RIGHT',
+    )
+    all_keys: BoolProperty(
+        name="全シェイプキー",
+        description="Basis以外の全てのシェイプキーを対称化します（〇〇左 / 〇〇右などの片側のシェイプキーは除く）",
+        default=False,
+    )
+    tolerance: FloatProperty(
+        name="許容誤差",
+        description="ミラー位置の頂点とみなす距離",
+        default=0.001,  # kernels.SIDE_THRESHOLD と同じ値
+        min=1e-6,
+        precision=4,
+    )
+    select_unmatched: BoolProperty(
+        name="対応の無い頂点を選択",
+        description="ミラー位置に頂点が無い頂点を選択状態にします（編集モードで確認できます）",
+        default=False,
+    )
+
+    def get_target_keys(self, obj):
+        """対称化するシェイプキーと、スキップした片側のシェイプキーの数を返す"""
+        if not self.all_keys:
+            active_key = obj.active_shape_key
+            if not active_key or active_key == obj.data.shape_keys.reference_key:
+                return [], 0
+            return [active_key], 0
+
+        shape_keys = self.get_processable_shape_keys(obj)
+        targets = [key for key in shape_keys if get_opposite_side_name(key.name)[0] is None]
+        return targets, len(shape_keys) - len(targets)
+
+    def execute(self, context):
+        import numpy as np
+        from .kernels import (get_mirror_map, get_symmetrize_plan, pipelined,
+                              read_shape_key_coords, symmetrize_delta, write_shape_key_coords)
+
+        obj = context.active_object
+
+        # オブジェクトの妥当性チェック
+        valid, message = self.validate_object(obj)
+        if not valid:
+            self.report({'ERROR'}, message)
+            return {'CANCELLED'}
+
+        shape_keys, skipped_count = self.get_target_keys(obj)
+        if not shape_keys:
+            if self.all_keys:
+                self.report({'WARNING'}, "対称化できるシェイプキーが見つかりません")
+            else:
+                self.report({'ERROR'}, "Basis以外のシェイプキーを選択してください")
+            return {'CANCELLED'}
+
+        # 現在のモードを保存
+        original_mode = obj.mode
+        bpy.ops.object.mode_set(mode='OBJECT')
+
+        try:
+            key_blocks = obj.data.shape_keys.key_blocks
+            basis_co = read_shape_key_coords(obj.data.shape_keys.reference_key)
+            mirror_map = get_mirror_map(obj, basis_co, self.tolerance)
+            plan = get_symmetrize_plan(mirror_map, basis_co, self.mode)
+            jobs = [key.name for key in shape_keys]
+
+            def read(name):
+                return read_shape_key_coords(key_blocks[name])
+
+            def compute(name, key_co):
+                delta = symmetrize_delta(key_co - basis_co, plan)
+                return basis_co + delta
+
+            # プログレスバーを初期化
+            self.setup_progress(context, len(jobs))
+
+            for i, (name, future) in enumerate(pipelined(jobs, read, compute)):
+                write_shape_key_coords(key_blocks[name], future.result())
+                self.update_progress(context, i + 1)
+
+            obj.data.update()
+
+            unmatched = mirror_map < 0
+            if self.select_unmatched:
+                obj.data.vertices.foreach_set("select", unmatched)
+
+            message = f"{len(jobs)}個のシェイプキーを対称化しました"
+            if skipped_count:
+                message += f"（片側のシェイプキー{skipped_count}個をスキップ）"
+            unmatched_count = int(np.count_nonzero(unmatched))
+            if unmatched_count:
+                message += (f" ミラー位置（許容誤差 {self.tolerance:g}）に頂点が無い"
+                            f"{unmatched_count}個の頂点は変更していません")
+                self.report({'WARNING'}, message)
+            else:
+                self.report({'INFO'}, message)
+            return {'FINISHED'}
+
+        except Exception as e:
+            self.report({'ERROR'}, f"エラーが発生しました: {str(e)}")
+            return {'CANCELLED'}
+        finally:
+            # プログレスバーを終了
+            self.end_progress(context)
+            # 元のモードに戻す
+            bpy.ops.object.mode_set(mode=original_mode)
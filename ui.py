@@ -0,0 +1,79 @@
+"""メインパネルとシェイプキーメニュー"""
+from bpy.types import Panel
+
+
+class MESH_PT_shape_key_tools_main(Panel):
+    bl_label = "Payu Shape Key"
+    bl_space_type = 'PROPERTIES'
+    bl_region_type = 'WINDOW'
+    bl_context = "data"
+    bl_order = 9  # シェイプキーパネル（10）の直前に配置
+
+    @classmethod
+    def poll(cls, context):
+        obj = context.object
+        return obj and obj.type == 'MESH'
+
+    def draw_header(self, context):
+        layout = self.layout
+        layout.label(icon='SOLO_ON')  # 星アイコン
+
+    def draw(self, context):
+        layout = self.layout
+        layout.use_property_split = True
+        layout.use_property_decorate = False
+        
+        obj = context.object
+
+        if not obj.data.shape_keys:
+            # シェイプキーがない場合は作成ボタンを表示
+            row = layout.row()
+            row.operator("object.shape_key_add", icon='ADD', text="Add Shape Key")
+            return
+
+        # ドライバーツール（独立したグループ）
+        col = layout.column(align=False)  # align=False で要素間に適度な間隔を確保
+        
+        row = col.row(align=True)
+        split = row.split(factor=0.85, align=True)
+        split.operator("mesh.add_shape_key_drivers", text="ドライバーを追加", icon='DRIVER')
+        split.operator("mesh.remove_shape_key_drivers", text="", icon='X')
+        
+        # 分割線を追加してグループを明確に分ける
+        col.separator(factor=0.5)
+        
+        # 分割/統合ツール（独立したグループ）
+        row = col.row(align=True)
+        split = row.split(factor=0.5, align=True)
+        split.operator("mesh.split_shape_key", text="Split", icon='MOD_MIRROR')
+        split.operator("mesh.merge_shape_key", text="Merge", icon='AUTOMERGE_ON')
+        row = col.row(align=True)
+        split = row.split(factor=0.5, align=True)
+        split.operator("mesh.generate_opposite_shape_key", text="反対側を作成", icon='ARROW_LEFTRIGHT')
+        split.operator("mesh.symmetrize_shape_key", text="対称化", icon='MOD_MIRROR')
+        
+
+
+def shape_key_specials_menu(self, context):
+    layout = self.layout
+    layout.separator()
+    layout.operator("mesh.split_all_shape_keys", text="全シェイプキーを左右分割", icon='MOD_MIRROR')
+    layout.operator("mesh.split_shape_key_regions", text="頂点グループで領域分割", icon='GROUP_VERTEX')
+    layout.operator("mesh.generate_opposite_shape_key", text="全シェイプキーの反対側を作成", icon='MOD_MIRROR').all_keys = True
+    layout.operator("mesh.symmetrize_shape_key", text="全シェイプキーを対称化", icon='MOD_MIRROR').all_keys = True
+    layout.operator("mesh.merge_all_shape_keys", text="全シェイプキーを左右統合")
+    layout.operator("mesh.compose_shape_keys", text="シェイプキーを合成", icon='SHAPEKEY_DATA')
+    layout.operator("mesh.remove_duplicate_shape_keys", text="重複シェイプキーを統合", icon='DUPLICATE')
+    layout.operator("mesh.sort_shape_keys", text="シェイプキーを並べ替え", icon='SORTSIZE')
+    layout.operator("mesh.apply_modifiers_keep_shape_keys", text="修飾子を適用（シェイプキーを保持）", icon='MODIFIER')
+    layout.operator("mesh.capture_pose_shape_keys", text="ポーズからシェイプキーを作成", icon='ARMATURE_DATA')
+    layout.operator("mesh.diff_shape_keys", text="シェイプキーの差分", icon='ZOOM_ALL')
+    layout.separator()  # 区切り線を追加
+    layout.operator("mesh.split_all_shape_keys", text="左右分割の計画を表示", icon='INFO').dry_run = True
+    layout.operator("mesh.merge_all_shape_keys", text="左右統合の計画を表示", icon='INFO').dry_run = True
+    layout.separator()  # 区切り線を追加
+    layout.operator("mesh.rename_shape_keys_for_mmd", text="シェイプキー名をMMD用に変更", icon='SORTALPHA')
+    layout.operator("mesh.export_shape_key_morphs", text="頂点モーフを書き出し", icon='EXPORT')
+    layout.separator()  # 区切り線を追加
+    layout.operator("mesh.add_all_shape_key_drivers", text="全シェイプキーにドライバー追加", icon='DRIVER')
+    layout.operator("mesh.analyze_shape_key_drivers", text="ドライバーを解析・整理", icon='DRIVER')
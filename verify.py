@@ -0,0 +1,222 @@
+"""高速化した処理と高速化前の実装の結果を比較します
+
+同じメッシュの複製に対して、legacy.py に残した頂点ごとの実装と現在の実装を
+実行し、全シェイプキーの名前・順番・値・相対キー・頂点座標が許容誤差内で一致するかを
+確認する。所要時間も並べて表示する。
+"""
+import json
+
+import bpy
+
+from . import legacy
+from .headless import activate, create_test_object, duplicate_object, registered, remove_object, timed
+from .split import MirrorApplyMixin
+
+
+def add_arguments(parser):
+    parser.add_argument("--vertices", type=int, default=5000, help="テスト用メッシュの頂点数")
+    parser.add_argument("--keys", type=int, default=10, help="テスト用メッシュのシェイプキー数（分割は先頭からこの数まで）")
+    parser.add_argument("--tolerance", type=float, default=1e-5, help="座標と値の許容誤差")
+    parser.add_argument("--generated-only", action="store_true", help="読み込んだファイル内のメッシュは検証しない")
+    parser.add_argument("--json", help="結果をJSONで書き出すファイル")
+
+
+def read_state(obj):
+    """比較用に [(名前, 値, 相対キー名, 座標)] を取得する"""
+    from .kernels import read_shape_key_coords
+
+    if not obj.data.shape_keys:
+        return []
+    return [(key.name, key.value, key.relative_key.name, read_shape_key_coords(key))
+            for key in obj.data.shape_keys.key_blocks]
+
+
+def compare(legacy_obj, fast_obj, tolerance):
+    """2つのオブジェクトのシェイプキーを比較する
+
+    Returns:
+        (一致したか, 座標の最大誤差, 不一致の説明)
+    """
+    import numpy as np
+
+    legacy_state = read_state(legacy_obj)
+    fast_state = read_state(fast_obj)
+    legacy_names = [state[0] for state in legacy_state]
+    fast_names = [state[0] for state in fast_state]
+    if legacy_names != fast_names:
+        return False, None, f"名前または順番が一致しません: {legacy_names} / {fast_names}"
+
+    max_error = 0.0
+    for (name, legacy_value, legacy_relative, legacy_co), (_, fast_value, fast_relative, fast_co) in zip(
+            legacy_state, fast_state):
+        if abs(legacy_value - fast_value) > tolerance:
+            return False, max_error, f"{name} の値が一致しません（{legacy_value} / {fast_value}）"
+        if legacy_relative != fast_relative:
+            return False, max_error, f"{name} の相対キーが一致しません（{legacy_relative} / {fast_relative}）"
+        if legacy_co.shape != fast_co.shape:
+            return False, max_error, f"{name} の頂点数が一致しません（{len(legacy_co)} / {len(fast_co)}）"
+        error = float(np.abs(legacy_co - fast_co).max(initial=0.0))
+        max_error = max(max_error, error)
+        if error > tolerance:
+            return False, max_error, f"{name} の座標が一致しません（最大誤差 {error:g}）"
+    return True, max_error, ""
+
+
+def prepare_copies(base, keep_mirror):
+    """比較用に従来用・高速用の複製を作成する"""
+    copies = []
+    for suffix in ("legacy", "fast"):
+        copy = duplicate_object(base, f"{base.name}_{suffix}")
+        if not keep_mirror:
+            # 分割・統合の比較ではミラー修飾子の適用を含めない
+            for mod in [mod for mod in copy.modifiers if mod.type == 'MIRROR']:
+                copy.modifiers.remove(mod)
+        copies.append(copy)
+    return copies
+
+
+def run_split(legacy_obj, fast_obj, key_count):
+    """先頭から key_count 個のシェイプキーを1つずつ左右分割する"""
+    names = [key.name for key in legacy_obj.data.shape_keys.key_blocks[1:key_count + 1]]
+
+    def run_legacy():
+        key_blocks = legacy_obj.data.shape_keys.key_blocks
+        for name in names:
+            legacy.split_shape_key(legacy_obj, key_blocks[name], legacy_obj.data.shape_keys.reference_key)
+
+    def run_fast():
+        activate(fast_obj)
+        key_blocks = fast_obj.data.shape_keys.key_blocks
+        for name in names:
+            fast_obj.active_shape_key_index = key_blocks.find(name)
+            bpy.ops.mesh.split_shape_key()
+
+    return run_legacy, run_fast
+
+
+def run_merge(legacy_obj, fast_obj, key_count):
+    """全ての左右シェイプキーを統合する"""
+    def run_legacy():
+        legacy.merge_all_shape_keys(legacy_obj)
+
+    def run_fast():
+        activate(fast_obj)
+        bpy.ops.mesh.merge_all_shape_keys()
+
+    return run_legacy, run_fast
+
+
+def run_mirror(legacy_obj, fast_obj, key_count):
+    """ミラー修飾子をシェイプキーを保持したまま適用する"""
+    def run_legacy():
+        activate(legacy_obj)
+        legacy.apply_mirror_with_shape_keys(bpy.context, legacy_obj)
+
+    def run_fast():
+        activate(fast_obj)
+        MirrorApplyMixin().apply_mirror_with_shape_keys(bpy.context, fast_obj)
+
+    return run_legacy, run_fast
+
+
+# 検証する処理の名前と、(従来の処理, 高速化した処理) を返す関数
+CASES = {
+    "split": run_split,
+    "merge": run_merge,
+    "mirror": run_mirror,
+}
+
+
+def verify_case(case, base, key_count, tolerance):
+    """1つのオブジェクトで1つの処理を検証する"""
+    legacy_obj, fast_obj = prepare_copies(base, keep_mirror=case == "mirror")
+    try:
+        run_legacy, run_fast = CASES[case](legacy_obj, fast_obj, key_count)
+        _, legacy_seconds = timed(run_legacy)
+        _, fast_seconds = timed(run_fast)
+        passed, max_error, message = compare(legacy_obj, fast_obj, tolerance)
+    finally:
+        remove_object(legacy_obj)
+        remove_object(fast_obj)
+
+    return {
+        "case": case,
+        "object": base.name,
+        "legacy_seconds": legacy_seconds,
+        "fast_seconds": fast_seconds,
+        "passed": passed,
+        "max_error": max_error,
+        "message": message,
+    }
+
+
+def has_pairs(obj):
+    return bool(legacy.get_shape_key_pairs(obj))
+
+
+def has_mirror(obj):
+    return any(mod.type == 'MIRROR' and mod.show_viewport for mod in obj.modifiers)
+
+
+def file_targets():
+    """読み込んだファイル内で検証するメッシュと処理の組み合わせ"""
+    targets = []
+    for obj in list(bpy.data.objects):
+        if obj.type != 'MESH' or not obj.data.shape_keys or len(obj.data.shape_keys.key_blocks) < 2:
+            continue
+        targets.append(("split", obj))
+        if has_pairs(obj):
+            targets.append(("merge", obj))
+        if has_mirror(obj):
+            targets.append(("mirror", obj))
+    return targets
+
+
+def generated_targets(vertex_count, key_count):
+    """テスト用メッシュを作成し、検証する処理との組み合わせを返す"""
+    # 中心線上・付近の頂点を含め、従来の処理との左右判定の境界の違いも確かめる
+    split_base = create_test_object("PayuVerifySplit", vertex_count, key_count, center_line=True)
+
+    # 統合用に分割済みのシェイプキーだけを持つメッシュを用意する
+    merge_base = duplicate_object(split_base, "PayuVerifyMerge")
+    activate(merge_base)
+    bpy.ops.mesh.split_all_shape_keys()
+    for i in range(key_count):
+        merge_base.shape_key_remove(merge_base.data.shape_keys.key_blocks[f"Key{i:03d}"])
+
+    mirror_base = create_test_object("PayuVerifyMirror", vertex_count, key_count, mirror=True, center_line=True)
+    return [("split", split_base), ("merge", merge_base), ("mirror", mirror_base)]
+
+
+def run(addon, args):
+    results = []
+    with registered(addon):
+        targets = [] if args.generated_only else file_targets()
+        generated = generated_targets(args.vertices, args.keys)
+        try:
+            for case, obj in targets + generated:
+                results.append(verify_case(case, obj, args.keys, args.tolerance))
+        finally:
+            for case, obj in generated:
+                remove_object(obj)
+
+    print(f"{'処理':<8}{'オブジェクト':<24}{'従来 (ms)':>12}{'高速 (ms)':>12}{'倍率':>8}  結果")
+    for result in results:
+        legacy_ms = result["legacy_seconds"] * 1000.0
+        fast_ms = result["fast_seconds"] * 1000.0
+        speedup = legacy_ms / fast_ms if fast_ms > 0 else float("inf")
+        status = "PASS" if result["passed"] else "FAIL"
+        if result["max_error"] is not None:
+            status += f" (最大誤差 {result['max_error']:.2e})"
+        print(f"{result['case']:<8}{result['object']:<24}{legacy_ms:>12.1f}{fast_ms:>12.1f}{speedup:>7.1f}x  {status}")
+        if result["message"]:
+            print(f"        {result['message']}")
+
+    failed = [result for result in results if not result["passed"]]
+    print(f"{len(results) - len(failed)} / {len(results)} 件が一致しました")
+
+    if args.json:
+        report = {"blender": bpy.app.version_string, "tolerance": args.tolerance, "results": results}
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return 1 if failed else 0